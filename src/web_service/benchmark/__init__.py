@@ -0,0 +1,2 @@
+"""Benchmarks of the LetsTalk web service (run against the database
+configured for the current stack)."""
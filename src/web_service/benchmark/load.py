@@ -0,0 +1,468 @@
+"""Drive every route of the web service at fixed concurrency and report
+latency percentiles, throughput and SQL statements per request.
+
+Runs against a running web service (single worker, with metrics
+enabled, so statements per request are read from its '/metrics') that
+uses the database of the current stack (seeded by 'benchmark.seed').
+Reads use IDs sampled from the database, updates modify sampled rows
+and deletes remove rows created (untimed) for them.
+
+Usage (from 'src/web_service' directory):
+    python -m benchmark.seed --truncate
+    python -m benchmark.load [--url http://127.0.0.1:8081]
+        [--concurrency 8] [--requests 200] [--warmup 10]
+        [--list-limit 100] [--bulk-size 10] [--routes REGEX]
+        [--read-only] [--seed 0] [--output results.json]
+"""
+import argparse
+import datetime
+import http.client
+import json
+import re
+import statistics
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from sqlalchemy import func, select
+
+from letstalk import main as service
+from letstalk.database import SessionLocal
+
+from .seed import FIRST_SLOT, MODELS, SLOT_LENGTH, SyntheticData, \
+    count_rows
+
+# Order in which methods are benchmarked (reads see the seeded data)
+METHODS: tuple[str, ...] = ("GET", "POST", "PUT", "DELETE")
+
+# Series of statements per request in metrics of the web service
+_SQL_SAMPLE = re.compile(
+    r'^letstalk_request_sql_statements_(sum|count)'
+    r'\{method="([^"]*)",route="([^"]*)"\} (\S+)$'
+)
+
+
+class Client:
+    """HTTP client keeping one connection per thread"""
+
+    def __init__(self, url: str):
+        """Create client.
+
+        Args:
+            url (str): Base URL of the web service.
+        """
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self._local = threading.local()
+
+    def request(self,
+                method: str,
+                path: str,
+                body: bytes | None = None) -> tuple[int, bytes]:
+        """Send request (reconnect once if the connection was closed).
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path (with query).
+            body (bytes | None): JSON body.
+
+        Returns:
+            tuple[int, bytes]: Status code and body of the response.
+        """
+        headers = {"Content-Type": "application/json"} if body else {}
+        for _attempt in range(2):
+            connection = getattr(self._local, "connection", None)
+            if connection is None:
+                connection = self._local.connection = \
+                    http.client.HTTPConnection(self.host, self.port)
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError) as error:
+                connection.close()
+                self._local.connection = None
+                # Only the connection closed by server is retried
+                if _attempt or not isinstance(error, ConnectionError):
+                    raise
+
+
+def _json(value) -> bytes:
+    """Encode body of request"""
+    return json.dumps(
+        value,
+        default=lambda _value: _value.isoformat()
+        if isinstance(_value, datetime.datetime) else str(_value)
+    ).encode()
+
+
+def route_table(path: str) -> str | None:
+    """Return name of the table the route works with (e. g. 'condition'
+    for '/api/async/condition-with-doctor/...')"""
+    segments = [_segment for _segment in path.split("/")
+                if _segment not in ("", "api", "async", "search", "summary")]
+    if not segments:
+        return None
+    table = segments[0].split("-with-")[0]
+    return table if table in MODELS else None
+
+
+class RequestFactory:
+    """Creates requests of routes (path and body) from the sampled and
+    synthetic data."""
+
+    def __init__(self,
+                 db_session,
+                 data: SyntheticData,
+                 list_limit: int,
+                 bulk_size: int,
+                 sample_size: int = 1000):
+        """Create factory (samples IDs of existing rows).
+
+        Args:
+            db_session (Session): Database connector.
+            data (SyntheticData): Generator of values.
+            list_limit (int): Page size of list routes.
+            bulk_size (int): Items in the body of bulk routes.
+            sample_size (int): Sampled IDs of each table.
+        """
+        self.db_session = db_session
+        self.data = data
+        self.list_limit = list_limit
+        self.bulk_size = bulk_size
+        self.ids = {
+            _table: db_session.execute(
+                select(_model.id).order_by(func.random())
+                .limit(sample_size)
+            ).scalars().all()
+            for _table, _model in MODELS.items()
+        }
+        # Appointments are created after all existing ones
+        latest = db_session.execute(
+            select(func.max(MODELS["appointment"].date_and_time))
+        ).scalar()
+        self.next_slot = (latest or FIRST_SLOT) + datetime.timedelta(days=1)
+
+    def _pick(self, table: str) -> int:
+        """Return ID of random existing row"""
+        return self.data.random.choice(self.ids[table])
+
+    def _row(self, table: str) -> dict:
+        """Return values of new row referencing random existing rows.
+        Appointments get consecutive free slots, so they never overlap
+        appointments of any doctor."""
+        values = self.data.row(table, {
+            _fk.parent.name: self._pick(_fk.column.table.name)
+            for _fk in MODELS[table].__table__.foreign_keys
+        })
+        if table == "appointment":
+            values["date_and_time"] = self.next_slot
+            self.next_slot += SLOT_LENGTH
+        return values
+
+    def _item(self,
+              table: str,
+              serializer: type[BaseModel],
+              pinned: dict[str, int] | None = None) -> dict:
+        """Return body of one item of the serializer (nested items are
+        read from the tables of the same name).
+
+        Updated rows keep their references (and nested items are the
+        referenced rows), so rows are not moved between parents (e. g.
+        appointments of a condition to a doctor busy at the time).
+
+        Args:
+            table (str): Name of the table.
+            serializer (type[BaseModel]): Serializer of the item.
+            pinned (dict[str, int] | None): IDs of updated rows by
+                table name (random rows are updated if not pinned).
+
+        Returns:
+            dict: Values of the item.
+        """
+        pinned = {} if pinned is None else pinned
+        values = self._row(table)
+        if "id" in serializer.__fields__:
+            values["id"] = pinned.setdefault(table, self._pick(table))
+        if table in pinned:
+            existing = MODELS[table].get(self.db_session, id=pinned[table])
+            for _fk in MODELS[table].__table__.foreign_keys:
+                values[_fk.parent.name] = existing[_fk.parent.name]
+                pinned.setdefault(_fk.column.table.name,
+                                  existing[_fk.parent.name])
+        for _name, _field in serializer.__fields__.items():
+            if isinstance(_field.type_, type) and \
+                    issubclass(_field.type_, BaseModel):
+                values[_name] = self._item(_name, _field.type_, pinned)
+        return {_name: values[_name] for _name in serializer.__fields__
+                if _name in values}
+
+    def _created_ids(self, table: str, count: int) -> list[int]:
+        """Insert rows (not part of the measurement) and return IDs"""
+        created, _errors = MODELS[table].bulk_create(
+            self.db_session, [self._row(table) for _ in range(count)]
+        )
+        return [_item["id"] for _item in created]
+
+    def requests(self,
+                 route: APIRoute,
+                 method: str,
+                 count: int) -> list[tuple[str, bytes | None]]:
+        """Create requests of the route.
+
+        Args:
+            route (APIRoute): Route of the web service.
+            method (str): HTTP method.
+            count (int): Number of requests.
+
+        Returns:
+            list[tuple[str, bytes | None]]: Path and body of requests.
+
+        Raises:
+            ValueError: If requests of the route cannot be created.
+        """
+        if route.endpoint is service.stream_changes:
+            raise ValueError("endless stream of events")
+        table = route_table(route.path)
+        params = set(route.param_convertors)
+        if params - {"item_id"} or (table is None and
+                                    (params or method != "GET")):
+            raise ValueError("unknown parameters or table")
+
+        paths = [route.path] * count
+        bodies: list[bytes | None] = [None] * count
+        ids: list[int] = []
+        if "item_id" in params:
+            ids = (self._created_ids(table, count) if method == "DELETE"
+                   else [self._pick(table) for _ in range(count)])
+            paths = [route.path.replace("{item_id}", str(_id))
+                     for _id in ids]
+        elif method == "GET" and "limit" in {
+            _param.name for _param in route.dependant.query_params
+        }:
+            paths = [f"{route.path}?limit={self.list_limit}"] * count
+        if method == "GET" and "q" in {
+            _param.name for _param in route.dependant.query_params
+        }:
+            # Full-text search
+            paths = [f"{_path}&q={self.data.search_text()}"
+                     for _path in paths]
+        if method == "GET" and "from" in {
+            _param.alias for _param in route.dependant.query_params
+        }:
+            # Availability in the week of seeded appointments
+            first_day = FIRST_SLOT.date()
+            week = f"from={first_day}T00:00:00" \
+                   f"&to={first_day + datetime.timedelta(days=7)}T00:00:00"
+            paths = [f"{_path}?{week}" for _path in paths]
+
+        if method == "DELETE" and route.body_field is not None:
+            # Bulk delete of rows created for it
+            ids = self._created_ids(table, count * self.bulk_size)
+            bodies = [_json(ids[_i:_i + self.bulk_size])
+                      for _i in range(0, len(ids), self.bulk_size)]
+        elif route.body_field is not None:
+            field = route.body_field
+            if field.outer_type_ is not field.type_:
+                # Bulk create or update
+                bodies = [_json([self._item(table, field.type_)
+                                 for _ in range(self.bulk_size)])
+                          for _ in range(count)]
+            elif ids:
+                # Update of the item of the path
+                bodies = [_json(self._item(table, field.type_,
+                                           {table: _id}))
+                          for _id in ids]
+            else:
+                bodies = [_json(self._item(table, field.type_))
+                          for _ in range(count)]
+        return list(zip(paths, bodies))
+
+
+def scrape_statements(client: Client) -> dict[tuple[str, str], list]:
+    """Read total statements and number of requests by route from
+    metrics of the web service.
+
+    Args:
+        client (Client): HTTP client.
+
+    Returns:
+        dict[tuple[str, str], list]: Sum of statements and count of
+            requests by method and route template (empty if metrics
+            are not available).
+    """
+    status, body = client.request("GET", "/metrics")
+    totals = {}
+    if status != 200:
+        return totals
+    for _line in body.decode().splitlines():
+        match = _SQL_SAMPLE.match(_line)
+        if match:
+            kind, method, route, value = match.groups()
+            totals.setdefault((method, route), [0.0, 0])[
+                0 if kind == "sum" else 1
+            ] = float(value)
+    return totals
+
+
+def summarize(latencies: list[float], errors: int,
+              duration: float) -> dict:
+    """Summarize the measurement (latencies in milliseconds).
+
+    Args:
+        latencies (list[float]): Latencies of requests (seconds).
+        errors (int): Number of failed requests.
+        duration (float): Wall time of the measurement (seconds).
+
+    Returns:
+        dict: Requests, errors, throughput and latency percentiles.
+    """
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": duration,
+        "throughput_rps": len(latencies) / duration if duration else None,
+    }
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100,
+                                           method="inclusive")
+        result["latency_ms"] = {
+            "mean": statistics.fmean(latencies) * 1000,
+            "p50": percentiles[49] * 1000,
+            "p95": percentiles[94] * 1000,
+            "p99": percentiles[98] * 1000,
+            "max": max(latencies) * 1000,
+        }
+    return result
+
+
+def run_requests(client: Client,
+                 executor: ThreadPoolExecutor,
+                 method: str,
+                 requests: list[tuple[str, bytes | None]]
+                 ) -> tuple[list[float], int, float]:
+    """Send requests using all threads of the executor.
+
+    Args:
+        client (Client): HTTP client.
+        executor (ThreadPoolExecutor): Pool of the fixed size.
+        method (str): HTTP method.
+        requests (list[tuple[str, bytes | None]]): Path and body of
+            requests.
+
+    Returns:
+        tuple[list[float], int, float]: Latencies (seconds), number of
+            failed requests and wall time (seconds).
+    """
+    def _send(request: tuple[str, bytes | None]) -> tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            status, _body = client.request(method, *request)
+        except (http.client.HTTPException, OSError):
+            return time.perf_counter() - start, False
+        return time.perf_counter() - start, status < 400
+
+    start = time.perf_counter()
+    results = list(executor.map(_send, requests))
+    duration = time.perf_counter() - start
+    return ([_latency for _latency, _ok in results],
+            sum(1 for _latency, _ok in results if not _ok),
+            duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8081")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=10,
+                        help="requests per route before measurement")
+    parser.add_argument("--list-limit", type=int, default=100)
+    parser.add_argument("--bulk-size", type=int, default=10)
+    parser.add_argument("--routes", default=None,
+                        help="benchmark only routes matching the regex")
+    parser.add_argument("--read-only", action="store_true",
+                        help="benchmark only GET routes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="write results to the file (JSON)")
+    args = parser.parse_args()
+
+    # Routes exactly as registered by the web service
+    routes = [
+        (_method, _route)
+        for _method in METHODS
+        for _route in service.create_app().routes
+        if isinstance(_route, APIRoute) and _method in _route.methods
+        and (args.routes is None or re.search(args.routes, _route.path))
+        and not (args.read_only and _method != "GET")
+    ]
+
+    client = Client(args.url)
+    db_session = SessionLocal()
+    factory = RequestFactory(db_session, SyntheticData(args.seed),
+                             args.list_limit, args.bulk_size)
+    results, skipped = [], []
+    all_latencies, all_errors, all_duration = [], 0, 0.0
+    try:
+        rows = count_rows(db_session)
+        with ThreadPoolExecutor(args.concurrency) as executor:
+            for _method, _route in routes:
+                try:
+                    warmup = factory.requests(_route, _method, args.warmup)
+                    measured = factory.requests(_route, _method,
+                                                args.requests)
+                except ValueError as error:
+                    skipped.append({"method": _method,
+                                    "route": _route.path,
+                                    "reason": str(error)})
+                    continue
+                run_requests(client, executor, _method, warmup)
+                before = scrape_statements(client)
+                latencies, errors, duration = run_requests(
+                    client, executor, _method, measured
+                )
+                after = scrape_statements(client)
+
+                result = {"method": _method, "route": _route.path} | \
+                    summarize(latencies, errors, duration)
+                statements, requests = [
+                    _after - _before for _after, _before in zip(
+                        after.get((_method, _route.path), (0, 0)),
+                        before.get((_method, _route.path), (0, 0))
+                    )
+                ]
+                result["queries_per_request"] = (
+                    statements / requests if requests else None
+                )
+                results.append(result)
+                all_latencies.extend(latencies)
+                all_errors += errors
+                all_duration += duration
+    finally:
+        db_session.close()
+
+    report = json.dumps({
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "requests_per_route": args.requests,
+        "seed": args.seed,
+        "rows": rows,
+        "routes": results,
+        "skipped": skipped,
+        "total": summarize(all_latencies, all_errors, all_duration),
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the Core read path of ExtendedModelMixin (rows projected
+straight to dicts) with the former ORM read path (instance per row
+serialized by 'to_dict').
+
+Rows are inserted in a transaction that is rolled back at the end.
+
+Usage (from 'src/web_service' directory):
+    python -m benchmark.read_path [--rows 20000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import insert
+
+from letstalk import models
+from letstalk.database import SessionLocal
+
+
+def legacy_all(db_session, model: type) -> list[dict]:
+    """Former implementation of 'all' (ORM instances)"""
+    results = db_session.query(model).order_by(model.id)
+    items = [_item.to_dict() for _item in results.all()]
+    # Identity map would be reused by the next call otherwise
+    db_session.expunge_all()
+    return items
+
+
+def best_of(repeat: int, function, *args) -> float:
+    """Return the best time (milliseconds) of 'repeat' runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db_session = SessionLocal()
+    try:
+        doctor_id = db_session.execute(
+            insert(models.Doctor.__table__).values(
+                name="Benchmark", specialism="none"
+            ).returning(models.Doctor.id)
+        ).scalar_one()
+        db_session.execute(insert(models.Condition.__table__), [
+            {"name": f"Condition {_i}", "duration": "1 week",
+             "details": "Benchmark " * 20, "doctor_id": doctor_id}
+            for _i in range(args.rows)
+        ])
+        orm = best_of(args.repeat, legacy_all, db_session,
+                      models.Condition)
+        core = best_of(args.repeat, models.Condition.all, db_session)
+        print(json.dumps({
+            "rows": args.rows,
+            "orm_ms": orm,
+            "core_ms": core,
+            "speedup": orm / core,
+        }, indent=2))
+    finally:
+        db_session.rollback()
+        db_session.close()
+
+
+if __name__ == "__main__":
+    main()
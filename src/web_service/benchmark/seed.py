@@ -0,0 +1,297 @@
+"""Seed the database with synthetic clinical data (doctors, their
+conditions and concerns, expectations and appointments of conditions).
+
+Data are generated from the seed of the random generator, so the same
+arguments always produce the same data set.
+
+Usage (from 'src/web_service' directory):
+    python -m benchmark.seed [--doctors 100] [--conditions-per-doctor 10]
+        [--concerns-per-condition 5] [--expectations-per-condition 3]
+        [--appointments-per-condition 5] [--seed 0] [--truncate]
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+
+from sqlalchemy import func, select, text
+
+from letstalk import models
+from letstalk.database import SessionLocal
+
+# Models by the name of their table
+MODELS: dict[str, type] = {
+    _model.__tablename__: _model
+    for _model in (models.Doctor, models.Condition, models.Concern,
+                   models.Expectation, models.Appointment)
+}
+
+SPECIALISMS: tuple[str, ...] = (
+    "general practice", "cardiology", "dermatology", "neurology",
+    "oncology", "paediatrics", "psychiatry", "orthopaedics",
+    "gastroenterology", "endocrinology",
+)
+FIRST_NAMES: tuple[str, ...] = (
+    "Anna", "Jan", "Eva", "Petr", "Lucie", "Martin", "Jana", "Tomas",
+    "Klara", "David", "Marie", "Pavel",
+)
+LAST_NAMES: tuple[str, ...] = (
+    "Novak", "Svoboda", "Dvorak", "Cerny", "Prochazka", "Kucera",
+    "Vesely", "Horak", "Nemec", "Marek", "Pokorny", "Kral",
+)
+CONDITIONS: tuple[str, ...] = (
+    "Hypertension", "Type 2 diabetes", "Asthma", "Migraine",
+    "Atopic dermatitis", "Anxiety disorder", "Lower back pain",
+    "Hypothyroidism", "Irritable bowel syndrome", "Osteoarthritis",
+)
+DURATIONS: tuple[str, ...] = (
+    "1 week", "2 weeks", "1 month", "3 months", "6 months", "1 year",
+    "chronic",
+)
+SYMPTOMS: tuple[str, ...] = (
+    "headache", "fatigue", "nausea", "dizziness", "chest pain",
+    "shortness of breath", "rash", "insomnia", "joint pain", "fever",
+)
+EXPECTATIONS: tuple[str, ...] = (
+    "Stabilised blood pressure", "Reduced pain", "Normal sleep",
+    "Improved mobility", "Symptom free", "Lower dosage of medication",
+)
+WORDS: tuple[str, ...] = (
+    "patient", "reports", "mild", "severe", "since", "last", "visit",
+    "medication", "prescribed", "follow", "up", "recommended", "test",
+    "results", "stable", "improving", "worsening", "daily", "night",
+)
+
+# First appointment slot and slots of one working day
+FIRST_SLOT: datetime.datetime = datetime.datetime(2022, 1, 3, 8, 0)
+SLOT_LENGTH: datetime.timedelta = datetime.timedelta(minutes=30)
+SLOTS_PER_DAY: int = 16
+
+
+class SyntheticData:
+    """Generator of synthetic clinical data (values of rows)"""
+
+    def __init__(self, seed: int = 0):
+        """Create generator.
+
+        Args:
+            seed (int): Seed of the random generator.
+        """
+        self.random = random.Random(seed)
+        # Next free appointment slot of each calendar
+        self._slots: dict[int, int] = {}
+
+    def _text(self, words: int) -> str:
+        """Return random sentence of given number of words"""
+        return " ".join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def search_text(self) -> str:
+        """Return text searched in conditions, concerns or expectations
+        (a word of the seeded vocabulary)"""
+        return self.random.choice(
+            self.random.choice((CONDITIONS, SYMPTOMS, EXPECTATIONS, WORDS))
+        ).split()[0].lower()
+
+    def doctor(self) -> dict:
+        """Return values of new doctor"""
+        return {
+            "name": f"{self.random.choice(FIRST_NAMES)} "
+                    f"{self.random.choice(LAST_NAMES)}",
+            "specialism": self.random.choice(SPECIALISMS),
+        }
+
+    def condition(self, doctor_id: int) -> dict:
+        """Return values of new condition of the doctor"""
+        return {
+            "name": self.random.choice(CONDITIONS),
+            "duration": self.random.choice(DURATIONS),
+            "details": self._text(self.random.randint(5, 30)),
+            "doctor_id": doctor_id,
+        }
+
+    def concern(self, condition_id: int) -> dict:
+        """Return values of new concern of the condition"""
+        return {
+            "creator": self.random.choice(
+                list(models.ConcernCreatorEnum)
+            ).value,
+            "details": self._text(self.random.randint(5, 20)),
+            "symptoms": ", ".join(self.random.sample(
+                SYMPTOMS, self.random.randint(1, 3)
+            )),
+            "level": self.random.randint(1, 5),
+            "condition_id": condition_id,
+        }
+
+    def expectation(self, condition_id: int) -> dict:
+        """Return values of new expectation of the condition"""
+        return {
+            "name": self.random.choice(EXPECTATIONS),
+            "details": self._text(self.random.randint(5, 20)),
+            "condition_id": condition_id,
+        }
+
+    def appointment(self,
+                    condition_id: int,
+                    calendar: int | None = None) -> dict:
+        """Return values of new appointment of the condition.
+
+        Args:
+            condition_id (int): ID of the condition.
+            calendar (int | None): Appointments of the same calendar
+                (e. g. of one doctor) never overlap, condition is the
+                calendar if not set.
+
+        Returns:
+            dict: Values of the appointment.
+        """
+        calendar = condition_id if calendar is None else calendar
+        slot = self._slots.get(calendar, 0)
+        self._slots[calendar] = slot + self.random.randint(1, 4)
+        day, slot_of_day = divmod(slot, SLOTS_PER_DAY)
+        return {
+            "details": self._text(self.random.randint(3, 10)),
+            "date_and_time": (FIRST_SLOT + datetime.timedelta(days=day)
+                              + slot_of_day * SLOT_LENGTH),
+            "condition_id": condition_id,
+        }
+
+    def row(self, table: str, references: dict[str, int]) -> dict:
+        """Return values of new row of the table.
+
+        Args:
+            table (str): Name of the table.
+            references (dict[str, int]): IDs of referenced items (by
+                the name of foreign key column).
+
+        Returns:
+            dict: Values of the row.
+        """
+        if table == "doctor":
+            return self.doctor()
+        return getattr(self, table)(*references.values())
+
+
+def seed(db_session,
+         data: SyntheticData,
+         doctors: int,
+         conditions_per_doctor: int,
+         concerns_per_condition: int,
+         expectations_per_condition: int,
+         appointments_per_condition: int,
+         batch_size: int = 1000) -> dict[str, int]:
+    """Insert synthetic data (using bulk inserts of models).
+
+    Args:
+        db_session (Session): Database connector.
+        data (SyntheticData): Generator of values.
+        doctors (int): Number of doctors.
+        conditions_per_doctor (int): Number of conditions of a doctor.
+        concerns_per_condition (int): Number of concerns of a condition.
+        expectations_per_condition (int): Number of expectations of a
+            condition.
+        appointments_per_condition (int): Number of appointments of a
+            condition.
+        batch_size (int): Number of doctors (conditions) inserted
+            together with their children.
+
+    Returns:
+        dict[str, int]: Number of inserted rows by table.
+    """
+    inserted = dict.fromkeys(MODELS, 0)
+
+    def _insert(table: str, rows: list[dict]) -> list[dict]:
+        created, _errors = MODELS[table].bulk_create(db_session, rows,
+                                                     batch_size)
+        inserted[table] += len(created)
+        return created
+
+    for _start in range(0, doctors, batch_size):
+        new_doctors = _insert("doctor", [
+            data.doctor()
+            for _ in range(min(batch_size, doctors - _start))
+        ])
+        conditions = _insert("condition", [
+            data.condition(_doctor["id"])
+            for _doctor in new_doctors
+            for _ in range(conditions_per_doctor)
+        ])
+        for _first in range(0, len(conditions), batch_size):
+            batch = conditions[_first:_first + batch_size]
+            for _table, _count in (
+                ("concern", concerns_per_condition),
+                ("expectation", expectations_per_condition),
+            ):
+                _insert(_table, [
+                    getattr(data, _table)(_condition["id"])
+                    for _condition in batch
+                    for _ in range(_count)
+                ])
+            # Doctor does not have two appointments at the same time
+            _insert("appointment", [
+                data.appointment(_condition["id"],
+                                 _condition["doctor_id"])
+                for _condition in batch
+                for _ in range(appointments_per_condition)
+            ])
+    return inserted
+
+
+def truncate(db_session):
+    """Remove all rows of models (and reset their sequences)"""
+    db_session.execute(text(
+        f"TRUNCATE {', '.join(MODELS)} RESTART IDENTITY CASCADE"
+    ))
+    db_session.commit()
+
+
+def count_rows(db_session) -> dict[str, int]:
+    """Return number of rows by table"""
+    return {
+        _table: db_session.execute(
+            select(func.count()).select_from(_model.__table__)
+        ).scalar_one()
+        for _table, _model in MODELS.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--conditions-per-doctor", type=int, default=10)
+    parser.add_argument("--concerns-per-condition", type=int, default=5)
+    parser.add_argument("--expectations-per-condition", type=int,
+                        default=3)
+    parser.add_argument("--appointments-per-condition", type=int,
+                        default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--truncate", action="store_true",
+                        help="remove existing rows first")
+    args = parser.parse_args()
+
+    db_session = SessionLocal()
+    try:
+        if args.truncate:
+            truncate(db_session)
+        start = time.perf_counter()
+        inserted = seed(db_session, SyntheticData(args.seed),
+                        args.doctors,
+                        args.conditions_per_doctor,
+                        args.concerns_per_condition,
+                        args.expectations_per_condition,
+                        args.appointments_per_condition,
+                        args.batch_size)
+        print(json.dumps({
+            "seed": args.seed,
+            "inserted": inserted,
+            "rows": count_rows(db_session),
+            "duration_s": time.perf_counter() - start,
+        }, indent=2))
+    finally:
+        db_session.close()
+
+
+if __name__ == "__main__":
+    main()
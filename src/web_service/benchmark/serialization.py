@@ -0,0 +1,57 @@
+"""Compare encoding of the list response by the response model
+(validation by pydantic and 'jsonable_encoder', as FastAPI does) with
+the precompiled encoder of 'letstalk.utils.serialization'.
+
+Rows are synthetic (nothing is read from the database).
+
+Usage (from 'src/web_service' directory):
+    python -m benchmark.serialization [--rows 20000] [--repeat 5]
+"""
+import argparse
+import datetime
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from letstalk import serializers
+from letstalk.utils.serialization import create_list_encoder, dumps
+from benchmark.read_path import best_of
+
+
+def validated(items: list[dict], pydantic_model: type) -> bytes:
+    """Former encoding (validation by response model)"""
+    validated_items = [pydantic_model(**_item) for _item in items]
+    return JSONResponse(jsonable_encoder(validated_items)).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    condition = {"id": 1, "name": "Condition", "duration": "1 week",
+                 "details": "Benchmark " * 20, "doctor_id": 1}
+    items = [
+        {"id": _i, "details": "Appointment",
+         "date_and_time": datetime.datetime(2030, 1, 1, 10, 30),
+         "condition": condition}
+        for _i in range(args.rows)
+    ]
+    pydantic_model = serializers.AppointmentWithConditionSerializer
+    encode_items = create_list_encoder(pydantic_model)
+
+    validation = best_of(args.repeat, validated, items, pydantic_model)
+    encoder = best_of(args.repeat,
+                      lambda: dumps(encode_items(items)))
+    print(json.dumps({
+        "rows": args.rows,
+        "validated_ms": validation,
+        "encoder_ms": encoder,
+        "speedup": validation / encoder,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measure cold start of a worker (import of the application and
+creation of the web service) in fresh interpreters and check it
+against the budget. Starting a worker must not connect to the
+database.
+
+Usage (from 'src/web_service' directory):
+    python -m benchmark.startup_time [--runs 5] [--budget-ms 1500]
+
+Exits with status 1 if the median exceeds the budget or if the
+database is touched.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Executed in a fresh interpreter (nothing is imported yet)
+_MEASURE = """
+import json, time
+start = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connections = []
+event.listen(Pool, "connect", lambda *_args: connections.append(1))
+from letstalk.main import create_app
+import_done = time.perf_counter()
+create_app()
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (import_done - start) * 1000,
+    "create_app_ms": (done - import_done) * 1000,
+    "total_ms": (done - start) * 1000,
+    "connections": len(connections),
+}))
+"""
+
+
+def measure() -> dict:
+    """Start the application in a fresh interpreter"""
+    output = subprocess.run([sys.executable, "-c", _MEASURE],
+                            check=True, capture_output=True, text=True)
+    return json.loads(output.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    result = {
+        _key: statistics.median(_run[_key] for _run in runs)
+        for _key in ("import_ms", "create_app_ms", "total_ms")
+    }
+    result["connections"] = max(_run["connections"] for _run in runs)
+    result["budget_ms"] = args.budget_ms
+    result["within_budget"] = result["total_ms"] <= args.budget_ms \
+        and result["connections"] == 0
+    print(json.dumps(result, indent=2))
+    if not result["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare database round trips of the write methods of
+ExtendedModelMixin (INSERT/UPDATE/DELETE ... RETURNING) with the
+former ORM based implementation.
+
+Usage (from 'src/web_service' directory):
+    python -m benchmark.write_roundtrips [--iterations 200]
+"""
+from typing import Any, Callable
+import argparse
+import json
+import time
+
+from sqlalchemy import event, inspect
+
+from letstalk import models
+from letstalk.database import engine, SessionLocal
+
+
+class StatementCounter:
+    """Counts statements sent to the database"""
+
+    def __init__(self):
+        self.statements = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *_args):
+        self.statements += 1
+
+
+# ===================================
+#   FORMER IMPLEMENTATION (ORM)
+# ===================================
+def legacy_create(db_session, values: dict) -> dict[str, Any]:
+    """Insert using ORM (commit and refresh of the primary key)"""
+    item = models.Doctor(**values)
+    db_session.add(item)
+    db_session.commit()
+    for pk in inspect(models.Doctor).primary_key:
+        getattr(item, pk.name)
+    return item.to_dict()
+
+
+def legacy_update(db_session, item_id: int, values: dict) -> int:
+    """Update using ORM query and count updated items"""
+    selection = db_session.query(models.Doctor).filter_by(id=item_id)
+    selection.update(values)
+    db_session.commit()
+    return int(selection.count())
+
+
+def legacy_delete(db_session, item_id: int) -> int:
+    """Count and delete using ORM query"""
+    selection = db_session.query(models.Doctor).filter_by(id=item_id)
+    affected = int(selection.count())
+    selection.delete()
+    db_session.commit()
+    return affected
+
+
+# ===================================
+#   CURRENT IMPLEMENTATION (RETURNING)
+# ===================================
+def returning_create(db_session, values: dict) -> dict[str, Any]:
+    return models.Doctor(**values).create(db_session)
+
+
+def returning_update(db_session, item_id: int, values: dict) -> int:
+    return models.Doctor.update(db_session, {"id": item_id}, values)[1]
+
+
+def returning_delete(db_session, item_id: int) -> int:
+    return models.Doctor.delete(db_session, {"id": item_id})
+
+
+def measure(counter: StatementCounter,
+            iterations: int,
+            create: Callable,
+            update: Callable,
+            remove: Callable) -> dict[str, dict[str, float]]:
+    """Run create, update and delete 'iterations' times and return
+    statements and milliseconds per operation."""
+    results = {}
+    ids = []
+    operations = (
+        ("create", lambda _session, _i: ids.append(create(
+            _session, {"name": f"Benchmark {_i}", "specialism": "none"}
+        )["id"])),
+        ("update", lambda _session, _i: update(
+            _session, ids[_i], {"name": f"Updated {_i}"}
+        )),
+        ("delete", lambda _session, _i: remove(_session, ids[_i])),
+    )
+    for name, operation in operations:
+        db_session = SessionLocal()
+        statements = counter.statements
+        start = time.perf_counter()
+        for _i in range(iterations):
+            operation(db_session, _i)
+        elapsed = time.perf_counter() - start
+        db_session.close()
+        results[name] = {
+            "statements_per_op": (counter.statements - statements)
+            / iterations,
+            "ms_per_op": elapsed * 1000 / iterations,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    counter = StatementCounter()
+    print(json.dumps({
+        "iterations": args.iterations,
+        "legacy": measure(counter, args.iterations,
+                          legacy_create, legacy_update, legacy_delete),
+        "returning": measure(counter, args.iterations,
+                             returning_create, returning_update,
+                             returning_delete),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
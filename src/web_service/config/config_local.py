@@ -9,4 +9,43 @@ class ConfigLocal(ConfigBase):
     PGSQL_PORT: int = 5432
     PGSQL_DATABASE: str = "letstalk"
 
+    PGSQL_POOL_SIZE: int = 5
+    PGSQL_MAX_OVERFLOW: int = 10
+    PGSQL_POOL_TIMEOUT: int = 30
+    PGSQL_POOL_RECYCLE: int = 1800
+    PGSQL_POOL_PRE_PING: bool = True
+    PGSQL_STATEMENT_TIMEOUT: int = 30000
+
+    PGSQL_REPLICA_DSNS: list[str] = []
+    PGSQL_REPLICA_HEALTH_CHECK_INTERVAL: float = 5.0
+    PGSQL_REPLICA_MAX_LAG: float = 10.0
+    READ_YOUR_WRITES_WINDOW: float = 5.0
+
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_SIZE: int = 10000
+    ENTITY_CACHE_TTL: float = 60.0
+    ENTITY_CACHE_REDIS_URL: str | None = None
+
+    SUMMARY_TABLE_ENABLED: bool = True
+
+    CHANGE_FEED_ENABLED: bool = True
+    CHANGE_FEED_HEARTBEAT: float = 15.0
+    CHANGE_FEED_QUEUE_SIZE: int = 1000
+
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_LIMITS: dict[str, int] = {"detail": 16, "list": 4,
+                                        "write": 8}
+    ADMISSION_QUEUE_SIZES: dict[str, int] = {"detail": 64, "list": 16,
+                                             "write": 32}
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 1
+
+    METRICS_ENABLED: bool = True
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SAMPLE_INTERVAL: float = 0.001
+    PROFILING_STORE_SIZE: int = 100
+    SLOW_QUERY_THRESHOLD_MS: float | None = 200.0
+
     CORS_ORIGINS: list[str] = ["*"]
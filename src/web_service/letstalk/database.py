@@ -0,0 +1,223 @@
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
+import logging
+
+from fastapi import Request
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, \
+    AsyncSession
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from config import CONFIG
+
+from .utils.metrics import instrument_engine
+from .utils.profiling import profile_engine
+from .utils.pool_stats import PoolCheckoutStats, create_timed_pool_class
+from .utils.replicas import REPLICA_SESSION_INFO, ReplicaSet, \
+    pinned_to_primary
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.pool import Pool
+
+LOGGER = logging.getLogger(__name__)
+
+# ===================================
+#    CREATE POSTGRESQL CONNECTION
+# ===================================
+SQLALCHEMY_DATABASE_URL = f"postgresql://{CONFIG.PGSQL_USER}:" \
+                          f"{CONFIG.PGSQL_PASS}@" \
+                          f"{CONFIG.PGSQL_HOST}:" \
+                          f"{CONFIG.PGSQL_PORT}/" \
+                          f"{CONFIG.PGSQL_DATABASE}"
+
+# Shared pool options (sizes are per worker process)
+POOL_OPTIONS = {
+    "pool_size": CONFIG.PGSQL_POOL_SIZE,
+    "max_overflow": CONFIG.PGSQL_MAX_OVERFLOW,
+    "pool_timeout": CONFIG.PGSQL_POOL_TIMEOUT,
+    "pool_recycle": CONFIG.PGSQL_POOL_RECYCLE,
+    "pool_pre_ping": CONFIG.PGSQL_POOL_PRE_PING,
+}
+
+
+def _observe_engine(new_engine: 'Engine'):
+    """Measure statements executed by requests (see 'utils.metrics'),
+    record them to profiles of requests and log slow statements (see
+    'utils.profiling')."""
+    instrument_engine(new_engine)
+    if CONFIG.PROFILING_ENABLED or \
+            CONFIG.SLOW_QUERY_THRESHOLD_MS is not None:
+        profile_engine(new_engine, CONFIG.SLOW_QUERY_THRESHOLD_MS)
+
+
+def _create_engine(url: str, stats: PoolCheckoutStats) -> 'Engine':
+    """Create synchronous engine (psycopg2 driver) with observed pool.
+
+    Args:
+        url (str): URL of the database.
+        stats (PoolCheckoutStats): Statistics of the pool.
+
+    Returns:
+        Engine: Engine (measured and profiled).
+    """
+    new_engine = create_engine(
+        url,
+        poolclass=create_timed_pool_class(QueuePool, stats),
+        connect_args={
+            "options": f"-c statement_timeout="
+                       f"{CONFIG.PGSQL_STATEMENT_TIMEOUT}"
+        },
+        **POOL_OPTIONS
+    )
+    _observe_engine(new_engine)
+    return new_engine
+
+
+def _create_async_engine(url: str,
+                         stats: PoolCheckoutStats) -> AsyncEngine:
+    """Create asynchronous engine (asyncpg driver) with observed pool.
+
+    Args:
+        url (str): URL of the database (for synchronous driver).
+        stats (PoolCheckoutStats): Statistics of the pool.
+
+    Returns:
+        AsyncEngine: Engine (measured and profiled).
+    """
+    new_engine = create_async_engine(
+        url.replace("postgresql://", "postgresql+asyncpg://", 1),
+        poolclass=create_timed_pool_class(AsyncAdaptedQueuePool, stats),
+        connect_args={
+            "server_settings": {
+                "statement_timeout": str(CONFIG.PGSQL_STATEMENT_TIMEOUT)
+            }
+        },
+        **POOL_OPTIONS
+    )
+    _observe_engine(new_engine.sync_engine)
+    return new_engine
+
+
+# Synchronous connection (psycopg2 driver)
+pool_stats = PoolCheckoutStats()
+engine = _create_engine(SQLALCHEMY_DATABASE_URL, pool_stats)
+SessionLocal = sessionmaker(bind=engine)
+
+# Asynchronous connection (asyncpg driver)
+async_pool_stats = PoolCheckoutStats()
+async_engine = _create_async_engine(SQLALCHEMY_DATABASE_URL,
+                                    async_pool_stats)
+# Objects must not expire (lazy loading is not possible in async)
+AsyncSessionLocal = sessionmaker(bind=async_engine,
+                                 class_=AsyncSession,
+                                 expire_on_commit=False)
+
+# ===================================
+#   READ REPLICAS (reading routes)
+# ===================================
+replica_pool_stats = [PoolCheckoutStats()
+                      for _ in CONFIG.PGSQL_REPLICA_DSNS]
+replica_engines = [_create_engine(_dsn, _stats) for _dsn, _stats
+                   in zip(CONFIG.PGSQL_REPLICA_DSNS, replica_pool_stats)]
+ReplicaSessionLocal = [
+    sessionmaker(bind=_engine, info={REPLICA_SESSION_INFO: True})
+    for _engine in replica_engines
+]
+async_replica_pool_stats = [PoolCheckoutStats()
+                            for _ in CONFIG.PGSQL_REPLICA_DSNS]
+async_replica_engines = [
+    _create_async_engine(_dsn, _stats) for _dsn, _stats
+    in zip(CONFIG.PGSQL_REPLICA_DSNS, async_replica_pool_stats)
+]
+AsyncReplicaSessionLocal = [
+    sessionmaker(bind=_engine,
+                 class_=AsyncSession,
+                 expire_on_commit=False,
+                 info={REPLICA_SESSION_INFO: True})
+    for _engine in async_replica_engines
+]
+# Health checks are started with the web service
+replicas = ReplicaSet(replica_engines,
+                      CONFIG.PGSQL_REPLICA_HEALTH_CHECK_INTERVAL,
+                      CONFIG.PGSQL_REPLICA_MAX_LAG)
+
+
+def observed_pools() -> dict[str, tuple[PoolCheckoutStats, 'Pool']]:
+    """Return all connection pools with their statistics (by name)."""
+    pools = {"sync": (pool_stats, engine.pool),
+             "async": (async_pool_stats, async_engine.pool)}
+    for _index, _engine in enumerate(replica_engines):
+        pools[f"replica{_index}"] = (replica_pool_stats[_index],
+                                     _engine.pool)
+        pools[f"replica{_index}_async"] = (
+            async_replica_pool_stats[_index],
+            async_replica_engines[_index].pool
+        )
+    return pools
+
+
+# ===================================
+#   SESSIONS (FastAPI dependencies)
+# ===================================
+def get_db_session() -> Iterator[Session]:
+    """Create database session scoped to one request.
+
+    Yields:
+        Session: Database connector (closed after the response).
+    """
+    db_session = SessionLocal()
+    try:
+        yield db_session
+    finally:
+        db_session.close()
+
+
+def get_read_db_session(request: Request) -> Iterator[Session]:
+    """Create database session of reading routes scoped to one request.
+
+    Session is connected to a healthy read replica (in round-robin),
+    to the primary if there is none or if the client wrote something
+    recently (read-your-writes).
+
+    Args:
+        request (Request): Request.
+
+    Yields:
+        Session: Database connector (closed after the response).
+    """
+    replica = None if pinned_to_primary(request) else replicas.choose()
+    db_session = (SessionLocal if replica is None
+                  else ReplicaSessionLocal[replica])()
+    try:
+        yield db_session
+    finally:
+        db_session.close()
+
+
+async def get_async_db_session() -> AsyncIterator[AsyncSession]:
+    """Create asynchronous database session scoped to one request.
+
+    Yields:
+        AsyncSession: Database connector (closed after the response).
+    """
+    async with AsyncSessionLocal() as db_session:
+        yield db_session
+
+
+async def get_async_read_db_session(
+        request: Request
+) -> AsyncIterator[AsyncSession]:
+    """Create asynchronous database session of reading routes scoped
+    to one request (see 'get_read_db_session').
+
+    Args:
+        request (Request): Request.
+
+    Yields:
+        AsyncSession: Database connector (closed after the response).
+    """
+    replica = None if pinned_to_primary(request) else replicas.choose()
+    async with (AsyncSessionLocal if replica is None
+                else AsyncReplicaSessionLocal[replica])() as db_session:
+        yield db_session
@@ -1,46 +1,77 @@
+import datetime
 import logging
 
-from fastapi import FastAPI
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, \
+    Request, Response
 from fastapi import status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi_utils.cbv import cbv
 from fastapi_utils.inferring_router import InferringRouter
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
 from config import CONFIG
 
 from . import __title__, __version__, __author__
+from . import database
 from . import models
+from . import scheduling
+from . import serializers
+from . import summaries
+from .utils.admission import AdmissionController, AdmissionMiddleware
+from .utils.asyncviewset import create_async_generic_viewset, \
+    async_viewset_with_condition_detail
+from .utils.batch import create_batch_viewset
+from .utils.changes import SSE_MEDIA_TYPE, ChangeFeed, ChangeFilter
+from .utils.constraints import constraint_violation
 from .utils.genericviewset import create_generic_viewset
+from .utils.etag import ETAG_HEADER, check_etag
+from .utils.filters import create_filter_dependency
+from .utils.metrics import MetricsMiddleware, ServiceMetrics, \
+    PROMETHEUS_MEDIA_TYPE
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.profiling import PROFILE_ID_HEADER, ProfileStore, \
+    ProfilingMiddleware
+from .utils.replicas import ReadYourWritesMiddleware
+from .utils.searchviewset import create_search_viewset
+from .utils.serialization import create_encoder, create_list_encoder, \
+    encoded_response
+from .utils.summaryviewset import create_summary_viewset
+from .utils.timezones import naive_utc
 from .utils.viewsetwithcondition import viewset_with_condition_detail
 
 LOGGER = logging.getLogger(__file__)
 
-# ===================================
-#         Main web service
-# ===================================
-service = FastAPI()
-
-# ===================================
-#          CORS headers
-# ===================================
-service.add_middleware(
-    CORSMiddleware,
-    allow_origins=CONFIG.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Metrics of this worker (exposed on '/metrics')
+service_metrics = ServiceMetrics()
+# Limits of concurrent requests of this worker (if enabled)
+admission_controller = AdmissionController(CONFIG.ADMISSION_LIMITS,
+                                           CONFIG.ADMISSION_QUEUE_SIZES,
+                                           CONFIG.ADMISSION_QUEUE_TIMEOUT)
+# Profiles of requests of this worker (if profiling is enabled)
+profile_store = ProfileStore(CONFIG.PROFILING_STORE_SIZE)
+# Changes of data fanned out to subscribers of this worker (if enabled)
+change_feed = ChangeFeed(database.SQLALCHEMY_DATABASE_URL,
+                         CONFIG.CHANGE_FEED_QUEUE_SIZE)
+# Details of errors of violated constraints of models (by name)
+CONSTRAINT_DETAILS: dict[str, str] = {
+    scheduling.OVERLAP_CONSTRAINT: scheduling.OVERLAP_DETAIL
+}
+# Tables of models with changes published by the feed
+CHANGED_MODELS: frozenset[str] = frozenset(
+    _model.__tablename__ for _model in (models.Doctor, models.Condition,
+                                        models.Concern, models.Expectation,
+                                        models.Appointment)
 )
 
 # ===================================
-#        Database connector
+#        Application routes
 # ===================================
-db_session = models.db_session()
+router = InferringRouter()
 
 
-# ===================================
-#        Application routes
-# ===================================
-@service.get("/")
+@router.get("/")
 def display_root():
     """Default informative end-point running on root address"""
     return {
@@ -50,136 +81,566 @@ def display_root():
     }
 
 
-router = InferringRouter()
+@router.get("/api/stats/pool")
+def display_pool_stats():
+    """Connection pool statistics of this worker (including time
+    spent waiting for connection checkout)"""
+    return {
+        _name: _stats.snapshot(_pool)
+        for _name, (_stats, _pool) in database.observed_pools().items()
+    }
 
-# CRUD for model: Doctor
-create_generic_viewset(router,
-                       models.Doctor,
-                       models.DoctorSerializer,
-                       models.DoctorModifySerializer,
-                       db_session,
-                       r"/api/doctor")
 
+@router.get("/api/stats/replicas")
+def display_replica_stats():
+    """Health of read replicas (checked periodically)"""
+    return [
+        {"host": _engine.url.host, "healthy": _healthy}
+        for _engine, _healthy in zip(database.replica_engines,
+                                     database.replicas.healthy)
+    ]
 
-# CRUD for model: Condition
-@cbv(router)
-class ConditionViewSet(
-    create_generic_viewset(router,
-                           models.Condition,
-                           models.ConditionSerializer,
-                           models.ConditionModifySerializer,
-                           db_session,
-                           r"/api/condition")
+
+@router.get("/api/stats/cache")
+def display_cache_stats():
+    """Entity cache statistics of this worker (hits and misses)"""
+    if models.ExtendedModelMixin.entity_cache is None:
+        return {"enabled": False}
+    return {"enabled": True} | models.ExtendedModelMixin.entity_cache.stats()
+
+
+@router.get("/api/stats/changes")
+def display_change_feed_stats():
+    """State of the change feed of this worker (listening connection,
+    subscribers and received events)"""
+    return change_feed.stats()
+
+
+@router.get("/api/stats/admission")
+def display_admission_stats():
+    """Admission control of this worker (requests in flight, queue
+    depth and rejections by class of request)"""
+    if not CONFIG.ADMISSION_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True} | admission_controller.stats()
+
+
+@router.get("/metrics", include_in_schema=False)
+def display_metrics():
+    """Metrics of this worker in Prometheus text format (latency,
+    SQL statements per request, connection pools and admission)"""
+    return Response(
+        service_metrics.render(
+            database.observed_pools(),
+            admission_controller.stats() if CONFIG.ADMISSION_ENABLED
+            else None
+        ),
+        media_type=PROMETHEUS_MEDIA_TYPE
+    )
+
+
+# ===================================
+#   Scheduling (appointments of doctors)
+# ===================================
+encode_availability = create_encoder(
+    serializers.DoctorAvailabilitySerializer
+)
+
+
+@router.get(r"/api/doctor/{item_id}/availability",
+            response_model=serializers.DoctorAvailabilitySerializer)
+def display_doctor_availability(
+        item_id: int,
+        date_from: datetime.datetime = Query(
+            ..., alias="from", description="Start of the time range"
+        ),
+        date_to: datetime.datetime = Query(
+            ..., alias="to", description="End of the time range (exclusive)"
+        ),
+        min_duration: int | None = Query(
+            None, gt=0, description="Only free slots at least this long "
+                                    "(minutes)"
+        ),
+        db_session: Session = Depends(database.get_read_db_session)
 ):
-    @router.post(r"/api/condition-with-doctor",
-                 response_model=models.ConditionDoctorNestedSerializer,
-                 status_code=status.HTTP_201_CREATED)
-    def create_doctor_and_condition(
-            self,
-            item: models.ConditionAndDoctorModifySerializer
+    """Appointments of the doctor (busy slots) and free time between them
+    in the time range (timezone-aware times are converted to UTC)"""
+    date_from = naive_utc(date_from)
+    date_to = naive_utc(date_to)
+    if not date_from < date_to <= date_from + datetime.timedelta(
+            days=scheduling.MAX_AVAILABILITY_DAYS
     ):
-        """Create both doctor and condition in one call"""
-        # Create doctor:
-        doctor = models.Doctor(
-            **item.dict()['doctor']
-        ).create(db_session)
-        # Create condition
-        new_condition = models.Condition(
-            **item.dict()['condition'],
-            doctor_id=doctor['id']
-        ).create(db_session)
-
-        # Construct nested object
-        new_condition.pop('doctor_id')  # Remove doctor_id from root
-        new_condition = new_condition | {'doctor': doctor}
-
-        db_session.close()
-
-        return new_condition
-
-    @router.get(
-        r"/api/condition-with-doctor",
-        response_model=list[models.ConditionDoctorNestedSerializer],
-        status_code=status.HTTP_200_OK
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Time range must be non-empty and at most "
+                   f"{scheduling.MAX_AVAILABILITY_DAYS} days long"
+        )
+    try:
+        models.Doctor.get(db_session, id=item_id)
+    except AttributeError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Item not found")
+    return encoded_response(
+        scheduling.doctor_availability(db_session, item_id, date_from,
+                                       date_to, min_duration),
+        encode_availability
+    )
+
+
+def handle_integrity_error(request: Request,
+                           error: IntegrityError) -> JSONResponse:
+    """Write violating a constraint conflicts with other items (409, e. g.
+    overlapping appointments of a doctor) or has invalid values (422, e. g.
+    missing referenced item) instead of 500"""
+    status_code, detail = constraint_violation(error, CONSTRAINT_DETAILS)
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+# ===================================
+#   Debugging routes (if enabled)
+# ===================================
+debug_router = InferringRouter()
+
+
+@debug_router.get("/api/debug/profile")
+def list_profiles():
+    """Stored profiles of requests of this worker (newest first)"""
+    return profile_store.summaries()
+
+
+@debug_router.get("/api/debug/profile/{profile_id}")
+def display_profile(profile_id: str):
+    """Profile of the request (SQL statements with their duration and
+    sampled call stacks), ID is returned in 'X-Profile-Id' header of
+    the profiled response"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Profile not found")
+    return profile.to_dict()
+
+
+# ===================================
+#   Change feed (if enabled)
+# ===================================
+changes_router = InferringRouter()
+
+
+@changes_router.get("/api/changes")
+async def stream_changes(
+        model: list[str] | None = Query(
+            None, description="Only changes of these models (tables)"
+        ),
+        doctor_id: int | None = Query(
+            None, description="Only changes of the doctor and of rows "
+                              "of its conditions"
+        ),
+        condition_id: int | None = Query(
+            None, description="Only changes of the condition and of rows "
+                              "referencing it"
+        )
+):
+    """Stream changes of data as server-sent events: 'change' event
+    with model, operation, ID and IDs of the condition and the doctor
+    (written rows are not included) and 'resync' event if some changes
+    could be missed (lists should be reloaded)."""
+    if model is not None and not set(model) <= CHANGED_MODELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown model, choose from: "
+                   f"{', '.join(sorted(CHANGED_MODELS))}"
+        )
+    change_filter = ChangeFilter(
+        frozenset(model) if model is not None else None,
+        doctor_id, condition_id
     )
-    def list_doctor_and_condition(self):
-        """Return nested dict without doctor_id but as nested
-        dict for 'doctor' key (presenting the whole Doctor object).
-        """
-        all_conditions = models.Condition.all(db_session)
-        _conditions = []
-        for condition in all_conditions:
-            # Remove 'doctor_id' field
-            doctor_id = int(condition.pop("doctor_id"))
-            # Add nested field for doctor
-            condition['doctor'] = models.Doctor.get(db_session,
-                                                    id=doctor_id)
-            _conditions.append(condition)
-
-        db_session.close()
-        return _conditions
-
-    @router.put(
-        r"/api/condition-with-doctor",
-        response_model=models.ConditionDoctorNestedSerializer,
-        status_code=status.HTTP_200_OK
+    return StreamingResponse(
+        change_feed.stream(change_filter, CONFIG.CHANGE_FEED_HEARTBEAT),
+        media_type=SSE_MEDIA_TYPE,
+        # Events must not be cached nor buffered by proxies
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    def update_doctor_and_condition(
-            self, item: models.ConditionAndDoctorSerializer
-    ):
-        """Update both doctor and condition on one call.
-        """
-        # Construct standard Condition & Doctor data-sets
-        request = item.dict()
-        condition = request.pop('condition')
-        doctor = request.pop('doctor')
-        condition['doctor_id'] = doctor['id']
-        # Update condition
-        models.Condition.update(db_session,
-                                {"id": condition['id']},
-                                condition)
-        # Update doctor
-        models.Doctor.update(db_session,
-                             {"id": doctor['id']},
-                             doctor)
-        db_session.close()
-        # Return nested structure
-        condition.pop('doctor_id')
-        new_condition = condition | {'doctor': doctor}
-        return new_condition
-
-# CRUD for model: Expectation
-viewset_with_condition_detail(
-    router,
-    models.Expectation,
-    models.ExpectationSerializer,
-    models.ExpectationModifySerializer,
-    models.ExpectationWithConditionSerializer,
-    db_session,
-    r"/api/expectation"
-)
 
-# CRUD for model: Concern
-viewset_with_condition_detail(
-    router,
-    models.Concern,
-    models.ConcernSerializer,
-    models.ConcernModifySerializer,
-    models.ConcernWithConditionSerializer,
-    db_session,
-    r"/api/concern"
-)
 
-# CRUD for model: Appointment
-viewset_with_condition_detail(
-    router,
-    models.Appointment,
-    models.AppointmentSerializer,
-    models.AppointmentModifySerializer,
-    models.AppointmentWithConditionSerializer,
-    db_session,
-    r"/api/appointment"
+# CRUD for model: Condition
+encode_condition_doctor = create_encoder(
+    serializers.ConditionDoctorNestedSerializer
+)
+encode_conditions_doctor = create_list_encoder(
+    serializers.ConditionDoctorNestedSerializer
+)
+condition_filter_dependency = create_filter_dependency(
+    models.Condition.list_filters
 )
 
-# Register router
-service.include_router(router)
+
+def create_condition_viewset(router: APIRouter) -> type:
+    """Create view set of conditions (including routes with nested
+    doctor)."""
+    @cbv(router)
+    class ConditionViewSet(
+        create_generic_viewset(router,
+                               models.Condition,
+                               serializers.ConditionSerializer,
+                               serializers.ConditionModifySerializer,
+                               database.get_db_session,
+                               r"/api/condition",
+                               database.get_read_db_session)
+    ):
+        @router.post(
+            r"/api/condition-with-doctor",
+            response_model=serializers.ConditionDoctorNestedSerializer,
+            status_code=status.HTTP_201_CREATED
+        )
+        def create_doctor_and_condition(
+                self,
+                item: serializers.ConditionAndDoctorModifySerializer
+        ):
+            """Create both doctor and condition in one call (one
+            transaction)"""
+            # Create doctor:
+            doctor = models.Doctor(
+                **item.dict()['doctor']
+            ).create(self.db_session, commit=False)
+            # Create condition
+            new_condition = models.Condition(
+                **item.dict()['condition'],
+                doctor_id=doctor['id']
+            ).create(self.db_session, commit=False)
+            self.db_session.commit()
+
+            # Construct nested object
+            new_condition.pop('doctor_id')  # Remove doctor_id from root
+            new_condition = new_condition | {'doctor': doctor}
+
+            return encoded_response(new_condition, encode_condition_doctor,
+                                    status_code=status.HTTP_201_CREATED)
+
+        @router.get(
+            r"/api/condition-with-doctor",
+            response_model=list[serializers.ConditionDoctorNestedSerializer],
+            status_code=status.HTTP_200_OK
+        )
+        def list_doctor_and_condition(
+                self,
+                request: Request,
+                response: Response,
+                criteria: list = Depends(condition_filter_dependency)
+        ):
+            """Return nested dict without doctor_id but as nested
+            dict for 'doctor' key (presenting the whole Doctor object).
+            """
+            not_modified = check_etag(
+                request, response,
+                models.Condition.table_versions(self.read_db_session,
+                                                models.Doctor)
+            )
+            if not_modified is not None:
+                return not_modified
+            # Doctors are joined in and each is serialized only once
+            _conditions = models.Condition.all_with_related(
+                self.read_db_session, models.Doctor, 'doctor_id', 'doctor',
+                criteria=criteria
+            )
+
+            return encoded_response(_conditions, encode_conditions_doctor,
+                                    response)
+
+        @router.put(
+            r"/api/condition-with-doctor",
+            response_model=serializers.ConditionDoctorNestedSerializer,
+            status_code=status.HTTP_200_OK
+        )
+        def update_doctor_and_condition(
+                self, item: serializers.ConditionAndDoctorSerializer
+        ):
+            """Update both doctor and condition on one call (one
+            transaction).
+            """
+            # Construct standard Condition & Doctor data-sets
+            request = item.dict()
+            condition = request.pop('condition')
+            doctor = request.pop('doctor')
+            condition['doctor_id'] = doctor['id']
+            # Update condition
+            new_condition, condition_count = models.Condition.update(
+                self.db_session, {"id": condition['id']}, condition,
+                commit=False
+            )
+            # Update doctor
+            new_doctor, doctor_count = models.Doctor.update(
+                self.db_session, {"id": doctor['id']}, doctor,
+                commit=False
+            )
+            if condition_count != 1 or doctor_count != 1:
+                # In the case of wrong ID (nothing is updated)
+                self.db_session.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Item not found")
+            self.db_session.commit()
+            # Return nested structure (stored values)
+            new_condition.pop('doctor_id')
+            new_condition = new_condition | {'doctor': new_doctor}
+            return encoded_response(new_condition, encode_condition_doctor)
+
+    return ConditionViewSet
+
+
+def register_viewsets(router: APIRouter):
+    """Register view sets of all models.
+
+    Args:
+        router (APIRouter): Router where routes are registered.
+    """
+    # CRUD for model: Doctor
+    create_generic_viewset(router,
+                           models.Doctor,
+                           serializers.DoctorSerializer,
+                           serializers.DoctorModifySerializer,
+                           database.get_db_session,
+                           r"/api/doctor",
+                           database.get_read_db_session)
+
+    # CRUD for model: Condition
+    create_condition_viewset(router)
+
+    # CRUD for model: Expectation
+    viewset_with_condition_detail(
+        router,
+        models.Expectation,
+        serializers.ExpectationSerializer,
+        serializers.ExpectationModifySerializer,
+        serializers.ExpectationWithConditionSerializer,
+        database.get_db_session,
+        r"/api/expectation",
+        database.get_read_db_session
+    )
+
+    # CRUD for model: Concern
+    viewset_with_condition_detail(
+        router,
+        models.Concern,
+        serializers.ConcernSerializer,
+        serializers.ConcernModifySerializer,
+        serializers.ConcernWithConditionSerializer,
+        database.get_db_session,
+        r"/api/concern",
+        database.get_read_db_session
+    )
+
+    # CRUD for model: Appointment
+    viewset_with_condition_detail(
+        router,
+        models.Appointment,
+        serializers.AppointmentSerializer,
+        serializers.AppointmentModifySerializer,
+        serializers.AppointmentWithConditionSerializer,
+        database.get_db_session,
+        r"/api/appointment",
+        database.get_read_db_session
+    )
+
+    # ===================================
+    #   Transactional batch of operations
+    # ===================================
+    create_batch_viewset(
+        router,
+        {
+            "doctor": (models.Doctor,
+                       serializers.DoctorSerializer,
+                       serializers.DoctorModifySerializer),
+            "condition": (models.Condition,
+                          serializers.ConditionSerializer,
+                          serializers.ConditionModifySerializer),
+            "expectation": (models.Expectation,
+                            serializers.ExpectationSerializer,
+                            serializers.ExpectationModifySerializer),
+            "concern": (models.Concern,
+                        serializers.ConcernSerializer,
+                        serializers.ConcernModifySerializer),
+            "appointment": (models.Appointment,
+                            serializers.AppointmentSerializer,
+                            serializers.AppointmentModifySerializer),
+        },
+        database.get_db_session,
+        r"/api/batch",
+        CONSTRAINT_DETAILS
+    )
+
+    # ===================================
+    #    Full-text search (/api/search)
+    # ===================================
+    create_search_viewset(router,
+                          models.Condition,
+                          serializers.ConditionSerializer,
+                          database.get_read_db_session,
+                          r"/api/search/condition")
+    create_search_viewset(router,
+                          models.Concern,
+                          serializers.ConcernSerializer,
+                          database.get_read_db_session,
+                          r"/api/search/concern",
+                          (models.Condition, ))
+    create_search_viewset(router,
+                          models.Expectation,
+                          serializers.ExpectationSerializer,
+                          database.get_read_db_session,
+                          r"/api/search/expectation",
+                          (models.Condition, ))
+
+    # ===================================
+    #   Summaries (aggregates of items)
+    # ===================================
+    create_summary_viewset(router,
+                           models.Condition,
+                           serializers.ConditionSummarySerializer,
+                           summaries.condition_summaries,
+                           database.get_read_db_session,
+                           r"/api/condition",
+                           r"/api/summary/condition",
+                           "condition_id")
+    create_summary_viewset(router,
+                           models.Doctor,
+                           serializers.DoctorSummarySerializer,
+                           summaries.doctor_summaries,
+                           database.get_read_db_session,
+                           r"/api/doctor",
+                           r"/api/summary/doctor",
+                           "doctor_id")
+
+    # ===================================
+    #   Asynchronous routes (/api/async)
+    # ===================================
+    # CRUD for model: Doctor
+    create_async_generic_viewset(router,
+                                 models.Doctor,
+                                 serializers.DoctorSerializer,
+                                 serializers.DoctorModifySerializer,
+                                 database.get_async_db_session,
+                                 r"/api/async/doctor",
+                                 database.get_async_read_db_session)
+
+    # CRUD for model: Condition
+    create_async_generic_viewset(router,
+                                 models.Condition,
+                                 serializers.ConditionSerializer,
+                                 serializers.ConditionModifySerializer,
+                                 database.get_async_db_session,
+                                 r"/api/async/condition",
+                                 database.get_async_read_db_session)
+
+    # CRUD for model: Expectation
+    async_viewset_with_condition_detail(
+        router,
+        models.Expectation,
+        serializers.ExpectationSerializer,
+        serializers.ExpectationModifySerializer,
+        serializers.ExpectationWithConditionSerializer,
+        database.get_async_db_session,
+        r"/api/async/expectation",
+        database.get_async_read_db_session
+    )
+
+    # CRUD for model: Concern
+    async_viewset_with_condition_detail(
+        router,
+        models.Concern,
+        serializers.ConcernSerializer,
+        serializers.ConcernModifySerializer,
+        serializers.ConcernWithConditionSerializer,
+        database.get_async_db_session,
+        r"/api/async/concern",
+        database.get_async_read_db_session
+    )
+
+    # CRUD for model: Appointment
+    async_viewset_with_condition_detail(
+        router,
+        models.Appointment,
+        serializers.AppointmentSerializer,
+        serializers.AppointmentModifySerializer,
+        serializers.AppointmentWithConditionSerializer,
+        database.get_async_db_session,
+        r"/api/async/appointment",
+        database.get_async_read_db_session
+    )
+
+
+# ===================================
+#         Main web service
+# ===================================
+def create_app() -> FastAPI:
+    """Create the web service (application factory).
+
+    Database is not touched (schema is managed by migrations), so
+    workers start without waiting for it. View sets are registered
+    directly to the router of the application, as including a router
+    would rebuild every route once more.
+
+    Returns:
+        FastAPI: Web service.
+    """
+    service = FastAPI()
+    service.add_exception_handler(IntegrityError, handle_integrity_error)
+
+    # ===================================
+    #   Admission control (innermost)
+    # ===================================
+    if CONFIG.ADMISSION_ENABLED:
+        service.add_middleware(AdmissionMiddleware,
+                               controller=admission_controller,
+                               retry_after=CONFIG.ADMISSION_RETRY_AFTER)
+
+    # ===================================
+    #          CORS headers
+    # ===================================
+    service.add_middleware(
+        CORSMiddleware,
+        allow_origins=CONFIG.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, PROFILE_ID_HEADER],
+    )
+
+    # ===================================
+    #             Metrics
+    # ===================================
+    if CONFIG.METRICS_ENABLED:
+        service.add_middleware(MetricsMiddleware, metrics=service_metrics)
+
+    # ===================================
+    #            Profiling
+    # ===================================
+    if CONFIG.PROFILING_ENABLED:
+        service.add_middleware(
+            ProfilingMiddleware,
+            store=profile_store,
+            header=CONFIG.PROFILING_HEADER,
+            sample_interval=CONFIG.PROFILING_SAMPLE_INTERVAL
+        )
+        service.include_router(debug_router)
+
+    # ===================================
+    #   Read replicas (read-your-writes)
+    # ===================================
+    if database.replica_engines:
+        if CONFIG.READ_YOUR_WRITES_WINDOW > 0:
+            service.add_middleware(ReadYourWritesMiddleware,
+                                   window=CONFIG.READ_YOUR_WRITES_WINDOW)
+        service.add_event_handler("startup", database.replicas.start)
+        service.add_event_handler("shutdown", database.replicas.stop)
+
+    # ===================================
+    #   Change feed (LISTEN/NOTIFY)
+    # ===================================
+    if CONFIG.CHANGE_FEED_ENABLED:
+        service.include_router(changes_router)
+        service.add_event_handler("startup", change_feed.start)
+        service.add_event_handler("shutdown", change_feed.stop)
+
+    # Register routes
+    service.include_router(router)
+    register_viewsets(service.router)
+    return service
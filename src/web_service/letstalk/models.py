@@ -1,43 +1,34 @@
+import datetime
 import enum
 import logging
 
-from sqlalchemy import Column, Integer, String, \
-    create_engine, ForeignKey, DateTime
-from pydantic_sqlalchemy import sqlalchemy_to_pydantic
-from pydantic import BaseModel, Field
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, \
+    Index, select
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, scoped_session
+from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import ENUM as pgsql_ENUM
 
 from config import CONFIG
 
-from .utils.model_modifier import skip_primary_keys_in_model, \
-    skip_fields_in_pydantic_model
+from .utils.entity_cache import EntityCache, LocalCacheBackend, \
+    RedisCacheBackend
 from .utils.extended_model import ExtendedModelMixin
+from .utils.filters import ListFilter
+from .utils.search import SEARCH_VECTOR_COLUMN, create_search_vector_column
+from .utils.async_extended_model import AsyncExtendedModelMixin
+from .utils.table_version import create_version_table
+from .utils.timezones import naive_utc
 
 LOGGER = logging.getLogger(__name__)
 
-# ===================================
-#    CREATE POSTGRESQL CONNECTION
-# ===================================
-SQLALCHEMY_DATABASE_URL = f"postgresql://{CONFIG.PGSQL_USER}:" \
-                          f"{CONFIG.PGSQL_PASS}@" \
-                          f"{CONFIG.PGSQL_HOST}:" \
-                          f"{CONFIG.PGSQL_PORT}/" \
-                          f"{CONFIG.PGSQL_DATABASE}"
-
-# TODO: DB connection management needs overhaul
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-db_session = scoped_session(sessionmaker(bind=engine))
-
-
 # ===================================
 #          DATABASE MODELS
 # ===================================
+# Schema is created and upgraded by migrations ('alembic upgrade head')
 Base = declarative_base()
 
 
-class Doctor(Base, ExtendedModelMixin):
+class Doctor(Base, ExtendedModelMixin, AsyncExtendedModelMixin):
     """Table defining doctor"""
     __tablename__ = "doctor"
 
@@ -52,9 +43,16 @@ class Doctor(Base, ExtendedModelMixin):
     conditions = relationship("Condition")
 
 
-class Condition(Base, ExtendedModelMixin):
+class Condition(Base, ExtendedModelMixin, AsyncExtendedModelMixin):
     """Table for patient condition"""
     __tablename__ = "condition"
+    __table_args__ = (
+        # Full-text search
+        Index("ix_condition_search_vector", SEARCH_VECTOR_COLUMN,
+              postgresql_using="gin"),
+    )
+    # Document of full-text search is never selected
+    __mapper_args__ = {"exclude_properties": [SEARCH_VECTOR_COLUMN]}
 
     # Primary key
     id = Column(Integer, primary_key=True)
@@ -63,12 +61,15 @@ class Condition(Base, ExtendedModelMixin):
     name = Column(String, nullable=False)
     duration = Column(String, nullable=False)
     details = Column(String)
+    search_vector = create_search_vector_column({"name": "A",
+                                                 "details": "B"})
 
     # Foreign key to Doctor
     doctor_id = Column(Integer,
                        ForeignKey('doctor.id',
                                   ondelete="CASCADE"),
-                       nullable=False)
+                       nullable=False,
+                       index=True)
     doctor = relationship('Doctor',
                           back_populates="conditions")
 
@@ -86,9 +87,18 @@ class ConcernCreatorEnum(enum.Enum):
     doctor = "doctor"
 
 
-class Concern(Base, ExtendedModelMixin):
+class Concern(Base, ExtendedModelMixin, AsyncExtendedModelMixin):
     """Concerns related to patient health"""
     __tablename__ = "concern"
+    __table_args__ = (
+        # Filtering by condition (and level)
+        Index("ix_concern_condition_id_level", "condition_id", "level"),
+        # Full-text search
+        Index("ix_concern_search_vector", SEARCH_VECTOR_COLUMN,
+              postgresql_using="gin"),
+    )
+    # Document of full-text search is never selected
+    __mapper_args__ = {"exclude_properties": [SEARCH_VECTOR_COLUMN]}
 
     # Primary key
     id = Column(Integer, primary_key=True)
@@ -98,6 +108,8 @@ class Concern(Base, ExtendedModelMixin):
     details = Column(String)
     symptoms = Column(String, nullable=False)
     level = Column(Integer, nullable=False)
+    search_vector = create_search_vector_column({"symptoms": "A",
+                                                 "details": "B"})
 
     # Foreign key to Condition
     condition_id = Column(Integer,
@@ -108,9 +120,18 @@ class Concern(Base, ExtendedModelMixin):
                              back_populates="concerns")
 
 
-class Expectation(Base, ExtendedModelMixin):
+class Expectation(Base, ExtendedModelMixin, AsyncExtendedModelMixin):
     """Expected progression of diagnosis"""
     __tablename__ = "expectation"
+    __table_args__ = (
+        # Filtering by condition
+        Index("ix_expectation_condition_id", "condition_id"),
+        # Full-text search
+        Index("ix_expectation_search_vector", SEARCH_VECTOR_COLUMN,
+              postgresql_using="gin"),
+    )
+    # Document of full-text search is never selected
+    __mapper_args__ = {"exclude_properties": [SEARCH_VECTOR_COLUMN]}
 
     # Primary key
     id = Column(Integer, primary_key=True)
@@ -118,6 +139,8 @@ class Expectation(Base, ExtendedModelMixin):
     # Data specific columns
     name = Column(String, nullable=False)
     details = Column(String)
+    search_vector = create_search_vector_column({"name": "A",
+                                                 "details": "B"})
 
     # Foreign key to Condition
     condition_id = Column(Integer,
@@ -128,9 +151,23 @@ class Expectation(Base, ExtendedModelMixin):
                              back_populates="expectations")
 
 
-class Appointment(Base, ExtendedModelMixin):
+class Appointment(Base, ExtendedModelMixin, AsyncExtendedModelMixin):
     """Appointment to address a condition."""
     __tablename__ = "appointment"
+    __table_args__ = (
+        # Filtering by condition (and time range)
+        Index("ix_appointment_condition_id_date_and_time",
+              "condition_id", "date_and_time"),
+        # Filtering by time range
+        Index("ix_appointment_date_and_time", "date_and_time"),
+        # Filtering by doctor (and time range), availability of doctors
+        # (overlapping appointments of a doctor are rejected by the
+        # exclusion constraint of migration '0005')
+        Index("ix_appointment_doctor_id_date_and_time",
+              "doctor_id", "date_and_time"),
+    )
+    # Doctor is maintained by triggers (never written by the application)
+    __mapper_args__ = {"exclude_properties": ["doctor_id"]}
 
     # Primary key
     id = Column(Integer, primary_key=True)
@@ -139,6 +176,10 @@ class Appointment(Base, ExtendedModelMixin):
     details = Column(String)
     date_and_time = Column(DateTime,  # When to set appointment
                            nullable=False)
+    duration_minutes = Column(Integer, nullable=False, server_default="30")
+
+    # Doctor of the condition (copied by triggers, see migration '0005')
+    doctor_id = Column(Integer)
 
     # Foreign key to Condition
     condition_id = Column(Integer,
@@ -149,95 +190,95 @@ class Appointment(Base, ExtendedModelMixin):
                              back_populates="appointments")
 
 
-# ===================================
-#  MIGRATE CHANGES INTO THE DATABASE
-# ===================================
-Base.metadata.create_all(engine)
-
-# ===================================
-#    PYDANTIC MODELS (SERIALIZERS)
-# ===================================
-# Full serializers
-DoctorSerializer = sqlalchemy_to_pydantic(Doctor)
-ConditionSerializer = sqlalchemy_to_pydantic(Condition)
-class ConcernSerializer(sqlalchemy_to_pydantic(Concern)):
-    """Modify default concern serializer to restrict level"""
-    level: int = Field(gt=0, lt=6) # level is the integer in [1, 5]
-
-
-ExpectationSerializer = sqlalchemy_to_pydantic(Expectation)
-AppointmentSerializer = sqlalchemy_to_pydantic(Appointment)
-
-# Serializers for create and modify operations
-DoctorModifySerializer = skip_primary_keys_in_model(
-    DoctorSerializer, "DoctorModifySerializer"
-)
-ConditionModifySerializer = skip_primary_keys_in_model(
-    ConditionSerializer, "ConditionModifySerializer"
-)
-ConcernModifySerializer = skip_primary_keys_in_model(
-    ConcernSerializer, "ConcernModifySerializer"
-)
-ExpectationModifySerializer = skip_primary_keys_in_model(
-    ExpectationSerializer, "ExpectationModifySerializer"
-)
-AppointmentModifySerializer = skip_primary_keys_in_model(
-    AppointmentSerializer, "AppointmentModifySerializer"
-)
-
-
-# Join serializers for Condition and Doctor
-class ConditionAndDoctorModifySerializer(BaseModel):
-    condition: skip_fields_in_pydantic_model(
-        ConditionModifySerializer,
-        "ConditionModifyNoNameSerializer",
-        {"doctor_id"}  # This one is skipped
-    )
-    doctor: DoctorModifySerializer
-
-
-class ConditionAndDoctorSerializer(BaseModel):
-    condition: skip_fields_in_pydantic_model(
-        ConditionSerializer,
-        "ConditionNoNameSerializer",
-        {"doctor_id"}  # This one is skipped
-    )
-    doctor: DoctorSerializer
-
-
-class ConditionDoctorNestedSerializer(
-    skip_fields_in_pydantic_model(
-        ConditionSerializer,
-        "ConditionNoNameSerializer",
-        {"doctor_id"}  # This one is skipped
-    )
-):
-    doctor: DoctorSerializer
-
+class ConditionSummary(Base):
+    """Aggregates of the condition (maintained by database triggers on
+    every write into concerns, expectations and appointments, see
+    migration '0003'). Read only, used by summary end-points if
+    'SUMMARY_TABLE_ENABLED' is set."""
+    __tablename__ = "condition_summary"
 
-class ConcernWithConditionSerializer(skip_fields_in_pydantic_model(
-        ConcernSerializer,
-        "ConcernNoNameSerializer",
-        {"condition_id"}  # This one is skipped
-    )):
-    condition: ConditionSerializer
+    # Primary key (and foreign key to Condition)
+    condition_id = Column(Integer,
+                          ForeignKey('condition.id',
+                                     ondelete="CASCADE"),
+                          primary_key=True)
 
+    # Aggregates
+    concern_count = Column(Integer, nullable=False)
+    max_concern_level = Column(Integer)
+    expectation_count = Column(Integer, nullable=False)
+    appointment_count = Column(Integer, nullable=False)
 
-class ExpectationWithConditionSerializer(
-    skip_fields_in_pydantic_model(
-        ExpectationSerializer,
-        "ExpectationNoNameSerializer",
-        {"condition_id"}  # This one is skipped
-    )):
-    condition: ConditionSerializer
 
+# ===================================
+#     FILTERS OF LIST END-POINTS
+# ===================================
+def _condition_filters(model: type) -> dict[str, ListFilter]:
+    """Filters of models referencing condition (by condition or by
+    doctor of the condition)"""
+    return {
+        "condition_id": ListFilter(
+            int, lambda _value: model.condition_id == _value,
+            "Only items of the condition"
+        ),
+        "doctor_id": ListFilter(
+            int, lambda _value: model.condition_id.in_(
+                select(Condition.id).where(
+                    Condition.doctor_id == _value
+                ).correlate(None)
+            ),
+            "Only items of conditions of the doctor"
+        ),
+    }
+
+
+Condition.list_filters = {
+    "doctor_id": ListFilter(
+        int, lambda _value: Condition.doctor_id == _value,
+        "Only conditions of the doctor"
+    ),
+}
+Concern.list_filters = _condition_filters(Concern) | {
+    "level_gte": ListFilter(
+        int, lambda _value: Concern.level >= _value,
+        "Only concerns with at least this level"
+    ),
+}
+Expectation.list_filters = _condition_filters(Expectation)
+Appointment.list_filters = _condition_filters(Appointment) | {
+    # Doctor is copied to appointments (no subquery of conditions)
+    "doctor_id": ListFilter(
+        int, lambda _value: Appointment.__table__.c.doctor_id == _value,
+        "Only appointments of the doctor"
+    ),
+    # Times of appointments are naive UTC (see 'naive_utc')
+    "date_from": ListFilter(
+        datetime.datetime,
+        lambda _value: Appointment.date_and_time >= naive_utc(_value),
+        "Only appointments at or after this time"
+    ),
+    "date_to": ListFilter(
+        datetime.datetime,
+        lambda _value: Appointment.date_and_time < naive_utc(_value),
+        "Only appointments before this time"
+    ),
+}
 
-class AppointmentWithConditionSerializer(
-    skip_fields_in_pydantic_model(
-        AppointmentSerializer,
-        "AppointmentNoNameSerializer",
-        {"condition_id"}  # This one is skipped
-    )):
-    condition: ConditionSerializer
+# ===================================
+#   TABLE VERSIONS (for ETag headers)
+# ===================================
+# Incremented by triggers on every write into tables of models
+ExtendedModelMixin.version_table = create_version_table(Base.metadata)
 
-# TODO: serializers also need to validate existence of IDs
+# ===================================
+#   ENTITY CACHE (rows selected by PK)
+# ===================================
+if CONFIG.ENTITY_CACHE_ENABLED:
+    if CONFIG.ENTITY_CACHE_REDIS_URL:
+        # Shared by all workers
+        _cache_backend = RedisCacheBackend(CONFIG.ENTITY_CACHE_REDIS_URL,
+                                           CONFIG.ENTITY_CACHE_TTL)
+    else:
+        _cache_backend = LocalCacheBackend(CONFIG.ENTITY_CACHE_SIZE,
+                                           CONFIG.ENTITY_CACHE_TTL)
+    ExtendedModelMixin.entity_cache = EntityCache(_cache_backend)
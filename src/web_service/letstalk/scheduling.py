@@ -0,0 +1,79 @@
+from typing import TYPE_CHECKING, Any
+import datetime
+
+from sqlalchemy import literal_column, select
+
+from .models import Appointment
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm.session import Session
+    from sqlalchemy.sql.elements import ColumnElement
+
+# Longest appointment (minutes)
+MAX_APPOINTMENT_MINUTES: int = 24 * 60
+# Longest time range of availability of a doctor (days)
+MAX_AVAILABILITY_DAYS: int = 31
+# Exclusion constraint of overlapping appointments of a doctor (see
+# migration '0005')
+OVERLAP_CONSTRAINT: str = "appointment_doctor_period_excl"
+# Detail of the error of overlapping appointments
+OVERLAP_DETAIL: str = "Appointment overlaps another appointment of the doctor"
+
+# Columns of appointments (doctor is not mapped, see 'Appointment')
+_appointment = Appointment.__table__.c
+
+
+def appointment_end() -> 'ColumnElement':
+    """Return end of the appointment (exclusive)"""
+    return _appointment.date_and_time + _appointment.duration_minutes * \
+        literal_column("interval '1 minute'")
+
+
+def doctor_availability(db_session: 'Session',
+                        doctor_id: int,
+                        start: datetime.datetime,
+                        end: datetime.datetime,
+                        min_minutes: int | None = None) -> dict[str, Any]:
+    """Select appointments of the doctor overlapping the time range and
+    compute free time between them (single range scan of the index of
+    doctors and times, starting the longest appointment before the time
+    range).
+
+    Args:
+        db_session (Session): Database connector.
+        doctor_id (int): ID of the doctor.
+        start (datetime.datetime): Start of the time range (naive, see
+            'utils.timezones.naive_utc').
+        end (datetime.datetime): End of the time range (exclusive,
+            naive).
+        min_minutes (int | None): Only free slots at least this long.
+
+    Returns:
+        dict[str, Any]: ID of the doctor, busy slots (appointments) and
+            free slots (within the time range), ordered by time.
+    """
+    results = db_session.execute(
+        select(
+            _appointment.id.label("appointment_id"),
+            _appointment.date_and_time.label("start"),
+            appointment_end().label("end")
+        ).where(
+            _appointment.doctor_id == doctor_id,
+            _appointment.date_and_time < end,
+            _appointment.date_and_time > start - datetime.timedelta(
+                minutes=MAX_APPOINTMENT_MINUTES
+            ),
+            appointment_end() > start
+        ).order_by(_appointment.date_and_time)
+    )
+    busy = [dict(_row) for _row in results.mappings()]
+
+    min_length = datetime.timedelta(minutes=min_minutes or 0)
+    free = []
+    free_from = start
+    for _slot in busy + [{"start": end, "end": end}]:
+        if _slot["start"] > free_from and \
+                _slot["start"] - free_from >= min_length:
+            free.append({"start": free_from, "end": _slot["start"]})
+        free_from = max(free_from, _slot["end"])
+    return {"doctor_id": doctor_id, "busy": busy, "free": free}
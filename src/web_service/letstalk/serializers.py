@@ -0,0 +1,139 @@
+import datetime
+
+from pydantic_sqlalchemy import sqlalchemy_to_pydantic
+from pydantic import BaseModel, Field
+
+from .models import Doctor, Condition, Concern, Expectation, Appointment
+from .scheduling import MAX_APPOINTMENT_MINUTES
+from .utils.model_modifier import skip_primary_keys_in_model, \
+    skip_fields_in_pydantic_model
+
+# ===================================
+#    PYDANTIC MODELS (SERIALIZERS)
+# ===================================
+# Full serializers
+DoctorSerializer = sqlalchemy_to_pydantic(Doctor)
+ConditionSerializer = sqlalchemy_to_pydantic(Condition)
+class ConcernSerializer(sqlalchemy_to_pydantic(Concern)):
+    """Modify default concern serializer to restrict level"""
+    level: int = Field(gt=0, lt=6) # level is the integer in [1, 5]
+
+
+ExpectationSerializer = sqlalchemy_to_pydantic(Expectation)
+class AppointmentSerializer(sqlalchemy_to_pydantic(Appointment)):
+    """Modify default appointment serializer to restrict duration"""
+    duration_minutes: int = Field(30, gt=0, le=MAX_APPOINTMENT_MINUTES)
+
+
+# Serializers for create and modify operations
+DoctorModifySerializer = skip_primary_keys_in_model(
+    DoctorSerializer, "DoctorModifySerializer"
+)
+ConditionModifySerializer = skip_primary_keys_in_model(
+    ConditionSerializer, "ConditionModifySerializer"
+)
+ConcernModifySerializer = skip_primary_keys_in_model(
+    ConcernSerializer, "ConcernModifySerializer"
+)
+ExpectationModifySerializer = skip_primary_keys_in_model(
+    ExpectationSerializer, "ExpectationModifySerializer"
+)
+AppointmentModifySerializer = skip_primary_keys_in_model(
+    AppointmentSerializer, "AppointmentModifySerializer"
+)
+
+
+# Join serializers for Condition and Doctor
+class ConditionAndDoctorModifySerializer(BaseModel):
+    condition: skip_fields_in_pydantic_model(
+        ConditionModifySerializer,
+        "ConditionModifyNoNameSerializer",
+        {"doctor_id"}  # This one is skipped
+    )
+    doctor: DoctorModifySerializer
+
+
+class ConditionAndDoctorSerializer(BaseModel):
+    condition: skip_fields_in_pydantic_model(
+        ConditionSerializer,
+        "ConditionNoNameSerializer",
+        {"doctor_id"}  # This one is skipped
+    )
+    doctor: DoctorSerializer
+
+
+class ConditionDoctorNestedSerializer(
+    skip_fields_in_pydantic_model(
+        ConditionSerializer,
+        "ConditionNoNameSerializer",
+        {"doctor_id"}  # This one is skipped
+    )
+):
+    doctor: DoctorSerializer
+
+
+class ConcernWithConditionSerializer(skip_fields_in_pydantic_model(
+        ConcernSerializer,
+        "ConcernNoNameSerializer",
+        {"condition_id"}  # This one is skipped
+    )):
+    condition: ConditionSerializer
+
+
+class ExpectationWithConditionSerializer(
+    skip_fields_in_pydantic_model(
+        ExpectationSerializer,
+        "ExpectationNoNameSerializer",
+        {"condition_id"}  # This one is skipped
+    )):
+    condition: ConditionSerializer
+
+
+class AppointmentWithConditionSerializer(
+    skip_fields_in_pydantic_model(
+        AppointmentSerializer,
+        "AppointmentNoNameSerializer",
+        {"condition_id"}  # This one is skipped
+    )):
+    condition: ConditionSerializer
+
+
+# Summaries (aggregates computed by the database)
+class ConditionSummarySerializer(BaseModel):
+    condition_id: int
+    doctor_id: int
+    concern_count: int
+    max_concern_level: int | None
+    expectation_count: int
+    appointment_count: int
+    next_appointment: datetime.datetime | None  # The nearest future one
+
+
+class DoctorSummarySerializer(BaseModel):
+    doctor_id: int
+    condition_count: int
+    concern_count: int
+    max_concern_level: int | None
+    expectation_count: int
+    appointment_count: int
+    next_appointment: datetime.datetime | None  # The nearest future one
+
+
+# Availability of doctors (appointments and free time in a time range)
+class BusySlotSerializer(BaseModel):
+    start: datetime.datetime
+    end: datetime.datetime  # Exclusive
+    appointment_id: int
+
+
+class FreeSlotSerializer(BaseModel):
+    start: datetime.datetime
+    end: datetime.datetime  # Exclusive
+
+
+class DoctorAvailabilitySerializer(BaseModel):
+    doctor_id: int
+    busy: list[BusySlotSerializer]
+    free: list[FreeSlotSerializer]
+
+# TODO: serializers also need to validate existence of IDs
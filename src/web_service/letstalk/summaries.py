@@ -0,0 +1,178 @@
+from typing import TYPE_CHECKING, Any, Iterable
+
+from sqlalchemy import Integer, cast, func, select
+
+from config import CONFIG
+
+from .models import Appointment, Concern, Condition, ConditionSummary, \
+    Doctor, Expectation
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm.session import Session
+    from sqlalchemy.sql import Select
+    from sqlalchemy.sql.elements import ColumnElement
+    from sqlalchemy.sql.selectable import CTE
+
+
+def _page(model: type,
+          criteria: Iterable['ColumnElement'],
+          limit: int | None,
+          after: int | None,
+          *columns: 'ColumnElement') -> 'CTE':
+    """Select IDs (and columns) of one page of summarized rows (keyset
+    pagination on ID)"""
+    selection = select(model.id, *columns).where(*criteria)
+    if after is not None:
+        selection = selection.where(model.id > after)
+    selection = selection.order_by(model.id)
+    if limit is not None:
+        selection = selection.limit(limit)
+    return selection.cte(f"{model.__tablename__}_page")
+
+
+def _condition_rows(conditions: 'CTE') -> 'Select':
+    """Create selection of aggregates of selected conditions.
+
+    Every table is aggregated by its own GROUP BY restricted to the
+    selected conditions (joining them first would multiply rows).
+    Counts are read from the summary table if enabled, the next
+    appointment is always selected (it changes with time).
+
+    Args:
+        conditions (CTE): Selection of IDs and doctors of conditions.
+
+    Returns:
+        Select: Aggregates of each condition.
+    """
+    selected = select(conditions.c.id)
+    # Index range scan of future appointments of each condition
+    upcoming = select(
+        Appointment.condition_id,
+        func.min(Appointment.date_and_time).label("next_appointment")
+    ).where(
+        Appointment.condition_id.in_(selected),
+        Appointment.date_and_time >= func.localtimestamp()
+    ).group_by(Appointment.condition_id).subquery()
+
+    if CONFIG.SUMMARY_TABLE_ENABLED:
+        # Counts maintained by triggers (single primary key lookup)
+        summary = ConditionSummary.__table__
+        aggregates = {
+            "concern_count": summary.c.concern_count,
+            "max_concern_level": summary.c.max_concern_level,
+            "expectation_count": summary.c.expectation_count,
+            "appointment_count": summary.c.appointment_count,
+        }
+        joined = conditions.outerjoin(
+            summary, summary.c.condition_id == conditions.c.id
+        )
+    else:
+        concerns = select(
+            Concern.condition_id,
+            func.count().label("concern_count"),
+            func.max(Concern.level).label("max_concern_level")
+        ).where(
+            Concern.condition_id.in_(selected)
+        ).group_by(Concern.condition_id).subquery()
+        expectations = select(
+            Expectation.condition_id,
+            func.count().label("expectation_count")
+        ).where(
+            Expectation.condition_id.in_(selected)
+        ).group_by(Expectation.condition_id).subquery()
+        appointments = select(
+            Appointment.condition_id,
+            func.count().label("appointment_count")
+        ).where(
+            Appointment.condition_id.in_(selected)
+        ).group_by(Appointment.condition_id).subquery()
+        aggregates = {
+            "concern_count": concerns.c.concern_count,
+            "max_concern_level": concerns.c.max_concern_level,
+            "expectation_count": expectations.c.expectation_count,
+            "appointment_count": appointments.c.appointment_count,
+        }
+        joined = conditions.outerjoin(
+            concerns, concerns.c.condition_id == conditions.c.id
+        ).outerjoin(
+            expectations, expectations.c.condition_id == conditions.c.id
+        ).outerjoin(
+            appointments, appointments.c.condition_id == conditions.c.id
+        )
+
+    return select(
+        conditions.c.id.label("condition_id"),
+        conditions.c.doctor_id,
+        *[cast(func.coalesce(aggregates[_name], 0), Integer).label(_name)
+          for _name in ("concern_count", "expectation_count",
+                        "appointment_count")],
+        aggregates["max_concern_level"].label("max_concern_level"),
+        upcoming.c.next_appointment
+    ).select_from(joined.outerjoin(
+        upcoming, upcoming.c.condition_id == conditions.c.id
+    ))
+
+
+def condition_summaries(db_session: 'Session',
+                        *criteria: 'ColumnElement',
+                        limit: int | None = None,
+                        after: int | None = None) -> list[dict[str, Any]]:
+    """Select aggregates of conditions (numbers of concerns,
+    expectations and appointments, maximal level of concerns and the
+    next appointment) in a single statement.
+
+    Args:
+        db_session (Session): Database connector.
+        *criteria (ColumnElement): SQL conditions for selection of
+            conditions (e. g. filters of list end-points).
+        limit (int | None): Maximal number of conditions.
+        after (int | None): Select only conditions with greater ID.
+
+    Returns:
+        list[dict[str, Any]]: Aggregates of each condition.
+    """
+    conditions = _page(Condition, criteria, limit, after,
+                       Condition.doctor_id)
+    results = db_session.execute(
+        _condition_rows(conditions).order_by(conditions.c.id)
+    )
+    return [dict(_row) for _row in results.mappings()]
+
+
+def doctor_summaries(db_session: 'Session',
+                     *criteria: 'ColumnElement',
+                     limit: int | None = None,
+                     after: int | None = None) -> list[dict[str, Any]]:
+    """Select aggregates of doctors (aggregates of all their conditions
+    and the number of conditions) in a single statement.
+
+    Args:
+        db_session (Session): Database connector.
+        *criteria (ColumnElement): SQL conditions for selection of
+            doctors.
+        limit (int | None): Maximal number of doctors.
+        after (int | None): Select only doctors with greater ID.
+
+    Returns:
+        list[dict[str, Any]]: Aggregates of each doctor.
+    """
+    doctors = _page(Doctor, criteria, limit, after)
+    conditions = select(Condition.id, Condition.doctor_id).where(
+        Condition.doctor_id.in_(select(doctors.c.id))
+    ).cte("doctor_conditions")
+    rows = _condition_rows(conditions).subquery()
+    results = db_session.execute(select(
+        doctors.c.id.label("doctor_id"),
+        cast(func.count(rows.c.condition_id), Integer).label(
+            "condition_count"
+        ),
+        *[cast(func.coalesce(func.sum(rows.c[_name]), 0), Integer).label(
+            _name
+        ) for _name in ("concern_count", "expectation_count",
+                        "appointment_count")],
+        func.max(rows.c.max_concern_level).label("max_concern_level"),
+        func.min(rows.c.next_appointment).label("next_appointment")
+    ).select_from(
+        doctors.outerjoin(rows, rows.c.doctor_id == doctors.c.id)
+    ).group_by(doctors.c.id).order_by(doctors.c.id))
+    return [dict(_row) for _row in results.mappings()]
@@ -0,0 +1,219 @@
+from typing import Callable
+import asyncio
+import collections
+import re
+
+from starlette.responses import JSONResponse
+
+from .replicas import SAFE_METHODS
+
+# Classes of requests (each class has its own limits)
+DETAIL_CLASS: str = "detail"  # Reads of one item (e. g. '/api/doctor/1')
+LIST_CLASS: str = "list"  # Other reads (lists, nested lists, searches)
+WRITE_CLASS: str = "write"  # Requests with any other method
+REQUEST_CLASSES: tuple[str, ...] = (DETAIL_CLASS, LIST_CLASS, WRITE_CLASS)
+# Paths of reads of one item (and its summary or availability)
+DETAIL_PATH: re.Pattern = re.compile(r"^/api/(async/)?[\w-]+/\d+(/\w+)?/?$")
+# Paths never limited (monitoring, debugging and endless streams of
+# events, the root and the documentation do not start by '/api/')
+EXEMPT_PREFIXES: tuple[str, ...] = ("/api/stats/", "/api/debug/",
+                                    "/api/changes")
+
+
+def request_class(method: str, path: str) -> str | None:
+    """Classify the request by its method and path.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Path of the request.
+
+    Returns:
+        str | None: Class of the request (None if it is not limited).
+    """
+    if not path.startswith("/api/") or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if method not in SAFE_METHODS:
+        return WRITE_CLASS
+    if DETAIL_PATH.match(path):
+        return DETAIL_CLASS
+    return LIST_CLASS
+
+
+class ConcurrencyLimit:
+    """Limit of requests handled concurrently with bounded queue of
+    waiting requests (first in, first out).
+
+    Used by the event loop of the worker only (not thread-safe).
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        """Create limit.
+
+        Args:
+            limit (int): Maximal number of requests handled concurrently.
+            queue_size (int): Maximal number of waiting requests.
+            timeout (float): Seconds a request waits at most.
+        """
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_flight: int = 0
+        self.admitted: int = 0
+        self.rejected: int = 0  # Queue was full
+        self.timed_out: int = 0  # Waited longer than timeout
+        self._waiters: collections.deque[asyncio.Future] = \
+            collections.deque()
+
+    async def acquire(self) -> bool:
+        """Wait for a free slot (in queue).
+
+        Returns:
+            bool: True if admitted (slot must be released), False if
+                rejected or timed out.
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # Slot is handed over by 'release' (in flight not changed)
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self._dequeue(waiter)
+            self.timed_out += 1
+            return False
+        except asyncio.CancelledError:
+            # Client disconnected, slot could be handed over already
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._dequeue(waiter)
+            raise
+        self.admitted += 1
+        return True
+
+    def _dequeue(self, waiter: asyncio.Future):
+        """Remove the cancelled waiter from the queue (unless 'release'
+        skipped it already, after it was cancelled and before the
+        waiting request resumed)"""
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    def release(self):
+        """Release the slot (hand it over to the first waiting request)"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict[str, int | float]:
+        """Return the state of the limit and its counters.
+
+        Returns:
+            dict[str, int | float]: Limits, requests in flight, queue
+                depth and counters of admitted, rejected and timed out
+                requests.
+        """
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "timeout": self.timeout,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Limits of concurrent requests by class of request (details,
+    lists and writes), so slow lists can not exhaust threads and
+    connections of the worker needed by cheap reads.
+    """
+
+    def __init__(self,
+                 limits: dict[str, int],
+                 queue_sizes: dict[str, int],
+                 timeout: float):
+        """Create controller.
+
+        Args:
+            limits (dict[str, int]): Maximal number of requests handled
+                concurrently by class of request.
+            queue_sizes (dict[str, int]): Maximal number of waiting
+                requests by class of request.
+            timeout (float): Seconds a request waits at most.
+        """
+        self.limits = {
+            _class: ConcurrencyLimit(limits[_class], queue_sizes[_class],
+                                     timeout)
+            for _class in REQUEST_CLASSES
+        }
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Return state of limits by class of request.
+
+        Returns:
+            dict[str, dict[str, int | float]]: State of limits.
+        """
+        return {_class: _limit.stats()
+                for _class, _limit in self.limits.items()}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting requests by limits of their class.
+
+    Requests over the limit wait in the queue of the class, if the
+    queue is full or the request waited too long, it is rejected
+    immediately by '503 Service Unavailable' with the 'Retry-After'
+    header (instead of waiting for threads and database connections
+    until the client times out).
+    """
+
+    def __init__(self,
+                 app: Callable,
+                 controller: AdmissionController,
+                 retry_after: int):
+        """Create middleware.
+
+        Args:
+            app (Callable): Wrapped ASGI application.
+            controller (AdmissionController): Limits by class of request.
+            retry_after (int): Seconds in the 'Retry-After' header of
+                rejected requests.
+        """
+        self.app = app
+        self.controller = controller
+        self.rejection = JSONResponse(
+            {"detail": "Service is overloaded, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    async def __call__(self, scope: dict, receive: Callable,
+                       send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = request_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.controller.limits[name]
+        if not await limit.acquire():
+            await self.rejection(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
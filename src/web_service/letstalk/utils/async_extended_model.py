@@ -0,0 +1,272 @@
+from typing import TYPE_CHECKING, ParamSpecKwargs, Any, Iterable
+import logging
+
+from sqlalchemy import inspect
+
+from .replicas import REPLICA_SESSION_INFO
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.sql.elements import ColumnElement
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncExtendedModelMixin:
+    """Asynchronous variant of CRUD operations of 'ExtendedModelMixin'
+    (requires asynchronous session, e. g. using asyncpg driver).
+
+    Note:
+        Model has to inherit from 'ExtendedModelMixin' as well
+        (serialization and entity cache are shared).
+    """
+
+    @classmethod
+    async def all_async(cls,
+                        db_session: 'AsyncSession',
+                        order_by: object = None,
+                        limit: int | None = None,
+                        after: Any = None) -> list[dict[str, Any]]:
+        """Select all object in the model
+
+        Args:
+            db_session (AsyncSession): Database connector.
+            order_by (object): Order by statement (if defined),
+                by default orders by the first column of PK.
+            limit (int | None): Maximal number of rows (all if None).
+            after (Any): Select only rows with the first column of PK
+                greater than this value (keyset pagination).
+
+        Returns:
+            list[dict[str, Any]]: List of all rows serialized as dict
+        """
+        # Execute selection
+        results = await db_session.execute(
+            cls._paginated(cls._select(), order_by, limit, after)
+        )
+        # Return results
+        return [dict(_row) for _row in results.mappings()]
+
+    @classmethod
+    async def all_with_related_async(
+            cls,
+            db_session: 'AsyncSession',
+            related_model: type,
+            foreign_key: str,
+            nested_name: str,
+            order_by: object = None,
+            limit: int | None = None,
+            after: Any = None,
+            criteria: Iterable['ColumnElement'] = (),
+            fields: Iterable[str] | None = None,
+            related_fields: Iterable[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """Select all objects in the model together with the related
+        row referenced by the foreign key (using a single JOIN).
+
+        Args:
+            db_session (AsyncSession): Database connector.
+            related_model (type): Model referenced by the foreign key.
+            foreign_key (str): Name of the foreign key column (it is
+                removed from the result and replaced by nested dict).
+            nested_name (str): Key of the nested related object.
+            order_by (object): Order by statement (if defined),
+                by default orders by the first column of PK.
+            limit (int | None): Maximal number of rows (all if None).
+            after (Any): Select only rows with the first column of PK
+                greater than this value (keyset pagination).
+            criteria (Iterable[ColumnElement]): SQL conditions for
+                selection (on columns of the model).
+            fields (Iterable[str] | None): Selected fields of the model
+                (all if None, see '_column_keys').
+            related_fields (Iterable[str] | None): Selected fields of
+                the related model (all if None).
+
+        Returns:
+            list[dict[str, Any]]: List of all rows serialized as dict
+                with related row as a nested dict.
+        """
+        # Execute selection (JOIN on foreign key)
+        results = await db_session.execute(cls._paginated(
+            cls._select_with_related(
+                related_model, foreign_key, fields, related_fields
+            ).filter(*criteria),
+            order_by, limit, after
+        ))
+        return cls._nest_related(results, related_model, foreign_key,
+                                 nested_name, fields, related_fields)
+
+    @classmethod
+    async def table_versions_async(
+            cls,
+            db_session: 'AsyncSession',
+            *related_models: type) -> dict[str, int]:
+        """Select versions of the table of the model and tables of
+        related models (using a single primary key lookup).
+
+        Args:
+            db_session (AsyncSession): Database connector.
+            *related_models (type): Related models (e. g. nested).
+
+        Returns:
+            dict[str, int]: Versions of tables (by table name).
+        """
+        results = await db_session.execute(
+            cls._versions_select(related_models)
+        )
+        return cls._versions_dict(related_models, results.all())
+
+    @classmethod
+    async def get_async(
+            cls,
+            db_session: 'AsyncSession',
+            table_version: int | None = None,
+            **filtration: dict | ParamSpecKwargs) -> dict[str, Any]:
+        """Select all object in the model.
+
+        Args:
+            db_session (AsyncSession): Database connector.
+            table_version (int | None): Version of the table selected
+                before (see 'table_versions_async'), cached rows of
+                other versions are not used.
+            **filtration (dict): parameters for filtration
+        Returns:
+            dict[str, Any]: Specific row serialized as dictionary.
+        """
+        # Rows selected by primary key are read through the cache
+        key = None
+        if cls.entity_cache is not None:
+            key = cls._cache_key(filtration)
+            if key is not None:
+                hit, cached = cls.entity_cache.get(cls.__tablename__, key,
+                                                   table_version)
+                if hit:
+                    return cached
+        fetch_res = await cls.filter_async(db_session, **filtration)
+        if len(fetch_res) == 1:
+            # Rows of (lagging) replicas could be older than the cache
+            if key is not None and \
+                    not db_session.info.get(REPLICA_SESSION_INFO):
+                cls.entity_cache.set(cls.__tablename__, key, fetch_res[0],
+                                     table_version)
+            return fetch_res[0]
+        elif len(fetch_res) > 1:
+            raise AttributeError("more than one plausible item")
+        else:
+            raise AttributeError("item is not in system")
+
+    @classmethod
+    async def filter_async(
+            cls,
+            db_session: 'AsyncSession',
+            *criteria: 'ColumnElement',
+            order_by: object = None,
+            limit: int | None = None,
+            after: Any = None,
+            fields: Iterable[str] | None = None,
+            **filtration: dict | ParamSpecKwargs) -> list[dict]:
+        """Select all object in the model
+
+        Args:
+            db_session (AsyncSession): Database connector.
+            *criteria (ColumnElement): SQL conditions for selection
+                (e. g. filters of list end-points).
+            order_by (object): Order by statement (if defined),
+                by default orders by the first column of PK.
+            limit (int | None): Maximal number of rows (all if None).
+            after (Any): Select only rows with the first column of PK
+                greater than this value (keyset pagination).
+            fields (Iterable[str] | None): Selected fields (all if
+                None, see '_column_keys').
+            filtration (dict | ParamSpecKwargs): Conditions
+                for selection.
+        """
+        # Execute selection
+        results = await db_session.execute(cls._paginated(
+            cls._select(fields).filter(*criteria).filter_by(**filtration),
+            order_by, limit, after
+        ))
+        # Get results
+        return [dict(_row) for _row in results.mappings()]
+
+    async def create_async(self,
+                           db_session: 'AsyncSession') -> dict[str, Any]:
+        """Insert into the database (single INSERT ... RETURNING
+        statement)
+
+        Args:
+            db_session (AsyncSession): Database connector.
+
+        Returns:
+            dict[str, Any]: Inserted values.
+        """
+        # Perform creation (returns stored row including new ID)
+        result = await db_session.execute(self._insert_statement())
+        created = dict(result.one()._mapping)
+        await db_session.commit()
+
+        # Return identity (with new ID)
+        type(self)._invalidate_cache({
+            _pk.name: created[_pk.name]
+            for _pk in inspect(type(self)).primary_key
+        })
+        return created
+
+    @classmethod
+    async def update_async(
+            cls,
+            db_session: 'AsyncSession',
+            filtration: dict | ParamSpecKwargs,
+            new_values: dict) -> tuple[dict[str, Any], int]:
+        """Update in the database (single UPDATE ... RETURNING
+        statement)
+
+        Args:
+            db_session (AsyncSession): Database connector.
+            filtration (dict | ParamSpecKwargs): Conditions
+                for selection.
+            new_values (dict): Values that are updated.
+
+        Returns:
+            tuple[dict[str, Any], int]: Stored values of the (first)
+                updated item, number of updated items.
+        """
+        # Perform database update
+        result = await db_session.execute(
+            cls._update_statement(filtration, new_values)
+        )
+        updated = [dict(_row._mapping) for _row in result]
+        await db_session.commit()
+        cls._invalidate_cache(filtration)
+
+        # Return updated item
+        if not updated:
+            return filtration | new_values, 0
+        return updated[0], len(updated)
+
+    @classmethod
+    async def delete_async(cls,
+                           db_session: 'AsyncSession',
+                           filtration: dict | ParamSpecKwargs) -> int:
+        """Delete rows in the database (single DELETE ... RETURNING
+        statement)
+
+        Args:
+            db_session (AsyncSession): Database connector.
+            filtration (dict | ParamSpecKwargs): Conditions
+                for selection.
+
+        Returns:
+            int: number of deleted items.
+        """
+        # Perform database delete
+        result = await db_session.execute(
+            cls._delete_statement(filtration)
+        )
+        affected = len(result.all())
+        await db_session.commit()
+        cls._invalidate_cache(filtration)
+        cls._invalidate_referencing_caches()
+
+        # Return number of deleted items
+        return affected
@@ -0,0 +1,302 @@
+from typing import TYPE_CHECKING, AsyncIterator, Callable
+
+from fastapi import Depends, HTTPException, Query, Request, Response, \
+    status
+from fastapi_utils.cbv import cbv
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .etag import check_etag
+from .fields import create_fields_dependency, nested_fields, top_fields
+from .filters import create_filter_dependency
+from .pagination import MAX_PAGE_SIZE, paginate_async
+from .serialization import create_encoder, create_list_encoder, \
+    encoded_response
+from ..models import Condition
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter
+
+
+def create_async_generic_viewset(
+        router: 'APIRouter',
+        sqlalchemy_model: type,
+        pydantic_model: type,
+        pydantic_modify_model: type,
+        session_dependency: Callable[[], AsyncIterator[AsyncSession]],
+        route_base: str,
+        read_session_dependency: Callable[
+            ..., AsyncIterator[AsyncSession]
+        ] | None = None) -> type:
+    """Create a generic view set with all standard methods as
+    asynchronous routes.
+
+    Each request gets its own asynchronous database session from
+    the dependency 'session_dependency' (available as
+    'self.db_session'). Reading routes (list and detail) use the
+    session from the dependency 'read_session_dependency' instead
+    (available as 'self.read_db_session'), the same session if not set.
+    Note:
+        Would be better to use meta classes for this purpose.
+    """
+    # Encoders of responses
+    encode_item = create_encoder(pydantic_model)
+    # Query parameters filtering the list
+    filter_dependency = create_filter_dependency(
+        sqlalchemy_model.list_filters
+    )
+    # Query parameter with sparse fieldset of reading routes
+    fields_dependency = create_fields_dependency(pydantic_model)
+
+    @cbv(router)
+    class _AsyncGenericAPIViewSet:
+        """Base asynchronous generic API view set (implementing
+        all CRUD)"""
+        db_session: AsyncSession = Depends(session_dependency)
+        read_db_session: AsyncSession = Depends(
+            read_session_dependency or session_dependency
+        )
+
+        @router.get(route_base,
+                    response_model=list[pydantic_model])
+        async def list_item(self,
+                            request: Request,
+                            response: Response,
+                            limit: int | None = Query(None, gt=0,
+                                                      le=MAX_PAGE_SIZE),
+                            after: str | None = None,
+                            criteria: list = Depends(filter_dependency),
+                            fields: frozenset[str] | None = Depends(
+                                fields_dependency
+                            )):
+            """List all items in the database (optionally filtered and
+            paginated using 'limit' and 'after' cursor, restricted to
+            'fields')"""
+            not_modified = check_etag(
+                request, response,
+                await sqlalchemy_model.table_versions_async(
+                    self.read_db_session
+                )
+            )
+            if not_modified is not None:
+                return not_modified
+            items = await paginate_async(
+                lambda _limit, _after: sqlalchemy_model.filter_async(
+                    self.read_db_session, *criteria, limit=_limit,
+                    after=_after, fields=fields
+                ),
+                response, limit, after
+            )
+            return encoded_response(
+                items, create_list_encoder(pydantic_model, fields), response
+            )
+
+        @router.get(route_base + "/{item_id}",
+                    response_model=pydantic_model)
+        async def detail_item(self,
+                              request: Request,
+                              response: Response,
+                              item_id: int,
+                              fields: frozenset[str] | None = Depends(
+                                  fields_dependency
+                              )):
+            """Detail of the item in the database (restricted to
+            'fields')"""
+            versions = await sqlalchemy_model.table_versions_async(
+                self.read_db_session
+            )
+            not_modified = check_etag(request, response, versions)
+            if not_modified is not None:
+                return not_modified
+            try:
+                # Cached row must match the version in the entity tag
+                item = await sqlalchemy_model.get_async(
+                    self.read_db_session,
+                    table_version=versions[sqlalchemy_model.__tablename__],
+                    id=item_id
+                )
+            except AttributeError:  # Covers everything
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Item not found"
+                )
+            return encoded_response(
+                item, create_encoder(pydantic_model, fields), response
+            )
+
+        @router.post(route_base,
+                     response_model=pydantic_model,
+                     status_code=status.HTTP_201_CREATED)
+        async def create_item(self, item: pydantic_modify_model):
+            """Create an item in the database"""
+            created = await sqlalchemy_model(**item.dict()).create_async(
+                self.db_session
+            )
+            return encoded_response(created, encode_item,
+                                    status_code=status.HTTP_201_CREATED)
+
+        @router.put(route_base + "/{item_id}",
+                    response_model=pydantic_model)
+        async def update_item(self,
+                              item_id: int,
+                              item: pydantic_modify_model):
+            """Update the item in the database"""
+            resp_body, count = await sqlalchemy_model.update_async(
+                self.db_session, {"id": item_id}, item.dict()
+            )
+            if count != 1:
+                # In the case of wrong ID
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Item not found")
+            return encoded_response(resp_body, encode_item)
+
+        @router.delete(route_base + "/{item_id}",
+                       status_code=status.HTTP_204_NO_CONTENT)
+        async def delete_item(self, item_id: int):
+            """Delete the item in the database"""
+            count = await sqlalchemy_model.delete_async(self.db_session,
+                                                        {"id": item_id})
+            if count != 1:
+                # In the case of wrong ID
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Item not found")
+            # Empty body (returned None would be encoded as 'null')
+            return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    return _AsyncGenericAPIViewSet
+
+
+def async_viewset_with_condition_detail(
+        router: 'APIRouter',
+        sqlalchemy_model: type,
+        pydantic_model: type,
+        pydantic_modify_model: type,
+        pydantic_nested_model: type,
+        session_dependency: Callable[[], AsyncIterator[AsyncSession]],
+        route_base: str,
+        read_session_dependency: Callable[
+            ..., AsyncIterator[AsyncSession]
+        ] | None = None) -> type:
+    """Asynchronous variant of the special viewset that returns
+    details of condition (reading routes use 'read_session_dependency')
+    Note:
+        Would be better to use meta classes for this purpose.
+    """
+    # Encoders of responses
+    encode_nested_item = create_encoder(pydantic_nested_model)
+    # Query parameters filtering the list
+    filter_dependency = create_filter_dependency(
+        sqlalchemy_model.list_filters
+    )
+    # Query parameter with sparse fieldset (including 'condition.*')
+    fields_dependency = create_fields_dependency(pydantic_nested_model)
+
+    @cbv(router)
+    class _AsyncSpecialAPIViewSet(
+        create_async_generic_viewset(router,
+                                     sqlalchemy_model,
+                                     pydantic_model,
+                                     pydantic_modify_model,
+                                     session_dependency,
+                                     route_base,
+                                     read_session_dependency)
+    ):
+        @router.get(
+            route_base + "-with-condition",
+            response_model=list[pydantic_nested_model]
+        )
+        async def list_item_with_condition(
+                self,
+                request: Request,
+                response: Response,
+                limit: int | None = Query(None, gt=0,
+                                          le=MAX_PAGE_SIZE),
+                after: str | None = None,
+                criteria: list = Depends(filter_dependency),
+                fields: frozenset[str] | None = Depends(fields_dependency)
+        ):
+            """List all items in the database and return a list of
+            nested structures with condition as a nested field
+            (optionally filtered and paginated using 'limit' and 'after'
+            cursor, restricted to 'fields', condition is not joined if
+            none of its fields is requested)
+            """
+            not_modified = check_etag(
+                request, response,
+                await sqlalchemy_model.table_versions_async(
+                    self.read_db_session, Condition
+                )
+            )
+            if not_modified is not None:
+                return not_modified
+            if fields is not None and "condition" not in top_fields(fields):
+                items = await paginate_async(
+                    lambda _limit, _after: sqlalchemy_model.filter_async(
+                        self.read_db_session, *criteria, limit=_limit,
+                        after=_after, fields=fields
+                    ),
+                    response, limit, after
+                )
+            else:
+                items = await paginate_async(
+                    lambda _limit, _after:
+                    sqlalchemy_model.all_with_related_async(
+                        self.read_db_session, Condition, 'condition_id',
+                        'condition', limit=_limit, after=_after,
+                        criteria=criteria, fields=fields,
+                        related_fields=nested_fields(fields, 'condition')
+                    ),
+                    response, limit, after
+                )
+            return encoded_response(
+                items, create_list_encoder(pydantic_nested_model, fields),
+                response
+            )
+
+        @router.post(route_base + "-with-condition",
+                     response_model=pydantic_nested_model,
+                     status_code=status.HTTP_201_CREATED)
+        async def create_item_condition(
+                self,
+                item: pydantic_modify_model
+        ):
+            """Create an item in the database and return
+            nested structure with condition as a nested field
+            """
+            new_item = await sqlalchemy_model(**item.dict()).create_async(
+                self.db_session
+            )
+            # Create condition dict
+            new_item['condition'] = await Condition.get_async(
+                self.db_session, id=new_item.pop('condition_id')
+            )
+            return encoded_response(new_item, encode_nested_item,
+                                    status_code=status.HTTP_201_CREATED)
+
+        @router.put(route_base + "-with-condition",
+                    response_model=pydantic_nested_model,
+                    status_code=status.HTTP_200_OK)
+        async def update_item_condition(
+                self,
+                item: pydantic_model
+        ):
+            """Update the item in the database and return
+            nested structure with condition as a nested field
+            """
+            request = item.dict()
+            resp_body, count = await sqlalchemy_model.update_async(
+                self.db_session, {"id": request['id']}, request
+            )
+            if count != 1:
+                # In the case of wrong ID
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Item not found")
+            # Create condition dict
+            resp_body['condition'] = await Condition.get_async(
+                self.db_session, id=resp_body.pop('condition_id')
+            )
+            return encoded_response(resp_body, encode_nested_item)
+
+    return _AsyncSpecialAPIViewSet
@@ -0,0 +1,213 @@
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+import enum
+
+from fastapi import Depends, HTTPException, status
+from fastapi_utils.cbv import cbv
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .constraints import constraint_violation
+from .serialization import create_encoder, create_list_encoder, \
+    encoded_response
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter
+
+# Maximal number of operations in one batch
+MAX_BATCH_SIZE: int = 1000
+# Prefix of references to IDs created earlier in the batch (e. g. '$c1')
+REFERENCE_PREFIX: str = "$"
+
+
+class BatchMethod(str, enum.Enum):
+    """Operations available in batches"""
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class BatchOperation(BaseModel):
+    """One operation of the batch"""
+    method: BatchMethod
+    model: str  # Name of the model (e. g. 'concern')
+    # ID of updated or deleted item (or reference like '$c1')
+    id: int | str | None = None
+    # Values of created or updated item (foreign keys can be references)
+    data: dict[str, Any] | None = None
+    # Name of ID of created item for references of later operations
+    ref: str | None = Field(None, regex=r"^\w+$")
+
+
+class BatchResult(BaseModel):
+    """Result of one operation of the batch"""
+    index: int  # Position of the operation in request
+    method: BatchMethod
+    model: str
+    id: int  # ID of created, updated or deleted item
+    item: dict[str, Any] | None = None  # Stored item (None if deleted)
+
+
+def _batch_error(status_code: int, index: int, detail: Any) -> HTTPException:
+    """Create error of the whole batch caused by one operation"""
+    return HTTPException(status_code=status_code,
+                         detail={"index": index, "detail": detail})
+
+
+def _resolve(value: Any, refs: dict[str, int], index: int) -> Any:
+    """Replace the reference (e. g. '$c1') by the created ID"""
+    if not (isinstance(value, str) and value.startswith(REFERENCE_PREFIX)):
+        return value
+    name = value[len(REFERENCE_PREFIX):]
+    if name not in refs:
+        raise _batch_error(status.HTTP_422_UNPROCESSABLE_ENTITY, index,
+                           f"Unknown reference '{value}'")
+    return refs[name]
+
+
+def create_batch_viewset(router: 'APIRouter',
+                         batch_models: dict[str, tuple[type, type, type]],
+                         session_dependency: Callable[
+                             [], Iterator[Session]
+                         ],
+                         route: str,
+                         constraint_details: dict[str, str] | None = None
+                         ) -> type:
+    """Create a view set running ordered list of operations (create,
+    update and delete of items of any registered model) in a single
+    transaction with a single commit.
+
+    Created IDs are named by 'ref' and referenced by later operations
+    as '$<ref>' (in 'id' and in foreign keys of 'data'), e. g. condition
+    and its concerns are created by one request. Data are validated
+    by the same serializers as the routes of models use. The first
+    failed operation rolls the whole batch back and is reported (with
+    its position in the request, violated constraints as conflicts or
+    invalid data).
+
+    Args:
+        router (APIRouter): Router where routes are registered.
+        batch_models (dict[str, tuple[type, type, type]]): Model,
+            serializer and modify serializer by the name of the model.
+        session_dependency (Callable[[], Iterator[Session]]): Database
+            session (of the primary).
+        route (str): Path of the route.
+        constraint_details (dict[str, str] | None): Details of errors
+            of violated constraints by name (see 'constraint_violation').
+
+    Returns:
+        type: View set.
+    """
+    encoders = {_name: create_encoder(_pydantic_model)
+                for _name, (_, _pydantic_model, _) in batch_models.items()}
+    # Columns accepting references (foreign keys)
+    reference_columns = {
+        _name: {_fk.parent.name for _fk in _model.__table__.foreign_keys}
+        for _name, (_model, _, _) in batch_models.items()
+    }
+    encode_results = create_list_encoder(BatchResult)
+
+    @cbv(router)
+    class _BatchViewSet:
+        """Transactional batch of operations"""
+        db_session: Session = Depends(session_dependency)
+
+        @router.post(route, response_model=list[BatchResult])
+        def run_batch(self, operations: list[BatchOperation]):
+            """Run operations in the given order in one transaction
+            (all or nothing)"""
+            if len(operations) > MAX_BATCH_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"At most {MAX_BATCH_SIZE} operations allowed"
+                )
+            refs: dict[str, int] = {}
+            results = []
+            try:
+                for _index, _operation in enumerate(operations):
+                    results.append(self._run(_index, _operation, refs))
+            except IntegrityError as error:
+                self.db_session.rollback()
+                status_code, detail = constraint_violation(
+                    error, constraint_details
+                )
+                raise _batch_error(status_code, _index, detail)
+            except HTTPException:
+                self.db_session.rollback()
+                raise
+            self.db_session.commit()
+            return encoded_response(results, encode_results)
+
+        def _run(self,
+                 index: int,
+                 operation: BatchOperation,
+                 refs: dict[str, int]) -> dict[str, Any]:
+            """Run one operation (without commit)"""
+            if operation.model not in batch_models:
+                raise _batch_error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY, index,
+                    f"Unknown model, choose from: "
+                    f"{', '.join(sorted(batch_models))}"
+                )
+            sqlalchemy_model, _, pydantic_modify_model = \
+                batch_models[operation.model]
+            creating = operation.method == BatchMethod.CREATE
+            if creating != (operation.id is None):
+                raise _batch_error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY, index,
+                    "'id' is required by update and delete only"
+                )
+            if operation.ref is not None and (not creating or
+                                              operation.ref in refs):
+                raise _batch_error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY, index,
+                    "'ref' must name a new ID of created item"
+                )
+            item_id = _resolve(operation.id, refs, index)
+            if not creating and not isinstance(item_id, int):
+                raise _batch_error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY, index,
+                    "'id' must be an integer or a reference"
+                )
+            result = {"index": index, "method": operation.method,
+                      "model": operation.model}
+
+            if operation.method == BatchMethod.DELETE:
+                if sqlalchemy_model.delete(self.db_session, {"id": item_id},
+                                           commit=False) != 1:
+                    raise _batch_error(status.HTTP_404_NOT_FOUND, index,
+                                       "Item not found")
+                return result | {"id": item_id}
+
+            if operation.data is None:
+                raise _batch_error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY, index,
+                    "'data' is required by create and update"
+                )
+            data = {
+                _key: _resolve(_value, refs, index)
+                if _key in reference_columns[operation.model] else _value
+                for _key, _value in operation.data.items()
+            }
+            try:
+                values = pydantic_modify_model(**data).dict()
+            except ValidationError as error:
+                raise _batch_error(status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                   index, error.errors())
+
+            if creating:
+                item = sqlalchemy_model(**values).create(self.db_session,
+                                                         commit=False)
+                if operation.ref is not None:
+                    refs[operation.ref] = item["id"]
+            else:
+                item, count = sqlalchemy_model.update(
+                    self.db_session, {"id": item_id}, values, commit=False
+                )
+                if count != 1:
+                    raise _batch_error(status.HTTP_404_NOT_FOUND, index,
+                                       "Item not found")
+            return result | {"id": item["id"],
+                             "item": encoders[operation.model](item)}
+
+    return _BatchViewSet
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, create_model
+
+# Maximal number of items in one bulk request
+MAX_BULK_SIZE: int = 10000
+
+
+class BulkItemError(BaseModel):
+    """Error related to one item of the bulk request"""
+    index: int  # Position of the item in request
+    id: int | None = None  # ID of the item (if known)
+    detail: str
+
+
+class BulkDeleteResult(BaseModel):
+    """Result of the bulk delete"""
+    deleted: list[int]
+    errors: list[BulkItemError]
+
+
+def create_bulk_result_model(pydantic_model: type[BaseModel]) -> type:
+    """Create serializer of the bulk create or update result.
+
+    Args:
+        pydantic_model (type[BaseModel]): Serializer of one item.
+
+    Returns:
+        type: Serializer with processed items and per-item errors.
+    """
+    return create_model(
+        pydantic_model.__name__ + "BulkResult",
+        items=(list[pydantic_model], ...),
+        errors=(list[BulkItemError], ...)
+    )
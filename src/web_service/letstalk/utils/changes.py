@@ -0,0 +1,245 @@
+from typing import Any, AsyncIterator
+import asyncio
+import json
+import logging
+
+import asyncpg
+
+LOGGER = logging.getLogger(__name__)
+
+# Channel of notifications sent by triggers (see migration '0004')
+CHANGES_CHANNEL: str = "letstalk_changes"
+# Media type of server-sent events
+SSE_MEDIA_TYPE: str = "text/event-stream"
+
+# Event telling subscribers that some changes could be missed (reload)
+_RESYNC_FRAME: bytes = b"event: resync\ndata: {}\n\n"
+# Comment keeping idle connections open (proxies close silent ones)
+_HEARTBEAT_FRAME: bytes = b": heartbeat\n\n"
+# Operations of events that may not carry IDs of the condition and the
+# doctor (the condition of rows deleted by cascades is deleted already,
+# truncation has no rows), such events match any condition and doctor
+UNRESOLVED_OPERATIONS: frozenset[str] = frozenset({"delete", "truncate"})
+
+
+class ChangeFilter:
+    """Selection of change events a subscriber is interested in"""
+
+    def __init__(self,
+                 models: frozenset[str] | None = None,
+                 doctor_id: int | None = None,
+                 condition_id: int | None = None):
+        """Create filter (every set condition must match).
+
+        Args:
+            models (frozenset[str] | None): Names of tables (all if
+                None).
+            doctor_id (int | None): Only changes of the doctor (and of
+                rows of its conditions).
+            condition_id (int | None): Only changes of the condition
+                (and of rows referencing it).
+        """
+        self.models = models
+        self.doctor_id = doctor_id
+        self.condition_id = condition_id
+
+    @staticmethod
+    def _matches_id(expected: int | None, actual: int | None,
+                    unresolved: bool) -> bool:
+        """Check the ID of the event (unknown IDs of events of
+        unresolved operations match)"""
+        return expected is None or actual == expected or \
+            (unresolved and actual is None)
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        """Check if the subscriber is interested in the event (events
+        of deletions with unknown condition or doctor included)"""
+        unresolved = event.get("operation") in UNRESOLVED_OPERATIONS
+        return (self.models is None or event["model"] in self.models) \
+            and self._matches_id(self.doctor_id, event.get("doctor_id"),
+                                 unresolved) \
+            and self._matches_id(self.condition_id,
+                                 event.get("condition_id"), unresolved)
+
+
+class Subscription:
+    """Queue of encoded events of one subscriber. If the subscriber
+    is too slow and the queue is full, queued events are dropped and
+    replaced by a single 'resync' event."""
+
+    def __init__(self, change_filter: ChangeFilter, queue_size: int):
+        """Create subscription.
+
+        Args:
+            change_filter (ChangeFilter): Events of interest.
+            queue_size (int): Maximal number of queued events.
+        """
+        self.change_filter = change_filter
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(queue_size)
+
+    def offer(self, event: dict[str, Any], frame: bytes):
+        """Queue the event if it matches the filter"""
+        if self.change_filter.matches(event):
+            self.put(frame)
+
+    def put(self, frame: bytes):
+        """Queue the encoded event (resync if the queue is full)"""
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC_FRAME)
+
+
+class ChangeFeed:
+    """Listens to notifications of changes on one dedicated connection
+    (per worker) and fans them out to subscribers.
+
+    Connection is checked periodically and reconnected if lost, then
+    subscribers get 'resync' event (changes could be missed meanwhile).
+    """
+
+    def __init__(self,
+                 dsn: str,
+                 queue_size: int,
+                 health_check_interval: float = 10.0,
+                 reconnect_delay: float = 1.0):
+        """Create feed (not connected until started).
+
+        Args:
+            dsn (str): Connection string of the primary database
+                (notifications are not replicated).
+            queue_size (int): Maximal number of events queued for one
+                subscriber.
+            health_check_interval (float): Seconds between checks of
+                the listening connection.
+            reconnect_delay (float): Seconds between reconnection
+                attempts.
+        """
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self.health_check_interval = health_check_interval
+        self.reconnect_delay = reconnect_delay
+        self.subscriptions: set[Subscription] = set()
+        self.connected = False
+        self.events = 0
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, change_filter: ChangeFilter) -> Subscription:
+        """Register new subscriber.
+
+        Args:
+            change_filter (ChangeFilter): Events of interest.
+
+        Returns:
+            Subscription: Queue of events of the subscriber.
+        """
+        subscription = Subscription(change_filter, self.queue_size)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove the subscriber"""
+        self.subscriptions.discard(subscription)
+
+    def _notify(self, connection, pid: int, channel: str, payload: str):
+        """Fan the notification out to subscribers (event is decoded
+        and encoded only once)"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            LOGGER.warning("Malformed change notification: %s", payload)
+            return
+        self.events += 1
+        frame = f"event: change\ndata: {payload}\n\n".encode()
+        for _subscription in self.subscriptions:
+            _subscription.offer(event, frame)
+
+    async def _listen(self, connection: asyncpg.Connection):
+        """Listen on the connection until it is lost"""
+        try:
+            await connection.add_listener(CHANGES_CHANNEL, self._notify)
+            self.connected = True
+            LOGGER.info("Listening to changes")
+            while True:
+                await asyncio.sleep(self.health_check_interval)
+                await asyncio.wait_for(connection.execute("SELECT 1"),
+                                       self.health_check_interval)
+        finally:
+            self.connected = False
+            connection.terminate()
+
+    async def _run(self):
+        """Keep listening (reconnect if the connection is lost, only
+        the first of failed attempts to connect is logged)"""
+        failing = False
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except Exception as error:
+                if not failing:
+                    LOGGER.warning("Cannot listen to changes: %s", error)
+                failing = True
+            else:
+                failing = False
+                try:
+                    await self._listen(connection)
+                except Exception as error:
+                    LOGGER.warning("Listening to changes interrupted: %s",
+                                   error)
+            # Changes could be missed while disconnected
+            for _subscription in self.subscriptions:
+                _subscription.put(_RESYNC_FRAME)
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self):
+        """Start listening (in the background task)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop listening"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return state of the feed"""
+        return {
+            "connected": self.connected,
+            "subscribers": len(self.subscriptions),
+            "events": self.events,
+        }
+
+    async def stream(self,
+                     change_filter: ChangeFilter,
+                     heartbeat: float) -> AsyncIterator[bytes]:
+        """Stream events as server-sent events ('change' events with
+        JSON data, 'resync' if some could be missed), subscriber is
+        removed when the client disconnects.
+
+        Args:
+            change_filter (ChangeFilter): Events of interest.
+            heartbeat (float): Seconds of silence before the heartbeat
+                comment is sent.
+
+        Yields:
+            bytes: Encoded event.
+        """
+        subscription = self.subscribe(change_filter)
+        try:
+            if not self.connected:
+                yield _RESYNC_FRAME
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(),
+                                                 heartbeat)
+                except asyncio.TimeoutError:
+                    yield _HEARTBEAT_FRAME
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,67 @@
+from typing import TYPE_CHECKING
+
+from fastapi import status
+
+if TYPE_CHECKING:
+    from sqlalchemy.exc import IntegrityError
+
+# Status codes and details of violated constraints by SQLSTATE (the
+# message of the driver is never returned, it names tables and columns)
+CONSTRAINT_VIOLATIONS: dict[str, tuple[int, str]] = {
+    # Conflicts with other items
+    "23505": (status.HTTP_409_CONFLICT,
+              "Item conflicts with an existing item"),  # Unique
+    "23P01": (status.HTTP_409_CONFLICT,
+              "Item conflicts with an existing item"),  # Exclusion
+    # Invalid input
+    "23503": (status.HTTP_422_UNPROCESSABLE_ENTITY,
+              "Referenced item does not exist"),  # Foreign key
+    "23514": (status.HTTP_422_UNPROCESSABLE_ENTITY,
+              "Value is out of the allowed range"),  # Check
+    "23502": (status.HTTP_422_UNPROCESSABLE_ENTITY,
+              "Required value is missing"),  # Not null
+}
+# Status code and detail of any other violated constraint
+DEFAULT_VIOLATION: tuple[int, str] = (
+    status.HTTP_409_CONFLICT,
+    "Write conflicts with the current state of data"
+)
+
+
+def constraint_name(error: 'IntegrityError') -> str | None:
+    """Return the name of the violated constraint.
+
+    Args:
+        error (IntegrityError): Error raised by the write.
+
+    Returns:
+        str | None: Name of the constraint (None if not reported).
+    """
+    diag = getattr(error.orig, "diag", None)  # psycopg2
+    if diag is not None:
+        return diag.constraint_name
+    # Error of asyncpg is the cause of the adapted error
+    return getattr(error.orig.__cause__, "constraint_name", None)
+
+
+def constraint_violation(
+        error: 'IntegrityError',
+        details: dict[str, str] | None = None) -> tuple[int, str]:
+    """Return status code and detail of the response to the write
+    violating a constraint ('409 Conflict' if it conflicts with other
+    items, '422 Unprocessable Entity' if values are invalid).
+
+    Args:
+        error (IntegrityError): Error raised by the write.
+        details (dict[str, str] | None): Details of errors by name of
+            the constraint (e. g. exclusion constraints of models).
+
+    Returns:
+        tuple[int, str]: Status code and detail.
+    """
+    status_code, detail = CONSTRAINT_VIOLATIONS.get(
+        getattr(error.orig, "pgcode", None), DEFAULT_VIOLATION
+    )
+    if details:
+        detail = details.get(constraint_name(error), detail)
+    return status_code, detail
@@ -0,0 +1,230 @@
+from typing import Any, Hashable
+from collections import OrderedDict
+import logging
+import pickle
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LocalCacheBackend:
+    """In-process LRU cache with time to live (per worker process)"""
+
+    def __init__(self, max_size: int, ttl: float):
+        """Create local cache.
+
+        Args:
+            max_size (int): Maximal number of cached items.
+            ttl (float): Time to live of items (seconds).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = \
+            OrderedDict()
+
+    def get(self, table: str, key: Hashable) -> tuple[bool, Any]:
+        """Read the item from the cache.
+
+        Args:
+            table (str): Name of the table.
+            key (Hashable): Primary key of the row.
+
+        Returns:
+            tuple[bool, Any]: True if item is cached, cached item.
+        """
+        with self._lock:
+            cached = self._items.get((table, key))
+            if cached is None:
+                return False, None
+            expires, value = cached
+            if expires < time.monotonic():
+                del self._items[(table, key)]
+                return False, None
+            self._items.move_to_end((table, key))
+            return True, value
+
+    def set(self, table: str, key: Hashable, value: Any):
+        """Write the item to the cache.
+
+        Args:
+            table (str): Name of the table.
+            key (Hashable): Primary key of the row.
+            value (Any): Cached item.
+        """
+        with self._lock:
+            self._items[(table, key)] = (time.monotonic() + self.ttl,
+                                         value)
+            self._items.move_to_end((table, key))
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, table: str, key: Hashable):
+        """Remove the item from the cache.
+
+        Args:
+            table (str): Name of the table.
+            key (Hashable): Primary key of the row.
+        """
+        with self._lock:
+            self._items.pop((table, key), None)
+
+    def clear_table(self, table: str):
+        """Remove all items of the table from the cache.
+
+        Args:
+            table (str): Name of the table.
+        """
+        with self._lock:
+            for _key in [_k for _k in self._items if _k[0] == table]:
+                del self._items[_key]
+
+
+class RedisCacheBackend:
+    """Cache shared by all workers (requires 'redis' package)"""
+
+    def __init__(self, url: str, ttl: float, prefix: str = "letstalk"):
+        """Create shared cache.
+
+        Args:
+            url (str): Redis URL.
+            ttl (float): Time to live of items (seconds).
+            prefix (str): Prefix of all keys.
+        """
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("shared entity cache requires 'redis'")
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def _key(self, table: str, key: Hashable) -> str:
+        """Create Redis key (includes generation of the table, so that
+        the whole table is invalidated by incrementing it)."""
+        generation = int(
+            self._redis.get(f"{self.prefix}:{table}:generation") or 0
+        )
+        return f"{self.prefix}:{table}:{generation}:{key!r}"
+
+    def get(self, table: str, key: Hashable) -> tuple[bool, Any]:
+        """Read the item from the cache (see LocalCacheBackend.get)"""
+        cached = self._redis.get(self._key(table, key))
+        if cached is None:
+            return False, None
+        return True, pickle.loads(cached)
+
+    def set(self, table: str, key: Hashable, value: Any):
+        """Write the item to the cache (see LocalCacheBackend.set)"""
+        self._redis.set(self._key(table, key), pickle.dumps(value),
+                        px=int(self.ttl * 1000))
+
+    def delete(self, table: str, key: Hashable):
+        """Remove the item from the cache (see
+        LocalCacheBackend.delete)"""
+        self._redis.delete(self._key(table, key))
+
+    def clear_table(self, table: str):
+        """Remove all items of the table from the cache (see
+        LocalCacheBackend.clear_table)"""
+        self._redis.incr(f"{self.prefix}:{table}:generation")
+
+
+class EntityCache:
+    """Read-through cache of serialized rows keyed by table and
+    primary key. Counts hits and misses.
+    """
+
+    def __init__(self, backend: LocalCacheBackend | RedisCacheBackend):
+        """Create cache.
+
+        Args:
+            backend (LocalCacheBackend | RedisCacheBackend): Storage.
+        """
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self,
+            table: str,
+            key: Hashable,
+            version: int | None = None) -> tuple[bool, Any]:
+        """Read the row from the cache.
+
+        Args:
+            table (str): Name of the table.
+            key (Hashable): Primary key of the row.
+            version (int | None): Current version of the table (row
+                cached with another version is a miss), any if None.
+
+        Returns:
+            tuple[bool, Any]: True if row is cached, copy of the row.
+        """
+        try:
+            hit, value = self.backend.get(table, key)
+        except Exception:  # Cache must never break the request
+            LOGGER.exception("entity cache is not available")
+            hit, value = False, None
+        if hit:
+            cached_version, value = value
+            # Row could be stale (cached by another worker, or read
+            # before a write invalidating it was committed)
+            hit = version is None or cached_version == version
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        # Callers may modify the row, the cached one is kept intact
+        return hit, dict(value) if hit else None
+
+    def set(self,
+            table: str,
+            key: Hashable,
+            value: dict[str, Any],
+            version: int | None = None):
+        """Write the row to the cache.
+
+        Args:
+            table (str): Name of the table.
+            key (Hashable): Primary key of the row.
+            value (dict[str, Any]): Serialized row.
+            version (int | None): Version of the table selected before
+                the row (row is at least that recent).
+        """
+        try:
+            self.backend.set(table, key, (version, dict(value)))
+        except Exception:
+            LOGGER.exception("entity cache is not available")
+
+    def invalidate(self, table: str, key: Hashable | None = None):
+        """Remove the row (or all rows of the table if key is None).
+
+        Args:
+            table (str): Name of the table.
+            key (Hashable | None): Primary key of the row.
+        """
+        try:
+            if key is None:
+                self.backend.clear_table(table)
+            else:
+                self.backend.delete(table, key)
+        except Exception:  # Write is committed already, rows expire
+            LOGGER.exception("entity cache is not available")
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit and miss counters.
+
+        Returns:
+            dict[str, Any]: Statistics of the cache.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
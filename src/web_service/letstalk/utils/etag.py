@@ -0,0 +1,84 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Header with the entity tag of the response
+ETAG_HEADER: str = "ETag"
+# Header naming request headers the representation depends on
+VARY_HEADER: str = "Vary"
+
+
+def compute_etag(request: Request,
+                 versions: dict[str, int],
+                 media_type: str | None = None) -> str:
+    """Create entity tag of the response from versions of tables it
+    is read from, from the request URL (path and query) and from the
+    negotiated media type.
+
+    Args:
+        request (Request): Request.
+        versions (dict[str, int]): Versions of tables.
+        media_type (str | None): Media type negotiated by 'Accept'
+            (None if the representation does not depend on it).
+
+    Returns:
+        str: Entity tag (quoted).
+    """
+    digest = hashlib.blake2b(
+        repr((sorted(versions.items()),
+              request.url.path,
+              sorted(request.query_params.multi_items()),
+              media_type)).encode(),
+        digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check 'If-None-Match' header (weak comparison).
+
+    Args:
+        if_none_match (str | None): Value of the header.
+        etag (str): Current entity tag.
+
+    Returns:
+        bool: True if client has the current representation.
+    """
+    if not if_none_match:
+        return False
+    tags = [_tag.strip() for _tag in if_none_match.split(",")]
+    return "*" in tags or etag in [_tag.removeprefix("W/")
+                                   for _tag in tags]
+
+
+def check_etag(request: Request,
+               response: Response,
+               versions: dict[str, int],
+               media_type: str | None = None) -> Response | None:
+    """Handle conditional GET before anything is selected.
+
+    Entity tag is written to the response headers (together with
+    'Cache-Control: no-cache', so clients always revalidate, and with
+    'Vary: Accept' if the media type is negotiated).
+
+    Args:
+        request (Request): Request.
+        response (Response): Response injected into route.
+        versions (dict[str, int]): Versions of tables the response is
+            read from.
+        media_type (str | None): Media type negotiated by 'Accept'
+            (None if the representation does not depend on it).
+
+    Returns:
+        Response | None: Response '304 Not Modified' if client has
+            the current representation, None otherwise.
+    """
+    etag = compute_etag(request, versions, media_type)
+    headers = {ETAG_HEADER: etag, "Cache-Control": "no-cache"}
+    if media_type is not None:
+        headers[VARY_HEADER] = "Accept"
+    response.headers.update(headers)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+    return None
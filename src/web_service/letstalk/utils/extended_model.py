@@ -1,18 +1,175 @@
-from typing import TYPE_CHECKING, ParamSpecKwargs, Any
+from typing import TYPE_CHECKING, ParamSpecKwargs, Any, Callable, \
+    ClassVar, Hashable, Iterable, Iterator
+import collections
 import logging
 
-from sqlalchemy import inspect
+from sqlalchemy import inspect, insert, update, delete, select, \
+    values, column, cast, func, and_, or_, event, BigInteger
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import Session
+
+from .replicas import REPLICA_SESSION_INFO
+from .search import SEARCH_CONFIG, SEARCH_VECTOR_COLUMN
 
 if TYPE_CHECKING:
-    from sqlalchemy.orm.session import Session
+    from sqlalchemy.orm.query import Query
+    from sqlalchemy import Table
+    from sqlalchemy.sql import Select, Insert, Update, Delete
+    from sqlalchemy.sql.elements import ColumnElement, Label
+
+    from .entity_cache import EntityCache
+    from .filters import ListFilter
 
 LOGGER = logging.getLogger(__name__)
 
+# Key of session info with cache invalidations of uncommitted writes
+_PENDING_INVALIDATIONS: str = "pending_invalidations"
+
+
+def _finish_write(db_session: 'Session',
+                  commit: bool,
+                  invalidate: Callable[[], None]):
+    """Commit the write and invalidate cached rows, or (if not
+    committed) defer the invalidation until the caller commits (rows
+    read before the commit could be cached again otherwise).
+
+    Args:
+        db_session (Session): Database connector.
+        commit (bool): Commit the transaction.
+        invalidate (Callable[[], None]): Invalidation of cached rows.
+    """
+    if commit:
+        db_session.commit()
+        invalidate()
+    else:
+        db_session.info.setdefault(_PENDING_INVALIDATIONS, []).append(
+            invalidate
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(db_session: 'Session'):
+    """Apply invalidations deferred by writes of the transaction"""
+    for _invalidate in db_session.info.pop(_PENDING_INVALIDATIONS, ()):
+        _invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(db_session: 'Session'):
+    """Discard invalidations of rolled back writes"""
+    db_session.info.pop(_PENDING_INVALIDATIONS, None)
+
 
 class ExtendedModelMixin:
     """Extension of SQLAlchemy model. Allows serialization, CRUD
     operations and others.
     """
+    # Cache of serialized rows used by 'get' (read-through) and
+    # invalidated by writes (disabled if None)
+    entity_cache: ClassVar['EntityCache | None'] = None
+    # Table with changes of tables appended by database triggers on
+    # every write, summed to versions (see 'utils.table_version')
+    version_table: ClassVar['Table | None'] = None
+    # Filters accepted by list end-points (query parameter name: filter)
+    list_filters: ClassVar[dict[str, 'ListFilter']] = {}
+
+    @classmethod
+    def _cache_key(cls, filtration: dict) -> Hashable | None:
+        """Return the cache key if filtration selects the row by
+        its primary key (None otherwise).
+
+        Args:
+            filtration (dict): Conditions for selection.
+
+        Returns:
+            Hashable | None: Primary key value (tuple if composite).
+        """
+        pk_names = [_pk.name for _pk in inspect(cls).primary_key]
+        if set(filtration) != set(pk_names):
+            return None
+        if len(pk_names) == 1:
+            return filtration[pk_names[0]]
+        return tuple(filtration[_name] for _name in pk_names)
+
+    @classmethod
+    def _invalidate_cache(cls, filtration: dict | None = None):
+        """Remove rows affected by a write from the entity cache.
+
+        Args:
+            filtration (dict | None): Conditions for selection of
+                affected rows (the whole table if not selected by PK).
+        """
+        if cls.entity_cache is None:
+            return
+        key = None if filtration is None else cls._cache_key(filtration)
+        cls.entity_cache.invalidate(cls.__tablename__, key)
+
+    @classmethod
+    def _invalidate_referencing_caches(cls):
+        """Clear cached rows of all tables referencing this table by
+        foreign key (transitively), as they could be deleted by
+        ON DELETE CASCADE.
+        """
+        if cls.entity_cache is None:
+            return
+        tables = cls.__table__.metadata.sorted_tables
+        referenced = {cls.__table__}
+        for _table in tables:
+            if _table not in referenced and any(
+                _fk.column.table in referenced
+                for _fk in _table.foreign_keys
+            ):
+                referenced.add(_table)
+                cls.entity_cache.invalidate(_table.name)
+
+    @classmethod
+    def _versions_select(cls, related_models: Iterable[type]) -> 'Select':
+        """Create selection of versions of the table of the model and
+        tables of related models.
+
+        Args:
+            related_models (Iterable[type]): Related models.
+
+        Returns:
+            Select: Selection of table names and versions.
+        """
+        names = [cls.__tablename__] + [_model.__tablename__
+                                       for _model in related_models]
+        version_table = cls.version_table.c
+        return select(
+            version_table.table_name,
+            cast(func.sum(version_table.changes), BigInteger)
+        ).where(
+            version_table.table_name.in_(names)
+        ).group_by(version_table.table_name)
+
+    @classmethod
+    def _versions_dict(cls,
+                       related_models: Iterable[type],
+                       rows: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Return versions of all requested tables (version of the
+        table never written to is 0)"""
+        versions = {cls.__tablename__: 0} | {
+            _model.__tablename__: 0 for _model in related_models
+        }
+        return versions | dict(rows)
+
+    @classmethod
+    def table_versions(cls,
+                       db_session: 'Session',
+                       *related_models: type) -> dict[str, int]:
+        """Select versions of the table of the model and tables of
+        related models (using a single primary key lookup).
+
+        Args:
+            db_session (Session): Database connector.
+            *related_models (type): Related models (e. g. nested).
+
+        Returns:
+            dict[str, int]: Versions of tables (by table name).
+        """
+        results = db_session.execute(cls._versions_select(related_models))
+        return cls._versions_dict(related_models, results.all())
 
     def to_dict(self) -> dict[str, Any]:
         """Serialize database row as dictionary.
@@ -25,49 +182,314 @@ class ExtendedModelMixin:
             if not _name.startswith("_")
         }
 
+    @classmethod
+    def _paginated(cls,
+                   query: 'Query | Select',
+                   order_by: object = None,
+                   limit: int | None = None,
+                   after: Any = None) -> 'Query | Select':
+        """Order the query and restrict it to one page (keyset
+        pagination on the first column of PK).
+
+        Args:
+            query (Query | Select): Selection.
+            order_by (object): Order by statement (if defined),
+                by default orders by the first column of PK.
+            limit (int | None): Maximal number of rows.
+            after (Any): Select only rows with the first column of PK
+                greater than this value (requires default order).
+
+        Returns:
+            Query | Select: Ordered (and restricted) selection.
+        """
+        primary_key = inspect(cls).primary_key[0]
+        if order_by:
+            # If there is a custom order by statement
+            if after is not None:
+                raise ValueError("keyset pagination requires PK order")
+            query = query.order_by(order_by)
+        else:
+            # Default order is by the first column of PK
+            query = query.order_by(primary_key)
+        if after is not None:
+            # Index range scan starting after the last seen key
+            query = query.filter(primary_key > after)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @classmethod
+    def _column_keys(cls,
+                     fields: Iterable[str] | None = None) -> list[str]:
+        """Return attribute names of selected mapped columns.
+
+        Args:
+            fields (Iterable[str] | None): Requested fields (names that
+                are not columns are skipped), primary key is selected
+                always (pagination and nesting rely on it). All
+                columns are selected if None.
+
+        Returns:
+            list[str]: Attribute names (in the order of columns).
+        """
+        mapper = inspect(cls)
+        if fields is None:
+            return [_attr.key for _attr in mapper.column_attrs]
+        fields = set(fields) | {
+            mapper.get_property_by_column(_pk).key
+            for _pk in mapper.primary_key
+        }
+        return [_attr.key for _attr in mapper.column_attrs
+                if _attr.key in fields]
+
+    @classmethod
+    def _columns(cls,
+                 prefix: str = "",
+                 fields: Iterable[str] | None = None) -> list['Label']:
+        """Return mapped columns labelled by attribute names (keys of
+        the dictionary produced by 'to_dict').
+
+        Args:
+            prefix (str): Prefix of labels.
+            fields (Iterable[str] | None): Requested fields (see
+                '_column_keys'), all columns if None.
+
+        Returns:
+            list[Label]: Labelled columns.
+        """
+        attrs = inspect(cls).attrs
+        return [attrs[_key].columns[0].label(prefix + _key)
+                for _key in cls._column_keys(fields)]
+
+    @classmethod
+    def _select(cls, fields: Iterable[str] | None = None) -> 'Select':
+        """Create (Core) selection of mapped columns. Rows are
+        returned as mappings, so no ORM instances are constructed.
+
+        Args:
+            fields (Iterable[str] | None): Requested fields (sparse
+                fieldset, see '_column_keys'), all columns if None.
+
+        Returns:
+            Select: Selection of columns.
+        """
+        return select(*cls._columns(fields=fields))
+
     @classmethod
     def all(cls,
             db_session: 'Session',
-            order_by: object = None) -> list[dict[str, Any]]:
+            order_by: object = None,
+            limit: int | None = None,
+            after: Any = None) -> list[dict[str, Any]]:
         """Select all object in the model
 
         Args:
             db_session (Session): Database connector.
             order_by (object): Order by statement (if defined),
                 by default orders by the first column of PK.
+            limit (int | None): Maximal number of rows (all if None).
+            after (Any): Select only rows with the first column of PK
+                greater than this value (keyset pagination).
 
         Returns:
             list[dict[str, Any]]: List of all rows serialized as dict
         """
         # Execute selection
-        if order_by:
-            # If there is a custom order by statement
-            results = db_session.query(cls).order_by(order_by)
-        else:
-            # Default order is by the first column of PK
-            results = db_session.query(cls).order_by(
-                inspect(cls).primary_key[0]
-            )
+        results = db_session.execute(
+            cls._paginated(cls._select(), order_by, limit, after)
+        )
         # Return results
-        return [_item.to_dict() for _item in results.all()]
+        return [dict(_row) for _row in results.mappings()]
+
+    @classmethod
+    def iterate(cls,
+                db_session: 'Session',
+                *criteria: 'ColumnElement',
+                chunk_size: int = 1000,
+                fields: Iterable[str] | None = None
+                ) -> Iterator[dict[str, Any]]:
+        """Iterate over all objects in the model (ordered by the first
+        column of PK). Rows are read from server-side cursor in chunks
+        so the memory consumption does not depend on the table size.
+
+        Args:
+            db_session (Session): Database connector.
+            *criteria (ColumnElement): SQL conditions for selection.
+            chunk_size (int): Number of rows fetched at once.
+            fields (Iterable[str] | None): Selected fields (all if
+                None, see '_column_keys').
+
+        Yields:
+            dict[str, Any]: Row serialized as dict.
+        """
+        results = db_session.execute(
+            cls._paginated(
+                cls._select(fields).filter(*criteria)
+            ).execution_options(stream_results=True)
+        )
+        for _chunk in results.mappings().partitions(chunk_size):
+            for _row in _chunk:
+                yield dict(_row)
+
+    @classmethod
+    def _select_with_related(cls,
+                             related_model: type,
+                             foreign_key: str,
+                             fields: Iterable[str] | None = None,
+                             related_fields: Iterable[str] | None = None
+                             ) -> 'Select':
+        """Create selection of columns of the model followed by columns
+        of the related model (JOIN on foreign key).
+
+        Args:
+            related_model (type): Model referenced by the foreign key.
+            foreign_key (str): Name of the foreign key column.
+            fields (Iterable[str] | None): Selected fields of the model
+                (all if None, foreign key is selected always).
+            related_fields (Iterable[str] | None): Selected fields of
+                the related model (all if None).
+
+        Returns:
+            Select: Selection (with JOIN).
+        """
+        if fields is not None:
+            fields = set(fields) | {foreign_key}
+        return select(
+            *cls._columns(fields=fields),
+            *related_model._columns("related_", related_fields)
+        ).join_from(
+            cls, related_model,
+            getattr(cls, foreign_key) == inspect(
+                related_model
+            ).primary_key[0]
+        )
+
+    @classmethod
+    def _nest_related(cls,
+                      rows: Iterable[tuple],
+                      related_model: type,
+                      foreign_key: str,
+                      nested_name: str,
+                      fields: Iterable[str] | None = None,
+                      related_fields: Iterable[str] | None = None
+                      ) -> list[dict[str, Any]]:
+        """Serialize rows selected by '_select_with_related', every
+        related row is serialized only once and the same dictionary is
+        shared by all rows referencing it.
+
+        Args:
+            rows (Iterable[tuple]): Selected rows.
+            related_model (type): Model referenced by the foreign key.
+            foreign_key (str): Name of the foreign key column.
+            nested_name (str): Key of the nested related object.
+            fields (Iterable[str] | None): Selected fields of the model.
+            related_fields (Iterable[str] | None): Selected fields of
+                the related model.
+
+        Returns:
+            list[dict[str, Any]]: Rows with related row as nested dict.
+        """
+        if fields is not None:
+            fields = set(fields) | {foreign_key}
+        keys = cls._column_keys(fields)
+        related_keys = related_model._column_keys(related_fields)
+        related_rows: dict[Any, dict[str, Any]] = {}
+        items = []
+        for _row in rows:
+            item = dict(zip(keys, _row))
+            related_id = item.pop(foreign_key)
+            if related_id not in related_rows:
+                related_rows[related_id] = dict(
+                    zip(related_keys, _row[len(keys):])
+                )
+            item[nested_name] = related_rows[related_id]
+            items.append(item)
+        return items
+
+    @classmethod
+    def all_with_related(cls,
+                         db_session: 'Session',
+                         related_model: type,
+                         foreign_key: str,
+                         nested_name: str,
+                         order_by: object = None,
+                         limit: int | None = None,
+                         after: Any = None,
+                         criteria: Iterable['ColumnElement'] = (),
+                         fields: Iterable[str] | None = None,
+                         related_fields: Iterable[str] | None = None
+                         ) -> list[dict[str, Any]]:
+        """Select all objects in the model together with the related
+        row referenced by the foreign key (using a single JOIN).
+
+        Every related row is serialized only once and the same
+        dictionary is shared by all rows referencing it.
+
+        Args:
+            db_session (Session): Database connector.
+            related_model (type): Model referenced by the foreign key.
+            foreign_key (str): Name of the foreign key column (it is
+                removed from the result and replaced by nested dict).
+            nested_name (str): Key of the nested related object.
+            order_by (object): Order by statement (if defined),
+                by default orders by the first column of PK.
+            limit (int | None): Maximal number of rows (all if None).
+            after (Any): Select only rows with the first column of PK
+                greater than this value (keyset pagination).
+            criteria (Iterable[ColumnElement]): SQL conditions for
+                selection (on columns of the model).
+            fields (Iterable[str] | None): Selected fields of the model
+                (all if None, see '_column_keys').
+            related_fields (Iterable[str] | None): Selected fields of
+                the related model (all if None).
+
+        Returns:
+            list[dict[str, Any]]: List of all rows serialized as dict
+                with related row as a nested dict.
+        """
+        # Execute selection (JOIN on foreign key)
+        results = db_session.execute(cls._paginated(
+            cls._select_with_related(
+                related_model, foreign_key, fields, related_fields
+            ).filter(*criteria),
+            order_by, limit, after
+        ))
+        return cls._nest_related(results, related_model, foreign_key,
+                                 nested_name, fields, related_fields)
 
     @classmethod
     def get(cls,
             db_session: 'Session',
+            table_version: int | None = None,
             **filtration: dict | ParamSpecKwargs) -> dict[str, Any]:
         """Select all object in the model.
 
         Args:
             db_session (Session): Database connector.
+            table_version (int | None): Version of the table selected
+                before (see 'table_versions'), cached rows of other
+                versions are not used.
             **filtration (dict): parameters for filtration
         Returns:
             dict[str, Any]: Specific row serialized as dictionary.
         """
-        # Execute selection
-        results = db_session.query(cls).filter_by(**filtration)
+        # Rows selected by primary key are read through the cache
+        key = None
+        if cls.entity_cache is not None:
+            key = cls._cache_key(filtration)
+            if key is not None:
+                hit, cached = cls.entity_cache.get(cls.__tablename__, key,
+                                                   table_version)
+                if hit:
+                    return cached
         # Get results
-        fetch_res = [_item.to_dict() for _item in results.all()]
+        fetch_res = cls.filter(db_session, **filtration)
         if len(fetch_res) == 1:
+            # Rows of (lagging) replicas could be older than the cache
+            if key is not None and \
+                    not db_session.info.get(REPLICA_SESSION_INFO):
+                cls.entity_cache.set(cls.__tablename__, key, fetch_res[0],
+                                     table_version)
             return fetch_res[0]
         elif len(fetch_res) > 1:
             raise AttributeError("more than one plausible item")
@@ -77,84 +499,406 @@ class ExtendedModelMixin:
     @classmethod
     def filter(cls,
                db_session: 'Session',
+               *criteria: 'ColumnElement',
+               order_by: object = None,
+               limit: int | None = None,
+               after: Any = None,
+               fields: Iterable[str] | None = None,
                **filtration: dict | ParamSpecKwargs) -> list[dict]:
         """Select all object in the model
 
         Args:
             db_session (Session): Database connector.
+            *criteria (ColumnElement): SQL conditions for selection
+                (e. g. filters of list end-points).
+            order_by (object): Order by statement (if defined),
+                by default orders by the first column of PK.
+            limit (int | None): Maximal number of rows (all if None).
+            after (Any): Select only rows with the first column of PK
+                greater than this value (keyset pagination).
+            fields (Iterable[str] | None): Selected fields (all if
+                None, see '_column_keys').
             filtration (dict | ParamSpecKwargs): Conditions
                 for selection.
         """
         # Execute selection
-        results = db_session.query(cls).filter_by(**filtration)
+        results = db_session.execute(cls._paginated(
+            cls._select(fields).filter(*criteria).filter_by(**filtration),
+            order_by, limit, after
+        ))
         # Get results
-        return [_item.to_dict() for _item in results.all()]
+        return [dict(_row) for _row in results.mappings()]
+
+    @classmethod
+    def _search_select(cls,
+                       text: str,
+                       criteria: Iterable['ColumnElement'] = (),
+                       limit: int | None = None,
+                       after: list | None = None) -> 'Select':
+        """Create full-text search of rows ordered by rank (and PK).
+
+        Matching rows are found by GIN index of the generated column
+        'search_vector', rank (as double precision, so it is compared
+        exactly in cursors) is added to each row as 'rank'.
 
-    def create(self, db_session) -> dict[str, Any]:
-        """Insert into the database
+        Args:
+            text (str): Searched text (web search syntax, e. g.
+                'headache -migraine' or '"chest pain"').
+            criteria (Iterable[ColumnElement]): SQL conditions for
+                selection (e. g. filters of list end-points).
+            limit (int | None): Maximal number of rows.
+            after (list | None): Rank and PK of the last row of the
+                previous page (keyset pagination).
+
+        Returns:
+            Select: Selection of ranked rows.
+        """
+        vector = cls.__table__.c[SEARCH_VECTOR_COLUMN]
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+        rank = cast(func.ts_rank_cd(vector, query), DOUBLE_PRECISION)
+        primary_key = inspect(cls).primary_key[0]
+        selection = select(*cls._columns(), rank.label("rank")).where(
+            vector.op("@@")(query), *criteria
+        )
+        if after is not None:
+            after_rank, after_key = after
+            selection = selection.where(or_(
+                rank < after_rank,
+                and_(rank == after_rank, primary_key > after_key)
+            ))
+        selection = selection.order_by(rank.desc(), primary_key)
+        if limit is not None:
+            selection = selection.limit(limit)
+        return selection
+
+    @classmethod
+    def search(cls,
+               db_session: 'Session',
+               text: str,
+               *criteria: 'ColumnElement',
+               limit: int | None = None,
+               after: list | None = None) -> list[dict[str, Any]]:
+        """Full-text search of rows (see '_search_select').
 
         Args:
             db_session (Session): Database connector.
+            text (str): Searched text (web search syntax).
+            *criteria (ColumnElement): SQL conditions for selection.
+            limit (int | None): Maximal number of rows.
+            after (list | None): Rank and PK of the last row of the
+                previous page.
 
         Returns:
-            dict[str, Any]: Inserted values.
+            list[dict[str, Any]]: Rows (with 'rank') from the best match.
         """
-        # Perform creation
-        db_session.add(self)
-        db_session.commit()
+        results = db_session.execute(
+            cls._search_select(text, criteria, limit, after)
+        )
+        return [dict(_row) for _row in results.mappings()]
+
+    def _insert_statement(self) -> 'Insert':
+        """Create INSERT ... RETURNING statement for this object.
+
+        Returns:
+            Insert: Statement returning the inserted row.
+        """
+        return insert(self.__table__).values({
+            _attr.columns[0].name: getattr(self, _attr.key)
+            for _attr in inspect(type(self)).column_attrs
+            if _attr.key in vars(self)
+        }).returning(*type(self)._columns())
+
+    @classmethod
+    def _update_statement(cls,
+                          filtration: dict,
+                          new_values: dict) -> 'Update':
+        """Create UPDATE ... RETURNING statement.
+
+        Args:
+            filtration (dict): Conditions for selection.
+            new_values (dict): Values that are updated.
+
+        Returns:
+            Update: Statement returning the updated rows.
+        """
+        return update(cls.__table__).filter_by(**filtration).values(
+            new_values
+        ).returning(*cls._columns())
+
+    @classmethod
+    def _delete_statement(cls, filtration: dict) -> 'Delete':
+        """Create DELETE ... RETURNING statement.
+
+        Args:
+            filtration (dict): Conditions for selection.
+
+        Returns:
+            Delete: Statement returning primary keys of deleted rows.
+        """
+        table = cls.__table__
+        return delete(table).filter_by(**filtration).returning(
+            *table.primary_key.columns
+        )
+
+    def create(self, db_session, commit: bool = True) -> dict[str, Any]:
+        """Insert into the database (single INSERT ... RETURNING
+        statement)
+
+        Args:
+            db_session (Session): Database connector.
+            commit (bool): Commit the transaction (otherwise the caller
+                commits, e. g. after more writes).
 
-        # Force to fetch the ID of the new object
-        for pk in inspect(type(self)).primary_key:
-            # Fetches it by calling the property
-            getattr(self, pk.name)
+        Returns:
+            dict[str, Any]: Inserted values.
+        """
+        # Perform creation (returns stored row including new ID)
+        created = dict(
+            db_session.execute(self._insert_statement()).one()._mapping
+        )
 
-        # Return identity (with new ID)
-        return self.to_dict()
+        # Cached row (by new ID) is invalidated after commit
+        _finish_write(db_session, commit,
+                      lambda: type(self)._invalidate_cache({
+                          _pk.name: created[_pk.name]
+                          for _pk in inspect(type(self)).primary_key
+                      }))
+        return created
 
     @classmethod
     def update(cls,
                db_session,
                filtration: dict | ParamSpecKwargs,
-               new_values: dict) -> tuple[dict[str, Any], int]:
-        """Update in the database
+               new_values: dict,
+               commit: bool = True) -> tuple[dict[str, Any], int]:
+        """Update in the database (single UPDATE ... RETURNING
+        statement)
 
         Args:
             db_session (Session): Database connector.
             filtration (dict | ParamSpecKwargs): Conditions
                 for selection.
             new_values (dict): Values that are updated.
+            commit (bool): Commit the transaction (otherwise the caller
+                commits).
 
         Returns:
-            tuple[dict[str, Any], int]: New values, number of
-                updated items.
+            tuple[dict[str, Any], int]: Stored values of the (first)
+                updated item, number of updated items.
         """
         # Perform database update
-        selection = db_session.query(cls).filter_by(**filtration)
-        selection.update(new_values)
-        db_session.commit()
+        updated = [dict(_row._mapping) for _row in db_session.execute(
+            cls._update_statement(filtration, new_values)
+        )]
+        _finish_write(db_session, commit,
+                      lambda: cls._invalidate_cache(filtration))
 
         # Return updated item
-        return filtration | new_values, int(selection.count())
+        if not updated:
+            return filtration | new_values, 0
+        return updated[0], len(updated)
 
     @classmethod
     def delete(cls,
                db_session,
-               filtration: dict | ParamSpecKwargs) -> int:
-        """Delete rows in the database
+               filtration: dict | ParamSpecKwargs,
+               commit: bool = True) -> int:
+        """Delete rows in the database (single DELETE ... RETURNING
+        statement)
 
         Args:
             db_session (Session): Database connector.
             filtration (dict | ParamSpecKwargs): Conditions
                 for selection.
+            commit (bool): Commit the transaction (otherwise the caller
+                commits).
 
         Returns:
             int: number of deleted items.
         """
-        # Perform database update
-        selection = db_session.query(cls).filter_by(**filtration)
-        affected = int(selection.count())
-        selection.delete()
-        db_session.commit()
+        # Perform database delete
+        affected = len(db_session.execute(
+            cls._delete_statement(filtration)
+        ).all())
 
-        # Return updated item
+        def _invalidate():
+            cls._invalidate_cache(filtration)
+            cls._invalidate_referencing_caches()
+        _finish_write(db_session, commit, _invalidate)
+
+        # Return number of deleted items
         return affected
+
+    @classmethod
+    def _missing_references(cls,
+                            db_session: 'Session',
+                            rows: list[dict]) -> dict[int, str]:
+        """Find rows referencing (by foreign key) items that do not
+        exist (one query per foreign key column). Existing referenced
+        rows are locked until the end of the transaction, so they can
+        not be deleted before the rows are written.
+
+        Args:
+            db_session (Session): Database connector.
+            rows (list[dict]): Values of rows.
+
+        Returns:
+            dict[int, str]: Error detail for position of each invalid
+                row.
+        """
+        errors = {}
+        for _fk in cls.__table__.foreign_keys:
+            name = _fk.parent.name
+            referenced = {_row[name] for _row in rows
+                          if _row.get(name) is not None}
+            if not referenced:
+                continue
+            existing = set(db_session.execute(
+                select(_fk.column).where(_fk.column.in_(referenced))
+                .with_for_update(read=True, key_share=True)
+            ).scalars())
+            for _index, _row in enumerate(rows):
+                if _row.get(name) is not None and \
+                        _row[name] not in existing:
+                    errors.setdefault(_index, f"{name} does not exist")
+        return errors
+
+    @classmethod
+    def bulk_create(
+            cls,
+            db_session: 'Session',
+            rows: list[dict],
+            batch_size: int = 1000
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """Insert many rows using multi-row INSERT statements (one per
+        batch) and a single commit. Rows referencing non-existing items
+        are skipped and reported.
+
+        Args:
+            db_session (Session): Database connector.
+            rows (list[dict]): Values of new rows.
+            batch_size (int): Number of rows in one INSERT statement.
+
+        Returns:
+            tuple[list[dict[str, Any]], list[dict[str, Any]]]: Inserted
+                rows (with new IDs), errors (with 'index' and 'detail').
+        """
+        invalid = cls._missing_references(db_session, rows)
+        valid = [_row for _index, _row in enumerate(rows)
+                 if _index not in invalid]
+        created = []
+        for _start in range(0, len(valid), batch_size):
+            results = db_session.execute(
+                insert(cls.__table__).values(
+                    valid[_start:_start + batch_size]
+                ).returning(*cls._columns())
+            )
+            created.extend(dict(_row._mapping) for _row in results)
+        db_session.commit()
+
+        for _item in created:
+            cls._invalidate_cache({
+                _pk.name: _item[_pk.name]
+                for _pk in inspect(cls).primary_key
+            })
+        return created, [{"index": _index, "detail": _detail}
+                         for _index, _detail in sorted(invalid.items())]
+
+    @classmethod
+    def bulk_update(
+            cls,
+            db_session: 'Session',
+            rows: list[dict],
+            batch_size: int = 1000
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """Update many rows (selected by 'id' in each row) using
+        UPDATE ... FROM (VALUES ...) statements (one per batch) and
+        a single commit. Missing or invalid rows are reported, as well
+        as rows with the same 'id' (none of them is updated, only one
+        of them would be applied).
+
+        Args:
+            db_session (Session): Database connector.
+            rows (list[dict]): New values of rows (including 'id').
+            batch_size (int): Number of rows in one UPDATE statement.
+
+        Returns:
+            tuple[list[dict[str, Any]], list[dict[str, Any]]]: Updated
+                rows, errors (with 'index', 'id' and 'detail').
+        """
+        table = cls.__table__
+        columns = [_attr.columns[0] for _attr in
+                   inspect(cls).column_attrs]
+        occurrences = collections.Counter(_row["id"] for _row in rows
+                                          if _row["id"] is not None)
+        invalid = {_index: "id is repeated in the request"
+                   for _index, _row in enumerate(rows)
+                   if occurrences[_row["id"]] > 1}
+        for _index, _detail in cls._missing_references(db_session,
+                                                       rows).items():
+            invalid.setdefault(_index, _detail)
+        valid = [_row for _index, _row in enumerate(rows)
+                 if _index not in invalid]
+        updated = []
+        for _start in range(0, len(valid), batch_size):
+            batch = valid[_start:_start + batch_size]
+            new_values = values(
+                *[column(_col.name, _col.type) for _col in columns],
+                name="new_values"
+            ).data([tuple(_row.get(_col.name) for _col in columns)
+                    for _row in batch])
+            # Literals in VALUES are typed as text, hence the casts
+            results = db_session.execute(
+                update(table).where(
+                    table.c.id == cast(new_values.c.id, table.c.id.type)
+                ).values({
+                    _col.name: cast(new_values.c[_col.name], _col.type)
+                    for _col in columns if not _col.primary_key
+                }).returning(*cls._columns())
+            )
+            updated.extend(dict(_row._mapping) for _row in results)
+        db_session.commit()
+
+        updated_ids = {_item["id"] for _item in updated}
+        for _item_id in updated_ids:
+            cls._invalidate_cache({"id": _item_id})
+        for _index, _row in enumerate(rows):
+            if _index not in invalid and _row["id"] not in updated_ids:
+                invalid[_index] = "item not found"
+        return updated, [
+            {"index": _index, "id": rows[_index]["id"], "detail": _detail}
+            for _index, _detail in sorted(invalid.items())
+        ]
+
+    @classmethod
+    def bulk_delete(
+            cls,
+            db_session: 'Session',
+            ids: list[Any]
+    ) -> tuple[list[Any], list[dict[str, Any]]]:
+        """Delete many rows by 'id' using a single DELETE statement.
+
+        Args:
+            db_session (Session): Database connector.
+            ids (list[Any]): IDs of deleted rows.
+
+        Returns:
+            tuple[list[Any], list[dict[str, Any]]]: Deleted IDs,
+                errors (with 'index', 'id' and 'detail').
+        """
+        table = cls.__table__
+        deleted = list(db_session.execute(
+            delete(table).where(table.c.id.in_(ids)).returning(table.c.id)
+        ).scalars())
+        db_session.commit()
+
+        for _item_id in deleted:
+            cls._invalidate_cache({"id": _item_id})
+        if deleted:
+            cls._invalidate_referencing_caches()
+        deleted_ids = set(deleted)
+        return deleted, [
+            {"index": _index, "id": _item_id, "detail": "item not found"}
+            for _index, _item_id in enumerate(ids)
+            if _item_id not in deleted_ids
+        ]
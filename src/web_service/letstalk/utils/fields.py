@@ -0,0 +1,101 @@
+from typing import Callable
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+# Separator of fields of nested objects (e. g. 'condition.name')
+NESTED_SEPARATOR: str = "."
+# All fields of nested object (e. g. 'condition.*')
+ALL_FIELDS: str = "*"
+
+
+def top_fields(fields: frozenset[str]) -> frozenset[str]:
+    """Return names of top level fields (nested objects included).
+
+    Args:
+        fields (frozenset[str]): Requested fields (paths).
+
+    Returns:
+        frozenset[str]: Names of fields of the item.
+    """
+    return frozenset(_field.split(NESTED_SEPARATOR, 1)[0]
+                     for _field in fields)
+
+
+def nested_fields(fields: frozenset[str] | None,
+                  name: str) -> frozenset[str] | None:
+    """Return requested fields of the nested object.
+
+    Args:
+        fields (frozenset[str] | None): Requested fields (None if all).
+        name (str): Name of the nested object.
+
+    Returns:
+        frozenset[str] | None: Fields of the nested object (None if
+            all, empty if the object is not requested).
+    """
+    if fields is None or name in fields or \
+            f"{name}{NESTED_SEPARATOR}{ALL_FIELDS}" in fields:
+        return None
+    prefix = name + NESTED_SEPARATOR
+    return frozenset(_field[len(prefix):] for _field in fields
+                     if _field.startswith(prefix))
+
+
+def _field_problem(pydantic_model: type[BaseModel],
+                   field: str,
+                   prefix: str = "") -> str | None:
+    """Check that the field (path) exists in the serializer (return
+    description of the problem, None if valid)"""
+    name, _, rest = field.partition(NESTED_SEPARATOR)
+    if name not in pydantic_model.__fields__:
+        return f"Unknown field '{prefix}{field}'"
+    if not rest:
+        return None
+    field_type = pydantic_model.__fields__[name].type_
+    if not (isinstance(field_type, type) and
+            issubclass(field_type, BaseModel)):
+        return f"Field '{prefix}{name}' has no nested fields"
+    if rest == ALL_FIELDS:
+        return None
+    return _field_problem(field_type, rest,
+                          prefix + name + NESTED_SEPARATOR)
+
+
+def create_fields_dependency(
+        pydantic_model: type[BaseModel]
+) -> Callable[..., frozenset[str] | None]:
+    """Create FastAPI dependency reading sparse fieldset from 'fields'
+    query parameter (comma separated, e. g. 'id,name,condition.name').
+
+    Args:
+        pydantic_model (type[BaseModel]): Serializer of the item.
+
+    Returns:
+        Callable[..., frozenset[str] | None]: Dependency returning
+            requested fields (None if all fields are requested).
+    """
+    def _fields_dependency(
+            fields: str | None = Query(
+                None,
+                description="Comma separated fields of items (e. g. "
+                            "'id,name' or 'id,condition.name'), only "
+                            "these are selected (all if not set)"
+            )
+    ) -> frozenset[str] | None:
+        if fields is None:
+            return None
+        requested = frozenset(_field.strip() for _field in fields.split(",")
+                              if _field.strip())
+        if not requested:
+            return None
+        for _field in sorted(requested):
+            problem = _field_problem(pydantic_model, _field)
+            if problem is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=problem
+                )
+        return requested
+
+    return _fields_dependency
@@ -0,0 +1,57 @@
+from typing import TYPE_CHECKING, Any, Callable, Optional
+import inspect
+
+from fastapi import Query
+
+if TYPE_CHECKING:
+    from sqlalchemy.sql.elements import ColumnElement
+
+
+class ListFilter:
+    """Typed query parameter of list end-points that is translated to
+    SQL condition (pushed down to 'ExtendedModelMixin.filter')."""
+
+    def __init__(self,
+                 annotation: type,
+                 criterion: Callable[[Any], 'ColumnElement'],
+                 description: str | None = None):
+        """Create filter.
+
+        Args:
+            annotation (type): Type of the query parameter.
+            criterion (Callable[[Any], ColumnElement]): Function
+                creating SQL condition from the parameter value.
+            description (str | None): Description (documentation).
+        """
+        self.annotation = annotation
+        self.criterion = criterion
+        self.description = description
+
+
+def create_filter_dependency(
+        list_filters: dict[str, ListFilter]
+) -> Callable[..., list['ColumnElement']]:
+    """Create FastAPI dependency reading filters from query parameters
+    (every filter is an optional parameter of its type).
+
+    Args:
+        list_filters (dict[str, ListFilter]): Filters by parameter name.
+
+    Returns:
+        Callable[..., list[ColumnElement]]: Dependency returning SQL
+            conditions of the parameters present in request.
+    """
+    def _filter_dependency(**values: Any) -> list['ColumnElement']:
+        return [list_filters[_name].criterion(_value)
+                for _name, _value in values.items()
+                if _value is not None]
+
+    # FastAPI reads query parameters from the signature
+    _filter_dependency.__signature__ = inspect.Signature([
+        inspect.Parameter(
+            _name, inspect.Parameter.KEYWORD_ONLY,
+            default=Query(None, description=_filter.description),
+            annotation=Optional[_filter.annotation]
+        ) for _name, _filter in list_filters.items()
+    ])
+    return _filter_dependency
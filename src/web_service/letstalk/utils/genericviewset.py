@@ -1,49 +1,211 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Iterator
 
-from fastapi import HTTPException, status
+from fastapi import Depends, Header, HTTPException, Query, Request, \
+    Response, status
 from fastapi_utils.cbv import cbv
+from sqlalchemy.orm import Session
+
+from .bulk import BulkDeleteResult, MAX_BULK_SIZE, \
+    create_bulk_result_model
+from .etag import check_etag
+from .fields import create_fields_dependency
+from .filters import create_filter_dependency
+from .pagination import MAX_PAGE_SIZE, paginate
+from .serialization import create_encoder, create_list_encoder, \
+    encoded_response
+from .streaming import JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, \
+    stream_response
 
 if TYPE_CHECKING:
-    from fastapi_utils.inferring_router import InferringRouter
+    from fastapi import APIRouter
 
 
-def create_generic_viewset(router: 'InferringRouter',
+def create_generic_viewset(router: 'APIRouter',
                            sqlalchemy_model: type,
                            pydantic_model: type,
                            pydantic_modify_model: type,
-                           db_session: object,
-                           route_base: str) -> type:
+                           session_dependency: Callable[
+                               [], Iterator[Session]
+                           ],
+                           route_base: str,
+                           read_session_dependency: Callable[
+                               ..., Iterator[Session]
+                           ] | None = None) -> type:
     """Create a generic view set with all standard methods.
+
+    Each request gets its own database session from the dependency
+    'session_dependency' (available as 'self.db_session'). Reading
+    routes (list and detail) use the session from the dependency
+    'read_session_dependency' instead (e. g. of read replica, available
+    as 'self.read_db_session'), the same session if not set.
+    Responses are encoded by precompiled encoders (rows produced by
+    the model are not validated again by response models). List and
+    detail routes answer conditional requests ('If-None-Match') using
+    versions of tables before selecting anything. List route accepts
+    filters declared by the model ('list_filters'). List and detail
+    routes accept sparse fieldset ('fields'), list selects only the
+    requested columns (detail is read through the entity cache).
     Note:
         Would be better to use meta classes for this purpose.
     """
+    bulk_result_model = create_bulk_result_model(pydantic_model)
+    # Encoders of responses
+    encode_item = create_encoder(pydantic_model)
+    encode_bulk_result = create_encoder(bulk_result_model)
+    encode_bulk_delete_result = create_encoder(BulkDeleteResult)
+    # Query parameters filtering the list
+    filter_dependency = create_filter_dependency(
+        sqlalchemy_model.list_filters
+    )
+    # Query parameter with sparse fieldset of reading routes
+    fields_dependency = create_fields_dependency(pydantic_model)
+
     @cbv(router)
     class _GenericAPIViewSet:
         """Base Generic API view set (implementing all CRUD)"""
+        db_session: Session = Depends(session_dependency)
+        read_db_session: Session = Depends(
+            read_session_dependency or session_dependency
+        )
+
         @router.get(route_base,
                     response_model=list[pydantic_model])
-        def list_item(self):
-            """List all items in the database"""
-            return sqlalchemy_model.all(db_session)
+        def list_item(self,
+                      request: Request,
+                      response: Response,
+                      limit: int | None = Query(None, gt=0,
+                                                le=MAX_PAGE_SIZE),
+                      after: str | None = None,
+                      stream: bool = False,
+                      accept: str | None = Header(None),
+                      criteria: list = Depends(filter_dependency),
+                      fields: frozenset[str] | None = Depends(
+                          fields_dependency
+                      )):
+            """List all items in the database (optionally filtered and
+            paginated using 'limit' and 'after' cursor, restricted to
+            'fields').
+
+            Whole table is streamed if 'stream' is set (as JSON array)
+            or if NDJSON is accepted (as newline delimited JSON).
+            """
+            ndjson = accept is not None and NDJSON_MEDIA_TYPE in accept
+            not_modified = check_etag(
+                request, response,
+                sqlalchemy_model.table_versions(self.read_db_session),
+                NDJSON_MEDIA_TYPE if ndjson else JSON_MEDIA_TYPE
+            )
+            if not_modified is not None:
+                return not_modified
+            if stream or ndjson:
+                return stream_response(
+                    sqlalchemy_model.iterate(self.read_db_session, *criteria,
+                                             fields=fields),
+                    pydantic_model,
+                    ndjson,
+                    headers=dict(response.headers),
+                    fields=fields
+                )
+            items = paginate(
+                lambda _limit, _after: sqlalchemy_model.filter(
+                    self.read_db_session, *criteria, limit=_limit,
+                    after=_after, fields=fields
+                ),
+                response, limit, after
+            )
+            return encoded_response(
+                items, create_list_encoder(pydantic_model, fields), response
+            )
+
+        # Bulk routes are registered before the '/{item_id}' routes
+        @router.post(route_base + "/bulk",
+                     response_model=bulk_result_model,
+                     status_code=status.HTTP_201_CREATED)
+        def bulk_create_items(self, items: list[pydantic_modify_model]):
+            """Create many items in the database (in one transaction),
+            items referencing non-existing objects are reported"""
+            self._check_bulk_size(items)
+            created, errors = sqlalchemy_model.bulk_create(
+                self.db_session, [_item.dict() for _item in items]
+            )
+            return encoded_response({"items": created, "errors": errors},
+                                    encode_bulk_result,
+                                    status_code=status.HTTP_201_CREATED)
+
+        @router.put(route_base + "/bulk",
+                    response_model=bulk_result_model)
+        def bulk_update_items(self, items: list[pydantic_model]):
+            """Update many items in the database (in one transaction),
+            missing or invalid items are reported"""
+            self._check_bulk_size(items)
+            updated, errors = sqlalchemy_model.bulk_update(
+                self.db_session, [_item.dict() for _item in items]
+            )
+            return encoded_response({"items": updated, "errors": errors},
+                                    encode_bulk_result)
+
+        @router.delete(route_base + "/bulk",
+                       response_model=BulkDeleteResult)
+        def bulk_delete_items(self, item_ids: list[int]):
+            """Delete many items in the database (in one statement),
+            missing items are reported"""
+            self._check_bulk_size(item_ids)
+            deleted, errors = sqlalchemy_model.bulk_delete(
+                self.db_session, item_ids
+            )
+            return encoded_response({"deleted": deleted, "errors": errors},
+                                    encode_bulk_delete_result)
+
+        @staticmethod
+        def _check_bulk_size(items: list):
+            """Restrict the number of items in the bulk request"""
+            if len(items) > MAX_BULK_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"At most {MAX_BULK_SIZE} items allowed"
+                )
 
         @router.get(route_base + "/{item_id}",
                     response_model=pydantic_model)
-        def detail_item(self, item_id: int):
-            """Detail of the item in the database"""
+        def detail_item(self,
+                        request: Request,
+                        response: Response,
+                        item_id: int,
+                        fields: frozenset[str] | None = Depends(
+                            fields_dependency
+                        )):
+            """Detail of the item in the database (restricted to
+            'fields')"""
+            versions = sqlalchemy_model.table_versions(self.read_db_session)
+            not_modified = check_etag(request, response, versions)
+            if not_modified is not None:
+                return not_modified
             try:
-                return sqlalchemy_model.get(db_session, id=item_id)
+                # Cached row must match the version in the entity tag
+                item = sqlalchemy_model.get(
+                    self.read_db_session,
+                    table_version=versions[sqlalchemy_model.__tablename__],
+                    id=item_id
+                )
             except AttributeError:  # Covers everything
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Item not found"
                 )
+            return encoded_response(
+                item, create_encoder(pydantic_model, fields), response
+            )
 
         @router.post(route_base,
                      response_model=pydantic_model,
                      status_code=status.HTTP_201_CREATED)
         def create_item(self, item: pydantic_modify_model):
             """Create an item in the database"""
-            return sqlalchemy_model(**item.dict()).create(db_session)
+            return encoded_response(
+                sqlalchemy_model(**item.dict()).create(self.db_session),
+                encode_item,
+                status_code=status.HTTP_201_CREATED
+            )
 
         @router.put(route_base + "/{item_id}",
                     response_model=pydantic_model)
@@ -52,25 +214,27 @@ def create_generic_viewset(router: 'InferringRouter',
                         item: pydantic_modify_model):
             """Update the item in the database"""
             resp_body, count = sqlalchemy_model.update(
-                db_session, {"id": item_id}, item.dict()
+                self.db_session, {"id": item_id}, item.dict()
             )
             if count != 1:
                 # In the case of wrong ID
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Item not found")
-            return resp_body
+            return encoded_response(resp_body, encode_item)
 
         @router.delete(route_base + "/{item_id}",
                        status_code=status.HTTP_204_NO_CONTENT)
         def delete_item(self, item_id: int):
             """Delete the item in the database"""
-            count = sqlalchemy_model.delete(db_session,
+            count = sqlalchemy_model.delete(self.db_session,
                                             {"id": item_id})
             if count != 1:
                 # In the case of wrong ID
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Item not found")
+            # Empty body (returned None would be encoded as 'null')
+            return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     return _GenericAPIViewSet
@@ -0,0 +1,338 @@
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+from contextvars import ContextVar
+import threading
+import time
+
+from sqlalchemy import event
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.pool import Pool
+
+    from .pool_stats import PoolCheckoutStats
+
+# Buckets of histograms (upper bounds)
+LATENCY_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                      0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Media type of Prometheus text exposition format
+PROMETHEUS_MEDIA_TYPE: str = "text/plain; version=0.0.4"
+
+
+def _labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    """Format labels of the sample (escaped)"""
+    return ",".join(
+        f'{_name}="' + str(_value).replace("\\", "\\\\")
+        .replace('"', '\\"').replace("\n", "\\n") + '"'
+        for _name, _value in zip(names, values)
+    )
+
+
+class Histogram:
+    """Histogram of observed values per label values"""
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 label_names: tuple[str, ...],
+                 buckets: tuple[float, ...]):
+        """Create histogram.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Help text.
+            label_names (tuple[str, ...]): Names of labels.
+            buckets (tuple[float, ...]): Upper bounds of buckets.
+        """
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # Label values: (counts of buckets, sum, count)
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, label_values: tuple, value: float):
+        """Record one observation.
+
+        Args:
+            label_values (tuple): Values of labels.
+            value (float): Observed value.
+        """
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [
+                    [0] * len(self.buckets), 0.0, 0
+                ]
+            for _i, _bound in enumerate(self.buckets):
+                if value <= _bound:
+                    series[0][_i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        """Render the histogram in Prometheus text format.
+
+        Returns:
+            list[str]: Lines of the exposition.
+        """
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(_labels_values, list(_counts), _sum, _count)
+                      for _labels_values, (_counts, _sum, _count)
+                      in series]
+        bucket_names = self.label_names + ("le", )
+        for _label_values, _counts, _sum, _count in series:
+            cumulative = 0
+            for _bound, _bucket_count in zip(self.buckets, _counts):
+                cumulative += _bucket_count
+                labels = _labels(bucket_names, _label_values + (_bound, ))
+                lines.append(f"{self.name}_bucket{{{labels}}} {cumulative}")
+            labels = _labels(bucket_names, _label_values + ("+Inf", ))
+            lines.append(f"{self.name}_bucket{{{labels}}} {_count}")
+            labels = _labels(self.label_names, _label_values)
+            lines.append(f"{self.name}_sum{{{labels}}} {_sum}")
+            lines.append(f"{self.name}_count{{{labels}}} {_count}")
+        return lines
+
+
+class RequestSQLStats:
+    """SQL statements executed while handling one request"""
+
+    def __init__(self):
+        self.statements: int = 0
+        self.duration: float = 0.0
+
+    def record(self, duration: float):
+        """Record one executed statement.
+
+        Args:
+            duration (float): Time of the execution (seconds).
+        """
+        self.statements += 1
+        self.duration += duration
+
+
+# Statistics of the request being handled (propagated to the thread
+# pool running synchronous routes)
+_request_sql: ContextVar[RequestSQLStats | None] = ContextVar(
+    "request_sql", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    """Remember when the statement started"""
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    """Add the statement to the statistics of the current request"""
+    stats = _request_sql.get()
+    if stats is not None and context is not None:
+        stats.record(time.perf_counter() - context._metrics_start)
+
+
+def instrument_engine(engine: 'Engine'):
+    """Count statements (and their time) executed by the engine for
+    the request being handled.
+
+    Args:
+        engine (Engine): Engine (for asynchronous engine, its
+            'sync_engine').
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ServiceMetrics:
+    """Metrics of the web service (per worker process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight: int = 0
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.duration = Histogram(
+            "letstalk_request_duration_seconds",
+            "Latency of requests by route template.",
+            ("method", "route"), LATENCY_BUCKETS
+        )
+        self.sql_statements = Histogram(
+            "letstalk_request_sql_statements",
+            "SQL statements executed per request by route template.",
+            ("method", "route"), STATEMENT_BUCKETS
+        )
+        self.sql_duration = Histogram(
+            "letstalk_request_sql_duration_seconds",
+            "Time spent executing SQL per request by route template.",
+            ("method", "route"), LATENCY_BUCKETS
+        )
+
+    def started(self):
+        """Record the start of the request"""
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self,
+                 method: str,
+                 route: str,
+                 status_code: int,
+                 duration: float,
+                 sql: RequestSQLStats):
+        """Record the finished request.
+
+        Args:
+            method (str): HTTP method.
+            route (str): Route template (e. g. '/api/doctor/{item_id}').
+            status_code (int): Status code of the response.
+            duration (float): Latency (seconds).
+            sql (RequestSQLStats): Statements executed by request.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            key = (method, route, status_code)
+            self.requests[key] = self.requests.get(key, 0) + 1
+        self.duration.observe((method, route), duration)
+        self.sql_statements.observe((method, route), sql.statements)
+        self.sql_duration.observe((method, route), sql.duration)
+
+    def render(self,
+               pools: dict[str, tuple['PoolCheckoutStats', 'Pool']],
+               admission: dict[str, dict[str, int | float]] | None = None
+               ) -> str:
+        """Render all metrics in Prometheus text format.
+
+        Args:
+            pools (dict[str, tuple[PoolCheckoutStats, Pool]]): Observed
+                connection pools (by name).
+            admission (dict[str, dict[str, int | float]] | None): State
+                of admission limits by class of request (if enabled).
+
+        Returns:
+            str: Exposition of metrics.
+        """
+        with self._lock:
+            in_flight = self.in_flight
+            requests = sorted(self.requests.items())
+        lines = [
+            "# HELP letstalk_requests_in_flight Requests being handled.",
+            "# TYPE letstalk_requests_in_flight gauge",
+            f"letstalk_requests_in_flight {in_flight}",
+            "# HELP letstalk_requests_total Finished requests.",
+            "# TYPE letstalk_requests_total counter",
+        ]
+        for _key, _count in requests:
+            labels = _labels(("method", "route", "status"), _key)
+            lines.append(f"letstalk_requests_total{{{labels}}} {_count}")
+        for _histogram in (self.duration, self.sql_statements,
+                           self.sql_duration):
+            lines.extend(_histogram.render())
+
+        # Connection pools
+        snapshots = {_name: _stats.snapshot(_pool)
+                     for _name, (_stats, _pool) in pools.items()}
+        for _metric, _key, _type, _description in (
+            ("letstalk_pool_checkouts_total", "checkouts", "counter",
+             "Connection checkouts."),
+            ("letstalk_pool_checkout_wait_seconds_total",
+             "wait_total_seconds", "counter",
+             "Time spent waiting for connection checkout."),
+            ("letstalk_pool_checkout_wait_max_seconds", "wait_max_seconds",
+             "gauge", "Longest wait for connection checkout."),
+            ("letstalk_pool_size", "size", "gauge", "Size of the pool."),
+            ("letstalk_pool_checked_out", "checkedout", "gauge",
+             "Connections in use."),
+            ("letstalk_pool_overflow", "overflow", "gauge",
+             "Overflow connections (negative if pool is not full)."),
+        ):
+            lines.append(f"# HELP {_metric} {_description}")
+            lines.append(f"# TYPE {_metric} {_type}")
+            for _name, _snapshot in snapshots.items():
+                if _key in _snapshot:
+                    labels = _labels(("pool", ), (_name, ))
+                    lines.append(
+                        f"{_metric}{{{labels}}} {_snapshot[_key]}"
+                    )
+
+        # Admission control (limits by class of request)
+        for _metric, _key, _type, _description in (
+            ("letstalk_admission_in_flight", "in_flight", "gauge",
+             "Admitted requests being handled."),
+            ("letstalk_admission_queued", "queued", "gauge",
+             "Requests waiting for admission."),
+            ("letstalk_admission_admitted_total", "admitted", "counter",
+             "Admitted requests."),
+            ("letstalk_admission_rejected_total", "rejected", "counter",
+             "Requests rejected by full queue."),
+            ("letstalk_admission_timed_out_total", "timed_out", "counter",
+             "Requests rejected after waiting too long."),
+        ):
+            lines.append(f"# HELP {_metric} {_description}")
+            lines.append(f"# TYPE {_metric} {_type}")
+            for _class, _stats in (admission or {}).items():
+                labels = _labels(("class", ), (_class, ))
+                lines.append(f"{_metric}{{{labels}}} {_stats[_key]}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware measuring requests (latency, in-flight requests,
+    SQL statements and time spent in the database per route template).
+    """
+
+    def __init__(self, app: Callable, metrics: ServiceMetrics):
+        """Create middleware.
+
+        Args:
+            app (Callable): Wrapped ASGI application.
+            metrics (ServiceMetrics): Collector of metrics.
+        """
+        self.app = app
+        self.metrics = metrics
+        self._templates: dict[Callable, str] | None = None
+
+    def _route_template(self, scope: dict) -> str:
+        """Return the template of the matched route (requests that did
+        not match any route share one label)."""
+        if self._templates is None:
+            self._templates = {
+                _route.endpoint: _route.path
+                for _route in scope["app"].routes
+                if hasattr(_route, "endpoint")
+            }
+        return self._templates.get(scope.get("endpoint"), "<unmatched>")
+
+    async def __call__(self, scope: dict, receive: Callable,
+                       send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        sql = RequestSQLStats()
+        token = _request_sql.set(sql)
+
+        async def _send(message: dict):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            self.metrics.finished(scope["method"],
+                                  self._route_template(scope),
+                                  status_code,
+                                  time.perf_counter() - start,
+                                  sql)
+            _request_sql.reset(token)
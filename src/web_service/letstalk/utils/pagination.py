@@ -0,0 +1,189 @@
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+
+if TYPE_CHECKING:
+    from fastapi import Response
+
+# Maximal number of items on one page
+MAX_PAGE_SIZE: int = 1000
+
+# Header carrying the cursor of the next page
+NEXT_CURSOR_HEADER: str = "X-Next-Cursor"
+# Range of keys decoded from cursors (primary keys are 'integer' columns)
+MIN_INTEGER_KEY: int = -2 ** 31
+MAX_INTEGER_KEY: int = 2 ** 31 - 1
+
+
+def encode_cursor(value: Any) -> str:
+    """Create opaque cursor from the value of the last key on page.
+
+    Args:
+        value (Any): Value of the key (JSON serializable).
+
+    Returns:
+        str: Opaque (URL safe) cursor.
+    """
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Read the value of the key from opaque cursor.
+
+    Args:
+        cursor (str): Cursor created by 'encode_cursor'.
+
+    Returns:
+        Any: Value of the key.
+
+    Raises:
+        ValueError: If cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("malformed cursor")
+
+
+def is_integer_key(value: Any) -> bool:
+    """Check that the value decoded from cursor is an integer key.
+
+    Args:
+        value (Any): Decoded value.
+
+    Returns:
+        bool: True if the value is an integer in the range of keys.
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and \
+        MIN_INTEGER_KEY <= value <= MAX_INTEGER_KEY
+
+
+def decode_after_cursor(
+        after: str | None,
+        is_valid: Callable[[Any], bool] = is_integer_key) -> Any:
+    """Decode the cursor from request parameter.
+
+    Args:
+        after (str | None): Cursor of the page (if None, first page).
+        is_valid (Callable[[Any], bool]): Check of the decoded value
+            (well-formed cursor can hold any JSON value), by default
+            the value must be an integer key.
+
+    Returns:
+        Any: Value of the key (None for the first page).
+
+    Raises:
+        HTTPException: If cursor is malformed or holds invalid value
+            (400 Bad Request).
+    """
+    if after is None:
+        return None
+    try:
+        value = decode_cursor(after)
+    except ValueError:
+        value = None
+    if value is None or not is_valid(value):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return value
+
+
+def trim_page(items: list[dict[str, Any]],
+              response: 'Response',
+              limit: int,
+              key: str = "id") -> list[dict[str, Any]]:
+    """Trim items fetched with one extra item to the page size and
+    write the cursor of the next page (if exists) to 'X-Next-Cursor'
+    header of the response.
+
+    Args:
+        items (list[dict[str, Any]]): Items (at most limit + 1).
+        response (Response): Response (for setting headers).
+        limit (int): Size of the page.
+        key (str): Name of the key used for pagination.
+
+    Returns:
+        list[dict[str, Any]]: Items on the page.
+    """
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            items[-1][key]
+        )
+    return items
+
+
+def _page_arguments(limit: int | None,
+                    after: str | None) -> tuple[int | None, Any]:
+    """Return arguments of the fetch of one page: limit (one extra item
+    to see whether next page exists) and decoded cursor"""
+    return (None if limit is None else limit + 1,
+            decode_after_cursor(after))
+
+
+def _finish_page(items: list[dict[str, Any]],
+                 response: 'Response',
+                 limit: int | None,
+                 key: str) -> list[dict[str, Any]]:
+    """Trim fetched items to the page (if paginated)"""
+    if limit is None:
+        return items
+    return trim_page(items, response, limit, key)
+
+
+def paginate(fetch: Callable[[int | None, Any], list[dict[str, Any]]],
+             response: 'Response',
+             limit: int | None,
+             after: str | None,
+             key: str = "id") -> list[dict[str, Any]]:
+    """Fetch one page of items using keyset pagination (opt-in).
+
+    If the next page exists, its cursor is written to the
+    'X-Next-Cursor' header of the response.
+
+    Args:
+        fetch (Callable): Function fetching items, accepting limit and
+            value of the key after which items are selected.
+        response (Response): Response (for setting headers).
+        limit (int | None): Size of the page (if None, everything
+            is returned).
+        after (str | None): Cursor of the page (if None, first page).
+        key (str): Name of the key used for pagination.
+
+    Returns:
+        list[dict[str, Any]]: Items on the page.
+    """
+    return _finish_page(fetch(*_page_arguments(limit, after)),
+                        response, limit, key)
+
+
+async def paginate_async(
+        fetch: Callable[[int | None, Any],
+                        Awaitable[list[dict[str, Any]]]],
+        response: 'Response',
+        limit: int | None,
+        after: str | None,
+        key: str = "id") -> list[dict[str, Any]]:
+    """Fetch one page of items by asynchronous fetch (see 'paginate').
+
+    Args:
+        fetch (Callable): Coroutine function fetching items, accepting
+            limit and value of the key after which items are selected.
+        response (Response): Response (for setting headers).
+        limit (int | None): Size of the page (if None, everything
+            is returned).
+        after (str | None): Cursor of the page (if None, first page).
+        key (str): Name of the key used for pagination.
+
+    Returns:
+        list[dict[str, Any]]: Items on the page.
+    """
+    return _finish_page(await fetch(*_page_arguments(limit, after)),
+                        response, limit, key)
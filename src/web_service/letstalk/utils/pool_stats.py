@@ -0,0 +1,72 @@
+from typing import Any
+import threading
+import time
+
+from sqlalchemy.pool import Pool
+
+
+class PoolCheckoutStats:
+    """Collects time spent waiting for a connection from the pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts: int = 0
+        self.wait_total: float = 0.0
+        self.wait_max: float = 0.0
+
+    def record(self, wait: float):
+        """Record one checkout.
+
+        Args:
+            wait (float): Time spent waiting for connection (seconds).
+        """
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self, pool: Pool) -> dict[str, Any]:
+        """Return current statistics together with the pool state.
+
+        Args:
+            pool (Pool): Observed connection pool.
+
+        Returns:
+            dict[str, Any]: Statistics of the pool.
+        """
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "wait_total_seconds": self.wait_total,
+                "wait_avg_seconds": (self.wait_total / self.checkouts
+                                     if self.checkouts else 0.0),
+                "wait_max_seconds": self.wait_max,
+            }
+        for _attr in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, _attr):
+                stats[_attr] = getattr(pool, _attr)()
+        return stats
+
+
+def create_timed_pool_class(pool_class: type[Pool],
+                            stats: PoolCheckoutStats) -> type[Pool]:
+    """Create pool class that measures how long each checkout
+    waits for a connection.
+
+    Args:
+        pool_class (type[Pool]): Pool class (e. g. QueuePool).
+        stats (PoolCheckoutStats): Collector of statistics.
+
+    Returns:
+        type[Pool]: Pool class recording checkout waits.
+    """
+    class _TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                stats.record(time.perf_counter() - start)
+
+    _TimedPool.__name__ = "Timed" + pool_class.__name__
+    return _TimedPool
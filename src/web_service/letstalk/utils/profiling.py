@@ -0,0 +1,385 @@
+from typing import TYPE_CHECKING, Any, Callable
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+
+from sqlalchemy import event
+
+try:
+    import greenlet
+except ImportError:  # Asynchronous engine is not used
+    greenlet = None
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, Engine
+
+LOGGER = logging.getLogger(__name__)
+
+# Header of the response with ID of the stored profile
+PROFILE_ID_HEADER: str = "X-Profile-Id"
+
+# Modules of model mixins (statements are attributed to their methods)
+_MODEL_MODULES: tuple[str, ...] = ("extended_model.py",
+                                   "async_extended_model.py")
+# Frames of the standard library where threads wait for work (samples
+# are skipped, see '_frame_name'), 'runners.py:run' is the idle event
+# loop implemented in C (uvloop)
+_IDLE_FRAMES: frozenset[str] = frozenset({
+    "threading.py:wait", "threading.py:_wait_for_tstate_lock",
+    "queue.py:get", "selectors.py:select", "socket.py:accept",
+    "base_events.py:run_forever", "base_events.py:run_until_complete",
+    "runners.py:run"
+})
+# Key of connection info set while the plan is being explained
+_EXPLAINING: str = "letstalk_explaining"
+# Deepest sampled stack (frames closest to the sampled point)
+MAX_STACK_DEPTH: int = 40
+# Stored statements are truncated to this length
+MAX_STATEMENT_LENGTH: int = 2000
+
+
+def _frame_name(frame) -> str:
+    """Return short name of the frame ('file.py:function')"""
+    return f"{os.path.basename(frame.f_code.co_filename)}:" \
+           f"{frame.f_code.co_name}"
+
+
+class StackSampler:
+    """Samples call stacks of all threads (but itself) in the fixed
+    interval (busy threads only, idle workers are skipped)."""
+
+    def __init__(self, interval: float):
+        """Create sampler.
+
+        Args:
+            interval (float): Seconds between samples.
+        """
+        self.interval = interval
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        """Take samples until stopped"""
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for _thread_id, _frame in sys._current_frames().items():
+                if _thread_id == own_id or \
+                        _frame_name(_frame) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while _frame is not None and \
+                        len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_name(_frame))
+                    _frame = _frame.f_back
+                # From the root to the sampled point
+                self.samples[tuple(reversed(stack))] += 1
+
+    def start(self):
+        """Start sampling"""
+        self._thread.start()
+
+    def stop(self) -> Counter[tuple[str, ...]]:
+        """Stop sampling.
+
+        Returns:
+            Counter[tuple[str, ...]]: Number of samples of each stack.
+        """
+        self._stopped.set()
+        self._thread.join()
+        return self.samples
+
+
+class RequestProfile:
+    """Profile of one request (SQL statements and sampled stacks)"""
+
+    def __init__(self, method: str, path: str, sample_interval: float):
+        """Create profile.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path of the request.
+            sample_interval (float): Seconds between stack samples.
+        """
+        self.id: str = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.sample_interval = sample_interval
+        self.status_code: int | None = None
+        self.duration: float = 0.0
+        self.statements: list[dict[str, Any]] = []
+        self.samples: Counter[tuple[str, ...]] = Counter()
+
+    def record_statement(self,
+                         statement: str,
+                         duration: float,
+                         caller: str | None,
+                         plan: list[str] | None = None):
+        """Record executed statement (parameters are not stored).
+
+        Args:
+            statement (str): SQL statement.
+            duration (float): Time of the execution (seconds).
+            caller (str | None): Method of the model executing it.
+            plan (list[str] | None): Plan of slow statement.
+        """
+        self.statements.append({
+            "statement": statement[:MAX_STATEMENT_LENGTH],
+            "duration_ms": duration * 1000,
+            "caller": caller,
+            "plan": plan,
+        })
+
+    def summary(self) -> dict[str, Any]:
+        """Return short description of the profile"""
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "duration_ms": self.duration * 1000,
+            "sql_statements": len(self.statements),
+        }
+
+    def to_dict(self, top: int = 30) -> dict[str, Any]:
+        """Return the whole profile.
+
+        Args:
+            top (int): Number of listed stacks and functions.
+
+        Returns:
+            dict[str, Any]: Time spent in SQL (per statement and per
+                model method) and sampled stacks (inclusive and self
+                samples of functions).
+        """
+        sql_duration = sum(_statement["duration_ms"]
+                           for _statement in self.statements)
+        by_caller: dict[str, dict[str, float]] = {}
+        for _statement in self.statements:
+            caller = by_caller.setdefault(
+                _statement["caller"] or "<other>",
+                {"statements": 0, "duration_ms": 0.0}
+            )
+            caller["statements"] += 1
+            caller["duration_ms"] += _statement["duration_ms"]
+
+        total, own = Counter(), Counter()
+        for _stack, _count in self.samples.items():
+            for _function in set(_stack):
+                total[_function] += _count
+            own[_stack[-1]] += _count
+        return self.summary() | {
+            "sql": {
+                "duration_ms": sql_duration,
+                "by_caller": by_caller,
+                "statements": self.statements,
+            },
+            "other_duration_ms": self.duration * 1000 - sql_duration,
+            "stack_samples": {
+                "interval_ms": self.sample_interval * 1000,
+                "count": sum(self.samples.values()),
+                "stacks": [
+                    {"stack": list(_stack), "samples": _count}
+                    for _stack, _count in self.samples.most_common(top)
+                ],
+                "functions_total": dict(total.most_common(top)),
+                "functions_self": dict(own.most_common(top)),
+            },
+        }
+
+
+class ProfileStore:
+    """The most recent profiles of the worker (oldest are dropped)"""
+
+    def __init__(self, size: int):
+        """Create store.
+
+        Args:
+            size (int): Maximal number of kept profiles.
+        """
+        self.size = size
+        self._lock = threading.Lock()
+        self._profiles: OrderedDict[str, RequestProfile] = OrderedDict()
+
+    def add(self, profile: RequestProfile):
+        """Store the profile"""
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        """Return the profile (None if unknown or already dropped)"""
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> list[dict[str, Any]]:
+        """Return short descriptions of stored profiles (newest first)"""
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [_profile.summary() for _profile in reversed(profiles)]
+
+
+# Profile of the request being handled (propagated to the thread pool
+# running synchronous routes)
+_request_profile: ContextVar[RequestProfile | None] = ContextVar(
+    "request_profile", default=None
+)
+
+
+def _model_caller() -> str | None:
+    """Return method of the model mixin executing the statement (e. g.
+    'Condition.filter')."""
+    frames = [sys._getframe(2)]
+    if greenlet is not None and greenlet.getcurrent().parent is not None:
+        # Asynchronous statement runs in greenlet, the coroutine of the
+        # model waits for it in the parent one
+        frames.append(greenlet.getcurrent().parent.gr_frame)
+    for _frame in frames:
+        while _frame is not None:
+            if _frame.f_code.co_filename.endswith(_MODEL_MODULES) and \
+                    "cls" in _frame.f_locals:
+                return f"{_frame.f_locals['cls'].__name__}." \
+                       f"{_frame.f_code.co_name}"
+            _frame = _frame.f_back
+    return None
+
+
+def _explain(conn: 'Connection',
+             statement: str,
+             parameters: Any) -> list[str]:
+    """Return plan of the statement executed on the connection.
+
+    Only SELECT statements are analyzed (executed once more), plans of
+    other statements are estimated. Explaining is isolated in a
+    savepoint, so the transaction is not affected if it fails.
+
+    Args:
+        conn (Connection): Connection executing the statement.
+        statement (str): SQL statement.
+        parameters (Any): Parameters of the statement.
+
+    Returns:
+        list[str]: Lines of the plan.
+    """
+    analyze = statement.lstrip().upper().startswith("SELECT")
+    conn.info[_EXPLAINING] = True
+    try:
+        conn.exec_driver_sql("SAVEPOINT letstalk_explain")
+        try:
+            plan = [_row[0] for _row in conn.exec_driver_sql(
+                f"EXPLAIN {'(ANALYZE) ' if analyze else ''}{statement}",
+                parameters
+            )]
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK TO SAVEPOINT letstalk_explain")
+            raise
+        conn.exec_driver_sql("RELEASE SAVEPOINT letstalk_explain")
+        return plan
+    finally:
+        conn.info[_EXPLAINING] = False
+
+
+def profile_engine(engine: 'Engine',
+                   slow_query_threshold_ms: float | None):
+    """Record statements executed by the engine to profiles of requests
+    and log slow statements (with their plans).
+
+    Args:
+        engine (Engine): Engine (for asynchronous engine, its
+            'sync_engine').
+        slow_query_threshold_ms (float | None): Statements running
+            longer are logged, None disables the log.
+    """
+    def _before_cursor_execute(conn, cursor, statement, parameters,
+                               context, executemany):
+        if context is not None:
+            context._profiling_start = time.perf_counter()
+
+    def _after_cursor_execute(conn, cursor, statement, parameters,
+                              context, executemany):
+        if context is None or conn.info.get(_EXPLAINING):
+            return
+        duration = time.perf_counter() - context._profiling_start
+        profile = _request_profile.get()
+
+        plan = None
+        if slow_query_threshold_ms is not None and not executemany and \
+                duration * 1000 >= slow_query_threshold_ms:
+            try:
+                plan = _explain(conn, statement, parameters)
+            except Exception as error:
+                LOGGER.warning("Slow query plan is not available: %s",
+                               error)
+            LOGGER.warning("Slow query (%.1f ms, %s):\n%s\n%s",
+                           duration * 1000, _model_caller(), statement,
+                           "\n".join(plan or []))
+        if profile is not None:
+            profile.record_statement(statement, duration, _model_caller(),
+                                     plan)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests carrying the profiling header
+    (profile is stored and its ID is returned in 'X-Profile-Id').
+
+    Stacks of all threads of the worker are sampled while the request
+    is handled, so profile requests on an otherwise idle worker.
+    """
+
+    def __init__(self,
+                 app: Callable,
+                 store: ProfileStore,
+                 header: str,
+                 sample_interval: float):
+        """Create middleware.
+
+        Args:
+            app (Callable): Wrapped ASGI application.
+            store (ProfileStore): Store of finished profiles.
+            header (str): Name of the header requesting the profile.
+            sample_interval (float): Seconds between stack samples.
+        """
+        self.app = app
+        self.store = store
+        self.header = header.lower().encode()
+        self.sample_interval = sample_interval
+
+    async def __call__(self, scope: dict, receive: Callable,
+                       send: Callable):
+        if scope["type"] != "http" or not any(
+            _name == self.header for _name, _value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"],
+                                 self.sample_interval)
+        token = _request_profile.set(profile)
+
+        async def _send(message: dict):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.lower().encode(), profile.id.encode())
+                ]
+            await send(message)
+
+        sampler = StackSampler(self.sample_interval)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            profile.duration = time.perf_counter() - start
+            profile.samples = sampler.stop()
+            _request_profile.reset(token)
+            self.store.add(profile)
@@ -0,0 +1,163 @@
+from typing import TYPE_CHECKING, Callable
+import itertools
+import logging
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import text
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+LOGGER = logging.getLogger(__name__)
+
+# Cookie pinning the client to the primary after it wrote something
+# (value is the expiration as UNIX timestamp)
+PRIMARY_PIN_COOKIE: str = "letstalk_primary"
+# Key of session info marking sessions of read replicas
+REPLICA_SESSION_INFO: str = "replica"
+# Methods that do not write anything
+SAFE_METHODS: frozenset[str] = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Replication lag of the replica (NULL on primary, which is not lagging)
+_LAG_STATEMENT = text(
+    "SELECT COALESCE(EXTRACT(EPOCH FROM "
+    "now() - pg_last_xact_replay_timestamp()), 0)"
+)
+
+
+class ReplicaSet:
+    """Read replicas chosen in round-robin, replicas failing the health
+    check (connection and replication lag) are skipped."""
+
+    def __init__(self,
+                 engines: list['Engine'],
+                 health_check_interval: float,
+                 max_lag: float):
+        """Create set of replicas (all are considered healthy until the
+        first check).
+
+        Args:
+            engines (list[Engine]): Synchronous engines of replicas
+                (used by health checks).
+            health_check_interval (float): Seconds between checks.
+            max_lag (float): Maximal replication lag (seconds) of
+                healthy replica.
+        """
+        self.engines = engines
+        self.health_check_interval = health_check_interval
+        self.max_lag = max_lag
+        self.healthy: list[bool] = [True] * len(engines)
+        self._counter = itertools.count()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def choose(self) -> int | None:
+        """Return index of the next healthy replica (None if there is
+        no healthy replica)."""
+        healthy = [_index for _index, _healthy in enumerate(self.healthy)
+                   if _healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def _problem(self, engine: 'Engine') -> str | None:
+        """Check that replica answers and is not lagging behind (return
+        description of the problem, None if healthy)"""
+        try:
+            with engine.connect() as connection:
+                lag = connection.execute(_LAG_STATEMENT).scalar_one()
+        except Exception as error:
+            return f"not available ({error})"
+        if lag > self.max_lag:
+            return f"lagging by {lag:.1f} s"
+        return None
+
+    def check(self):
+        """Check health of all replicas (changes are logged)"""
+        healthy = []
+        for _engine, _was_healthy in zip(self.engines, self.healthy):
+            problem = self._problem(_engine)
+            if problem is not None and _was_healthy:
+                LOGGER.warning("Read replica %s is %s", _engine.url.host,
+                               problem)
+            elif problem is None and not _was_healthy:
+                LOGGER.warning("Read replica %s is healthy again",
+                               _engine.url.host)
+            healthy.append(problem is None)
+        self.healthy = healthy
+
+    def _run(self):
+        """Check replicas until stopped"""
+        while True:
+            self.check()
+            if self._stopped.wait(self.health_check_interval):
+                break
+
+    def start(self):
+        """Start periodic health checks (in the background thread)"""
+        if self.engines and self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop periodic health checks"""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+
+def pinned_to_primary(request: Request) -> bool:
+    """Check if the client wrote something recently (and must read
+    from the primary to see its own writes).
+
+    Args:
+        request (Request): Request.
+
+    Returns:
+        bool: True if the request must be handled by the primary.
+    """
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0)) > \
+            time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning the client to the primary for a short
+    window after every successful write (by cookie)."""
+
+    def __init__(self, app: Callable, window: float):
+        """Create middleware.
+
+        Args:
+            app (Callable): Wrapped ASGI application.
+            window (float): Seconds after the write when the client
+                reads from the primary.
+        """
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: dict, receive: Callable,
+                       send: Callable):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def _send(message: dict):
+            if message["type"] == "http.response.start" and \
+                    message["status"] < 400:
+                cookie = (f"{PRIMARY_PIN_COOKIE}="
+                          f"{time.time() + self.window:.3f}; "
+                          f"Max-Age={int(self.window) + 1}; Path=/; "
+                          f"HttpOnly; SameSite=Lax")
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode())
+                ]
+            await send(message)
+
+        await self.app(scope, receive, _send)
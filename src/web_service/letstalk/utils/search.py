@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+# Text search configuration (language) of documents and queries
+SEARCH_CONFIG: str = "english"
+
+# Name of the generated column with the document of full-text search
+SEARCH_VECTOR_COLUMN: str = "search_vector"
+
+# Default number of search results on one page
+SEARCH_PAGE_SIZE: int = 50
+
+
+def search_vector_expression(weights: dict[str, str]) -> str:
+    """Create SQL expression of the document (weighted text columns).
+
+    Args:
+        weights (dict[str, str]): Weight ('A' to 'D') of each text
+            column (by the name of the column).
+
+    Returns:
+        str: Expression of type 'tsvector'.
+    """
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+        f"coalesce({_column}, '')), '{_weight}')"
+        for _column, _weight in weights.items()
+    )
+
+
+def create_search_vector_column(weights: dict[str, str]) -> Column:
+    """Create generated (stored) column with the document of full-text
+    search. Column is indexed by GIN index created by migrations and
+    must be excluded from mapped properties of the model (so it is
+    never selected nor serialized).
+
+    Args:
+        weights (dict[str, str]): Weight ('A' to 'D') of each text
+            column (by the name of the column).
+
+    Returns:
+        Column: Generated column.
+    """
+    return Column(SEARCH_VECTOR_COLUMN, TSVECTOR,
+                  Computed(search_vector_expression(weights),
+                           persisted=True))
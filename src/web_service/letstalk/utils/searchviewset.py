@@ -0,0 +1,104 @@
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from fastapi import Depends, Query, Request, Response
+from fastapi_utils.cbv import cbv
+from pydantic import create_model
+from sqlalchemy.orm import Session
+
+from .etag import check_etag
+from .filters import create_filter_dependency
+from .pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, \
+    decode_after_cursor, encode_cursor, is_integer_key
+from .search import SEARCH_PAGE_SIZE
+from .serialization import create_list_encoder, encoded_response
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter
+
+
+def _is_search_key(value: Any) -> bool:
+    """Check that the value decoded from cursor is a pair of rank and ID
+    of the last result"""
+    return isinstance(value, list) and len(value) == 2 and \
+        isinstance(value[0], (int, float)) and \
+        not isinstance(value[0], bool) and is_integer_key(value[1])
+
+
+def create_search_viewset(router: 'APIRouter',
+                          sqlalchemy_model: type,
+                          pydantic_model: type,
+                          session_dependency: Callable[
+                              ..., Iterator[Session]
+                          ],
+                          route_base: str,
+                          related_models: tuple[type, ...] = ()) -> type:
+    """Create a view set with full-text search of the model (model must
+    have generated column 'search_vector', see 'utils.search').
+
+    Results are ranked (best match first) and paginated by the cursor
+    of rank and ID, filters declared by the model ('list_filters') are
+    applied in the same statement.
+
+    Args:
+        router (APIRouter): Router where routes are registered.
+        sqlalchemy_model (type): Searched model.
+        pydantic_model (type): Serializer of the model.
+        session_dependency (Callable[..., Iterator[Session]]): Database
+            session (e. g. of read replica).
+        route_base (str): Path of the route.
+        related_models (tuple[type, ...]): Models read by filters (their
+            versions are part of the entity tag).
+
+    Returns:
+        type: View set.
+    """
+    result_model = create_model(
+        f"{pydantic_model.__name__}SearchResult",
+        __base__=pydantic_model,
+        rank=(float, ...)
+    )
+    encode_results = create_list_encoder(result_model)
+    # Query parameters filtering results
+    filter_dependency = create_filter_dependency(
+        sqlalchemy_model.list_filters
+    )
+
+    @cbv(router)
+    class _SearchViewSet:
+        """Full-text search of the model"""
+        db_session: Session = Depends(session_dependency)
+
+        @router.get(route_base, response_model=list[result_model])
+        def search_items(self,
+                         request: Request,
+                         response: Response,
+                         q: str = Query(..., min_length=1,
+                                        description="Searched text"),
+                         limit: int = Query(SEARCH_PAGE_SIZE, gt=0,
+                                            le=MAX_PAGE_SIZE),
+                         after: str | None = None,
+                         criteria: list = Depends(filter_dependency)):
+            """Search items by text (best match first, supports quoted
+            phrases, 'or' and '-' for excluded words). Cursor of the
+            next page is returned in 'X-Next-Cursor' header.
+            """
+            not_modified = check_etag(
+                request, response,
+                sqlalchemy_model.table_versions(self.db_session,
+                                                *related_models)
+            )
+            if not_modified is not None:
+                return not_modified
+            after_value = decode_after_cursor(after, _is_search_key)
+            items = sqlalchemy_model.search(
+                self.db_session, q, *criteria,
+                limit=limit + 1, after=after_value
+            )
+            if len(items) > limit:
+                items = items[:limit]
+                response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                    [items[-1]["rank"], items[-1]["id"]]
+                )
+            return encoded_response(items, encode_results, response)
+
+    return _SearchViewSet
@@ -0,0 +1,182 @@
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+import datetime
+import enum
+import functools
+import json
+
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+from .fields import nested_fields, top_fields
+
+if TYPE_CHECKING:
+    from pydantic.fields import ModelField
+
+try:
+    import orjson
+except ImportError:  # Standard library is used instead
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON natives (dict, list, str, int, float, bool, None)
+    as compact JSON.
+
+    Args:
+        content (Any): Content of the response.
+
+    Returns:
+        bytes: Encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"),
+                      ensure_ascii=False).encode()
+
+
+def _convert_temporal(value: Any) -> Any:
+    """Serialize date and time the same way as pydantic does"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _convert_enum(value: Any) -> Any:
+    """Serialize enumeration by its value"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _field_converter(
+        field: 'ModelField',
+        fields: frozenset[str] | None = None
+) -> Callable[[Any], Any] | None:
+    """Choose converter of the field value to the JSON native (None
+    if value is JSON native already).
+
+    Args:
+        field (ModelField): Field of the pydantic model.
+        fields (frozenset[str] | None): Requested fields of the item
+            (nested objects are projected to their fields).
+
+    Returns:
+        Callable[[Any], Any] | None: Converter of the value.
+    """
+    field_type = field.type_
+    if not isinstance(field_type, type):
+        return None
+    if issubclass(field_type, BaseModel):
+        convert = create_encoder(field_type,
+                                 nested_fields(fields, field.name))
+    elif issubclass(field_type, (datetime.date, datetime.time)):
+        convert = _convert_temporal
+    elif issubclass(field_type, enum.Enum):
+        convert = _convert_enum
+    else:
+        return None
+
+    if field.shape == SHAPE_SINGLETON:
+        return lambda _value: None if _value is None else convert(_value)
+    if field.shape == SHAPE_LIST:
+        return lambda _values: [convert(_v) for _v in _values]
+    raise TypeError(f"unsupported shape of the field '{field.name}'")
+
+
+@functools.lru_cache(maxsize=1024)
+def create_encoder(
+        pydantic_model: type[BaseModel],
+        fields: frozenset[str] | None = None
+) -> Callable[[dict[str, Any]], dict[str, Any]]:
+    """Create encoder of the item produced by 'ExtendedModelMixin'
+    into the JSON natives (without validation).
+
+    Item is projected to the fields of the serializer (the same keys
+    as 'pydantic_model(**item).dict(by_alias=True)' has), date, time
+    and enumerations are converted, nested serializers are applied
+    recursively. Encoders are created once per serializer (and
+    requested fields).
+
+    Args:
+        pydantic_model (type[BaseModel]): Serializer of the item.
+        fields (frozenset[str] | None): Requested fields (sparse
+            fieldset, see 'utils.fields'), all fields if None.
+
+    Returns:
+        Callable[[dict[str, Any]], dict[str, Any]]: Encoder.
+    """
+    names = None if fields is None else top_fields(fields)
+    encoded_fields = [
+        (_field.name, _field.alias, _field.default,
+         _field_converter(_field, fields))
+        for _field in pydantic_model.__fields__.values()
+        if names is None or _field.name in names
+    ]
+
+    def _encode(item: dict[str, Any]) -> dict[str, Any]:
+        encoded = {}
+        for _name, _alias, _default, _convert in encoded_fields:
+            _value = item.get(_name, _default)
+            encoded[_alias] = _value if _convert is None \
+                else _convert(_value)
+        return encoded
+    return _encode
+
+
+def create_list_encoder(
+        pydantic_model: type[BaseModel],
+        fields: frozenset[str] | None = None
+) -> Callable[[Iterable[dict[str, Any]]], list[dict[str, Any]]]:
+    """Create encoder of the list of items (see 'create_encoder').
+
+    Args:
+        pydantic_model (type[BaseModel]): Serializer of one item.
+        fields (frozenset[str] | None): Requested fields (all if None).
+
+    Returns:
+        Callable[[Iterable[dict[str, Any]]], list[dict[str, Any]]]:
+            Encoder.
+    """
+    encode = create_encoder(pydantic_model, fields)
+    return lambda _items: [encode(_item) for _item in _items]
+
+
+class EncodedJSONResponse(Response):
+    """JSON response of content that consists of JSON natives only"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def encoded_response(content: Any,
+                     encoder: Callable[[Any], Any],
+                     response: Response | None = None,
+                     status_code: int = 200) -> EncodedJSONResponse:
+    """Create JSON response skipping the validation by response model.
+
+    Data produced by 'ExtendedModelMixin' (trusted rows from database)
+    does not need to be validated again. Route keeps its
+    'response_model' (documentation), but returns the response
+    directly, so FastAPI does not validate and encode the content.
+
+    Args:
+        content (Any): Content of the response.
+        encoder (Callable[[Any], Any]): Encoder created by
+            'create_encoder' or 'create_list_encoder'.
+        response (Response | None): Response injected into route
+            (headers set on it are copied).
+        status_code (int): Status code of the response.
+
+    Returns:
+        EncodedJSONResponse: Response.
+    """
+    encoded = EncodedJSONResponse(encoder(content),
+                                  status_code=status_code)
+    if response is not None:
+        encoded.raw_headers.extend(
+            (_key, _value) for _key, _value in response.raw_headers
+            if _key not in (b"content-length", b"content-type")
+        )
+    return encoded
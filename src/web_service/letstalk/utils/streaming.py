@@ -0,0 +1,83 @@
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+
+from .serialization import create_encoder, dumps
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+# Media type of newline delimited JSON
+NDJSON_MEDIA_TYPE: str = "application/x-ndjson"
+# Media type of JSON arrays
+JSON_MEDIA_TYPE: str = "application/json"
+
+
+def _encode_chunks(items: Iterable[dict[str, Any]],
+                   pydantic_model: type['BaseModel'],
+                   ndjson: bool,
+                   chunk_size: int,
+                   fields: frozenset[str] | None) -> Iterator[bytes]:
+    """Serialize items incrementally (one chunk of rows at time).
+
+    Args:
+        items (Iterable[dict[str, Any]]): Serialized rows.
+        pydantic_model (type[BaseModel]): Serializer of one row.
+        ndjson (bool): If True, newline delimited JSON is produced,
+            JSON array otherwise.
+        chunk_size (int): Number of rows in one chunk.
+        fields (frozenset[str] | None): Requested fields (all if None).
+
+    Yields:
+        bytes: Encoded chunk of the response.
+    """
+    def _encode(_chunk: list[bytes], _first: bool) -> bytes:
+        if ndjson:
+            return b"\n".join(_chunk) + b"\n"
+        return (b"" if _first else b",") + b",".join(_chunk)
+
+    encode = create_encoder(pydantic_model, fields)
+
+    if not ndjson:
+        yield b"["
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(dumps(encode(item)))
+        if len(chunk) >= chunk_size:
+            yield _encode(chunk, first)
+            chunk = []
+            first = False
+    if chunk:
+        yield _encode(chunk, first)
+    if not ndjson:
+        yield b"]"
+
+
+def stream_response(items: Iterable[dict[str, Any]],
+                    pydantic_model: type['BaseModel'],
+                    ndjson: bool = False,
+                    chunk_size: int = 1000,
+                    headers: dict[str, str] | None = None,
+                    fields: frozenset[str] | None = None
+                    ) -> StreamingResponse:
+    """Create response streaming items as JSON array or NDJSON.
+
+    Args:
+        items (Iterable[dict[str, Any]]): Serialized rows (ideally
+            lazily fetched from the database).
+        pydantic_model (type[BaseModel]): Serializer of one row.
+        ndjson (bool): If True, newline delimited JSON is produced,
+            JSON array otherwise.
+        chunk_size (int): Number of rows encoded in one chunk.
+        headers (dict[str, str] | None): Additional headers.
+        fields (frozenset[str] | None): Requested fields (all if None).
+
+    Returns:
+        StreamingResponse: Streaming response.
+    """
+    return StreamingResponse(
+        _encode_chunks(items, pydantic_model, ndjson, chunk_size, fields),
+        media_type=NDJSON_MEDIA_TYPE if ndjson else JSON_MEDIA_TYPE,
+        headers=headers
+    )
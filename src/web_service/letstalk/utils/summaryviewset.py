@@ -0,0 +1,104 @@
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from fastapi import Depends, HTTPException, Query, Response, status
+from fastapi_utils.cbv import cbv
+from sqlalchemy.orm import Session
+
+from .filters import create_filter_dependency
+from .pagination import MAX_PAGE_SIZE, paginate
+from .serialization import create_encoder, create_list_encoder, \
+    encoded_response
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter
+
+
+def create_summary_viewset(router: 'APIRouter',
+                           sqlalchemy_model: type,
+                           pydantic_model: type,
+                           summarize: Callable[..., list[dict[str, Any]]],
+                           session_dependency: Callable[
+                               ..., Iterator[Session]
+                           ],
+                           route_base: str,
+                           summary_route: str,
+                           key: str) -> type:
+    """Create a view set with aggregates (summaries) of items computed
+    by the database (one statement for any number of items).
+
+    Summary of one item is available on '{route_base}/{item_id}/summary'
+    and summaries of many items (selected by 'id' parameters or by
+    filters declared by the model, paginated by 'limit' and 'after')
+    on 'summary_route'. Summaries are not conditional (ETag), as they
+    depend on the time (e. g. next appointment).
+
+    Args:
+        router (APIRouter): Router where routes are registered.
+        sqlalchemy_model (type): Summarized model.
+        pydantic_model (type): Serializer of one summary.
+        summarize (Callable[..., list[dict[str, Any]]]): Function
+            selecting summaries, accepting database session, SQL
+            conditions on the model, 'limit' and 'after' (ID).
+        session_dependency (Callable[..., Iterator[Session]]): Database
+            session (e. g. of read replica).
+        route_base (str): Path of routes of the model.
+        summary_route (str): Path of the route with many summaries.
+        key (str): Key of the ID of the item in the summary.
+
+    Returns:
+        type: View set.
+    """
+    encode_item = create_encoder(pydantic_model)
+    encode_items = create_list_encoder(pydantic_model)
+    # Query parameters selecting summarized items
+    filter_dependency = create_filter_dependency(
+        sqlalchemy_model.list_filters
+    )
+
+    @cbv(router)
+    class _SummaryViewSet:
+        """Aggregates of items"""
+        db_session: Session = Depends(session_dependency)
+
+        @router.get(summary_route, response_model=list[pydantic_model])
+        def list_summaries(self,
+                           response: Response,
+                           item_ids: list[int] | None = Query(
+                               None, alias="id",
+                               description="Only items with these IDs"
+                           ),
+                           limit: int | None = Query(None, gt=0,
+                                                     le=MAX_PAGE_SIZE),
+                           after: str | None = None,
+                           criteria: list = Depends(filter_dependency)):
+            """Summaries of many items (optionally filtered and
+            paginated using 'limit' and 'after' cursor)"""
+            if item_ids is not None:
+                if len(item_ids) > MAX_PAGE_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"At most {MAX_PAGE_SIZE} items allowed"
+                    )
+                criteria = criteria + [sqlalchemy_model.id.in_(item_ids)]
+            items = paginate(
+                lambda _limit, _after: summarize(
+                    self.db_session, *criteria, limit=_limit, after=_after
+                ),
+                response, limit, after, key
+            )
+            return encoded_response(items, encode_items, response)
+
+        @router.get(route_base + "/{item_id}/summary",
+                    response_model=pydantic_model)
+        def detail_summary(self, item_id: int):
+            """Summary of the item"""
+            items = summarize(self.db_session,
+                              sqlalchemy_model.id == item_id)
+            if not items:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Item not found"
+                )
+            return encoded_response(items[0], encode_item)
+
+    return _SummaryViewSet
@@ -0,0 +1,32 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import BigInteger, Column, String, Table
+
+if TYPE_CHECKING:
+    from sqlalchemy import MetaData
+
+# Name of the table with changes (versions) of other tables
+VERSION_TABLE_NAME: str = "table_version"
+
+
+def create_version_table(metadata: 'MetaData') -> Table:
+    """Create the table holding changes of each tracked table.
+
+    Statement level triggers (created by migrations) append a change on
+    every statement modifying the tracked table (including cascades) and
+    merge changes of the table now and then. Version of the table is the
+    sum of its changes (0 if there is none), it is incremented by every
+    committed write, while writers never lock a shared row.
+
+    Args:
+        metadata (MetaData): Metadata of the database.
+
+    Returns:
+        Table: Table with changes.
+    """
+    return Table(
+        VERSION_TABLE_NAME, metadata,
+        Column("id", BigInteger, primary_key=True),
+        Column("table_name", String, nullable=False),
+        Column("changes", BigInteger, nullable=False)
+    )
@@ -0,0 +1,16 @@
+import datetime
+
+
+def naive_utc(value: datetime.datetime) -> datetime.datetime:
+    """Convert time to naive UTC (times are stored without time zone,
+    naive times are kept as they are).
+
+    Args:
+        value (datetime.datetime): Naive or timezone-aware time.
+
+    Returns:
+        datetime.datetime: Naive time.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
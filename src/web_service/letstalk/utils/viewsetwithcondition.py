@@ -1,25 +1,48 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Iterator
 
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, Response, \
+    status
 from fastapi_utils.cbv import cbv
+from sqlalchemy.orm import Session
 
+from .etag import check_etag
+from .fields import create_fields_dependency, nested_fields, top_fields
+from .filters import create_filter_dependency
+from .pagination import MAX_PAGE_SIZE, paginate
+from .serialization import create_encoder, create_list_encoder, \
+    encoded_response
 
 from .genericviewset import create_generic_viewset
 from ..models import Condition
 
+if TYPE_CHECKING:
+    from fastapi import APIRouter
+
 
 def viewset_with_condition_detail(
-        router: 'InferringRouter',
+        router: 'APIRouter',
         sqlalchemy_model: type,
         pydantic_model: type,
         pydantic_modify_model: type,
         pydantic_nested_model: type,
-        db_session: object,
-        route_base: str) -> type:
-    """Special viewset that returns details of condition
+        session_dependency: Callable[[], Iterator[Session]],
+        route_base: str,
+        read_session_dependency: Callable[
+            ..., Iterator[Session]
+        ] | None = None) -> type:
+    """Special viewset that returns details of condition (reading
+    routes use 'read_session_dependency', see 'create_generic_viewset')
     Note:
         Would be better to use meta classes for this purpose.
     """
+    # Encoders of responses
+    encode_nested_item = create_encoder(pydantic_nested_model)
+    # Query parameters filtering the list
+    filter_dependency = create_filter_dependency(
+        sqlalchemy_model.list_filters
+    )
+    # Query parameter with sparse fieldset (including 'condition.*')
+    fields_dependency = create_fields_dependency(pydantic_nested_model)
 
     @cbv(router)
     class _SpecialAPIViewSet(
@@ -27,25 +50,59 @@ def viewset_with_condition_detail(
                                sqlalchemy_model,
                                pydantic_model,
                                pydantic_modify_model,
-                               db_session,
-                               route_base)
+                               session_dependency,
+                               route_base,
+                               read_session_dependency)
     ):
         @router.get(
             route_base + "-with-condition",
             response_model=list[pydantic_nested_model]
         )
-        def list_item_with_condition(self):
+        def list_item_with_condition(
+                self,
+                request: Request,
+                response: Response,
+                limit: int | None = Query(None, gt=0,
+                                          le=MAX_PAGE_SIZE),
+                after: str | None = None,
+                criteria: list = Depends(filter_dependency),
+                fields: frozenset[str] | None = Depends(fields_dependency)
+        ):
             """List all items in the database and return a list of
             nested structures with condition as a nested field
+            (optionally filtered and paginated using 'limit' and 'after'
+            cursor, restricted to 'fields', condition is not joined if
+            none of its fields is requested)
             """
-            # TODO: This should be rewritten using JOIN statement
-            list_of_items = sqlalchemy_model.all(db_session)
-            for item in list_of_items:
-                condition_id = item.pop('condition_id')
-                condition = Condition.get(db_session,
-                                          id=condition_id)
-                item['condition'] = condition
-            return list_of_items
+            not_modified = check_etag(
+                request, response,
+                sqlalchemy_model.table_versions(self.read_db_session,
+                                                Condition)
+            )
+            if not_modified is not None:
+                return not_modified
+            if fields is not None and "condition" not in top_fields(fields):
+                items = paginate(
+                    lambda _limit, _after: sqlalchemy_model.filter(
+                        self.read_db_session, *criteria, limit=_limit,
+                        after=_after, fields=fields
+                    ),
+                    response, limit, after
+                )
+            else:
+                items = paginate(
+                    lambda _limit, _after: sqlalchemy_model.all_with_related(
+                        self.read_db_session, Condition, 'condition_id',
+                        'condition', limit=_limit, after=_after,
+                        criteria=criteria, fields=fields,
+                        related_fields=nested_fields(fields, 'condition')
+                    ),
+                    response, limit, after
+                )
+            return encoded_response(
+                items, create_list_encoder(pydantic_nested_model, fields),
+                response
+            )
 
         @router.post(route_base + "-with-condition",
                      response_model=pydantic_nested_model,
@@ -58,16 +115,17 @@ def viewset_with_condition_detail(
             nested structure with condition as a nested field
             """
             new_item = sqlalchemy_model(**item.dict()).create(
-                db_session
+                self.db_session
             )
             # Populate condition ID
             condition_id = new_item.pop('condition_id')
             # Create condition dict
-            condition = Condition.get(db_session,
+            condition = Condition.get(self.db_session,
                                       id=condition_id)
             new_item['condition'] = condition
 
-            return new_item
+            return encoded_response(new_item, encode_nested_item,
+                                    status_code=status.HTTP_201_CREATED)
 
         @router.put(route_base + "-with-condition",
                     response_model=pydantic_nested_model,
@@ -81,7 +139,7 @@ def viewset_with_condition_detail(
             """
             request = item.dict()
             resp_body, count = sqlalchemy_model.update(
-                db_session, {"id": request['id']}, request
+                self.db_session, {"id": request['id']}, request
             )
             if count != 1:
                 # In the case of wrong ID
@@ -91,9 +149,9 @@ def viewset_with_condition_detail(
             # Populate condition ID
             condition_id = resp_body.pop('condition_id')
             # Create condition dict
-            condition = Condition.get(db_session,
+            condition = Condition.get(self.db_session,
                                       id=condition_id)
             resp_body['condition'] = condition
-            return resp_body
+            return encoded_response(resp_body, encode_nested_item)
 
     return _SpecialAPIViewSet
@@ -0,0 +1,41 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from letstalk.database import SQLALCHEMY_DATABASE_URL
+from letstalk.models import Base
+
+# Logging configured in 'alembic.ini'
+if context.config.config_file_name is not None:
+    fileConfig(context.config.config_file_name)
+
+# Metadata of models (for 'alembic revision --autogenerate')
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Generate SQL script instead of running migrations
+    ('alembic upgrade head --sql')"""
+    context.configure(url=SQLALCHEMY_DATABASE_URL,
+                      target_metadata=target_metadata,
+                      literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations against the database of the stack"""
+    # Dedicated engine (without the pool of the web service)
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    with engine.connect() as connection:
+        context.configure(connection=connection,
+                          target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,165 @@
+"""Initial schema (models, filter indexes and table versions)
+
+Databases created before migrations were introduced (by 'create_all'
+on import) already contain some of the objects, these are skipped.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Revision identifiers (used by Alembic)
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tables of models (tracked by version triggers)
+MODEL_TABLES = ("doctor", "condition", "concern", "expectation",
+                "appointment")
+
+# Indexes of list filters (name, table, columns)
+INDEXES = (
+    ("ix_condition_doctor_id", "condition", ("doctor_id", )),
+    ("ix_concern_condition_id_level", "concern",
+     ("condition_id", "level")),
+    ("ix_expectation_condition_id", "expectation", ("condition_id", )),
+    ("ix_appointment_condition_id_date_and_time", "appointment",
+     ("condition_id", "date_and_time")),
+    ("ix_appointment_date_and_time", "appointment", ("date_and_time", )),
+)
+# Changes of a table are merged once per this many writes (on average)
+MERGE_EVERY = 32
+
+
+def _create_table(name: str, *columns: sa.Column):
+    """Create table unless it exists already"""
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def _condition_id() -> sa.Column:
+    """Foreign key to condition"""
+    return sa.Column("condition_id", sa.Integer,
+                     sa.ForeignKey("condition.id", ondelete="CASCADE"),
+                     nullable=False)
+
+
+def upgrade():
+    # Tables of models
+    _create_table(
+        "doctor",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("specialism", sa.String, nullable=False)
+    )
+    _create_table(
+        "condition",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("duration", sa.String, nullable=False),
+        sa.Column("details", sa.String),
+        sa.Column("doctor_id", sa.Integer,
+                  sa.ForeignKey("doctor.id", ondelete="CASCADE"),
+                  nullable=False)
+    )
+    _create_table(
+        "concern",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("creator", postgresql.ENUM("patient", "doctor",
+                                             name="concerncreatorenum"),
+                  nullable=False),
+        sa.Column("details", sa.String),
+        sa.Column("symptoms", sa.String, nullable=False),
+        sa.Column("level", sa.Integer, nullable=False),
+        _condition_id()
+    )
+    _create_table(
+        "expectation",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("details", sa.String),
+        _condition_id()
+    )
+    _create_table(
+        "appointment",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("details", sa.String),
+        sa.Column("date_and_time", sa.DateTime, nullable=False),
+        _condition_id()
+    )
+
+    # Indexes of list filters
+    for _name, _table, _columns in INDEXES:
+        op.execute(f'CREATE INDEX IF NOT EXISTS {_name} '
+                   f'ON "{_table}" ({", ".join(_columns)})')
+
+    # Changes of tables (version of the table is the sum of changes)
+    inspector = sa.inspect(op.get_bind())
+    legacy_versions = inspector.has_table("table_version") and "changes" \
+        not in {_column["name"]
+                for _column in inspector.get_columns("table_version")}
+    if legacy_versions:
+        # Single row per table created by 'create_all' (versions are
+        # kept, so entity tags issued before never match again)
+        op.rename_table("table_version", "table_version_legacy")
+    _create_table(
+        "table_version",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("table_name", sa.String, nullable=False),
+        sa.Column("changes", sa.BigInteger, nullable=False)
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_table_version_table_name "
+               "ON table_version (table_name, changes)")
+    if legacy_versions:
+        op.execute("INSERT INTO table_version (table_name, changes) "
+                   "SELECT table_name, version FROM table_version_legacy")
+        op.drop_table("table_version_legacy")
+    # Every modifying statement appends its change, so writers never
+    # wait for each other (or deadlock on rows of versions). Now and then
+    # the writer merges changes of the table into one row (keeping the
+    # sum), merging writers of the same table skip it.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION bump_table_version()
+        RETURNS trigger AS $$
+        BEGIN
+            IF random() * {MERGE_EVERY} < 1
+                    AND current_setting('transaction_isolation')
+                        = 'read committed'
+                    AND pg_try_advisory_xact_lock(
+                        hashtext('table_version'), hashtext(TG_TABLE_NAME)
+                    ) THEN
+                WITH merged AS (
+                    DELETE FROM table_version
+                    WHERE table_name = TG_TABLE_NAME
+                    RETURNING changes
+                )
+                INSERT INTO table_version (table_name, changes)
+                SELECT TG_TABLE_NAME, COALESCE(sum(changes), 0) + 1
+                FROM merged;
+            ELSE
+                INSERT INTO table_version (table_name, changes)
+                VALUES (TG_TABLE_NAME, 1);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for _table in MODEL_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {_table}_bump_version '
+                   f'ON "{_table}"')
+        op.execute(f'CREATE TRIGGER {_table}_bump_version '
+                   f'AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE '
+                   f'ON "{_table}" FOR EACH STATEMENT '
+                   f'EXECUTE PROCEDURE bump_table_version()')
+
+
+def downgrade():
+    op.drop_table("table_version")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version() CASCADE")
+    for _table in reversed(MODEL_TABLES):
+        op.drop_table(_table)
+    op.execute("DROP TYPE IF EXISTS concerncreatorenum")
@@ -0,0 +1,51 @@
+"""Full-text search (generated documents and their GIN indexes)
+
+Adding a stored generated column rewrites the table, indexes are
+created concurrently (writes are not blocked while they are built).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 18:00:00
+"""
+from alembic import op
+
+# Revision identifiers (used by Alembic)
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Weighted text columns of searched tables
+DOCUMENTS = {
+    "condition": {"name": "A", "details": "B"},
+    "concern": {"symptoms": "A", "details": "B"},
+    "expectation": {"name": "A", "details": "B"},
+}
+
+
+def _document(weights: dict[str, str]) -> str:
+    """Expression of the document (see 'utils.search')"""
+    return " || ".join(
+        f"setweight(to_tsvector('english', coalesce({_column}, '')), "
+        f"'{_weight}')"
+        for _column, _weight in weights.items()
+    )
+
+
+def upgrade():
+    for _table, _weights in DOCUMENTS.items():
+        op.execute(f'ALTER TABLE "{_table}" ADD COLUMN IF NOT EXISTS '
+                   f'search_vector tsvector GENERATED ALWAYS AS '
+                   f'({_document(_weights)}) STORED')
+    with op.get_context().autocommit_block():
+        for _table in DOCUMENTS:
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                       f'ix_{_table}_search_vector '
+                       f'ON "{_table}" USING gin (search_vector)')
+
+
+def downgrade():
+    for _table in DOCUMENTS:
+        op.execute(f'DROP INDEX IF EXISTS ix_{_table}_search_vector')
+        op.execute(f'ALTER TABLE "{_table}" DROP COLUMN IF EXISTS '
+                   f'search_vector')
@@ -0,0 +1,210 @@
+"""Summary of conditions (counts maintained by triggers)
+
+Statement level triggers of tables referencing conditions add the
+numbers of rows entering and leaving each condition (read from
+transition tables) to its summary, so bulk writes and cascades update
+each condition once and no rows are counted. The highest concern level
+is selected again (index scan of the condition) only if a concern with
+the highest level is deleted, lowered or moved. Summaries of new
+conditions and of truncated tables are recomputed.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 20:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers (used by Alembic)
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Columns of summaries by tables aggregated by them (all reference
+# condition): column with the number of rows and aggregated level
+# (empty if the table has no level)
+SUMMARIZED_TABLES = {
+    "concern": ("concern_count", "level"),
+    "expectation": ("expectation_count", ""),
+    "appointment": ("appointment_count", ""),
+}
+
+
+def upgrade():
+    op.create_table(
+        "condition_summary",
+        sa.Column("condition_id", sa.Integer,
+                  sa.ForeignKey("condition.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("concern_count", sa.Integer, nullable=False),
+        sa.Column("max_concern_level", sa.Integer),
+        sa.Column("expectation_count", sa.Integer, nullable=False),
+        sa.Column("appointment_count", sa.Integer, nullable=False)
+    )
+    # Rows of summaries being refreshed are locked first, so concurrent
+    # refreshes of one condition are serialized and the next statement
+    # (with a new snapshot) counts rows committed in the meantime
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_condition_summaries(
+            condition_ids integer[]
+        ) RETURNS void AS $$
+        BEGIN
+            PERFORM 1 FROM condition_summary
+            WHERE condition_id = ANY(condition_ids)
+            ORDER BY condition_id FOR UPDATE;
+
+            INSERT INTO condition_summary (
+                condition_id, concern_count, max_concern_level,
+                expectation_count, appointment_count
+            )
+            SELECT c.id,
+                (SELECT count(*) FROM concern WHERE condition_id = c.id),
+                (SELECT max(level) FROM concern WHERE condition_id = c.id),
+                (SELECT count(*) FROM expectation
+                 WHERE condition_id = c.id),
+                (SELECT count(*) FROM appointment
+                 WHERE condition_id = c.id)
+            FROM condition AS c
+            WHERE c.id = ANY(condition_ids)
+            ON CONFLICT (condition_id) DO UPDATE SET
+                concern_count = EXCLUDED.concern_count,
+                max_concern_level = EXCLUDED.max_concern_level,
+                expectation_count = EXCLUDED.expectation_count,
+                appointment_count = EXCLUDED.appointment_count;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Summaries of new conditions and of all conditions if the table is
+    # truncated (the only argument is the column with ID of condition)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_condition_summaries_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            condition_ids integer[];
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                condition_ids := ARRAY(SELECT id FROM condition);
+            ELSE
+                EXECUTE format('SELECT array_agg(DISTINCT %I) '
+                               'FROM new_rows', TG_ARGV[0])
+                INTO condition_ids;
+            END IF;
+            PERFORM refresh_condition_summaries(condition_ids);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Numbers of rows entering (+1) and leaving (-1) conditions are
+    # added to summaries, arguments are the column with the number of
+    # rows and the column with the level (empty if none). Rows of
+    # summaries are locked first (in order, so concurrent writes do not
+    # deadlock), so the highest level selected by the next statement
+    # (with a new snapshot) includes rows committed in the meantime
+    op.execute("""
+        CREATE OR REPLACE FUNCTION apply_condition_summary_deltas()
+        RETURNS trigger AS $$
+        DECLARE
+            old_level text := 'NULL::integer';
+            new_level text := 'NULL::integer';
+            changes text;
+            condition_ids integer[];
+        BEGIN
+            IF TG_ARGV[1] <> '' THEN
+                old_level := 'o.' || quote_ident(TG_ARGV[1]);
+                new_level := 'n.' || quote_ident(TG_ARGV[1]);
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                changes := format('SELECT n.condition_id, 1 AS delta, '
+                                  '%s AS level FROM new_rows AS n',
+                                  new_level);
+            ELSIF TG_OP = 'DELETE' THEN
+                changes := format('SELECT o.condition_id, -1 AS delta, '
+                                  '%s AS level FROM old_rows AS o',
+                                  old_level);
+            ELSE
+                -- Only rows moved to another condition or level
+                changes := format(
+                    'SELECT unnest(ARRAY[o.condition_id, n.condition_id]) '
+                    'AS condition_id, unnest(ARRAY[-1, 1]) AS delta, '
+                    'unnest(ARRAY[%1$s, %2$s]) AS level '
+                    'FROM old_rows AS o JOIN new_rows AS n USING (id) '
+                    'WHERE (o.condition_id, %1$s) IS DISTINCT FROM '
+                    '(n.condition_id, %2$s)',
+                    old_level, new_level
+                );
+            END IF;
+
+            EXECUTE format('SELECT array_agg(DISTINCT condition_id) '
+                           'FROM (%s) AS changes', changes)
+            INTO condition_ids;
+            IF condition_ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+            PERFORM 1 FROM condition_summary
+            WHERE condition_id = ANY(condition_ids)
+            ORDER BY condition_id FOR UPDATE;
+
+            EXECUTE format(
+                'UPDATE condition_summary AS s SET '
+                '%1$I = s.%1$I + d.delta, '
+                'max_concern_level = CASE '
+                'WHEN d.removed_level >= s.max_concern_level THEN ('
+                'SELECT max(level) FROM concern '
+                'WHERE condition_id = s.condition_id) '
+                'ELSE greatest(s.max_concern_level, d.added_level) END '
+                'FROM (SELECT condition_id, sum(delta) AS delta, '
+                'max(level) FILTER (WHERE delta > 0) AS added_level, '
+                'max(level) FILTER (WHERE delta < 0) AS removed_level '
+                'FROM (%2$s) AS changes GROUP BY condition_id) AS d '
+                'WHERE s.condition_id = d.condition_id',
+                TG_ARGV[0], changes
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # New conditions start with empty summary (deleted by cascade)
+    op.execute("CREATE TRIGGER condition_insert_summary "
+               "AFTER INSERT ON condition "
+               "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT "
+               "EXECUTE PROCEDURE refresh_condition_summaries_trigger('id')")
+    # Transition tables are allowed only in triggers of a single event
+    for _table, (_count, _level) in SUMMARIZED_TABLES.items():
+        for _event, _referencing in (
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ):
+            op.execute(f'CREATE TRIGGER {_table}_{_event.lower()}_summary '
+                       f'AFTER {_event} ON "{_table}" '
+                       f'REFERENCING {_referencing} FOR EACH STATEMENT '
+                       f'EXECUTE PROCEDURE '
+                       f"apply_condition_summary_deltas('{_count}', "
+                       f"'{_level}')")
+        op.execute(f'CREATE TRIGGER {_table}_truncate_summary '
+                   f'AFTER TRUNCATE ON "{_table}" FOR EACH STATEMENT '
+                   f'EXECUTE PROCEDURE '
+                   f"refresh_condition_summaries_trigger('condition_id')")
+
+    # Summaries of existing conditions
+    op.execute("SELECT refresh_condition_summaries("
+               "ARRAY(SELECT id FROM condition))")
+
+
+def downgrade():
+    for _table in SUMMARIZED_TABLES:
+        for _event in ("insert", "update", "delete", "truncate"):
+            op.execute(f'DROP TRIGGER IF EXISTS {_table}_{_event}_summary '
+                       f'ON "{_table}"')
+    op.execute("DROP TRIGGER IF EXISTS condition_insert_summary "
+               "ON condition")
+    op.execute("DROP FUNCTION IF EXISTS "
+               "apply_condition_summary_deltas()")
+    op.execute("DROP FUNCTION IF EXISTS "
+               "refresh_condition_summaries_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS "
+               "refresh_condition_summaries(integer[])")
+    op.drop_table("condition_summary")
@@ -0,0 +1,84 @@
+"""Change notifications (NOTIFY on every write into tables of models)
+
+Statement level triggers send one notification per written row (read
+from transition tables) to the channel 'letstalk_changes' (see
+'utils.changes'). Notifications are delivered on commit only.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:00:00
+"""
+from alembic import op
+
+# Revision identifiers (used by Alembic)
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# Channel of notifications
+CHANNEL = "letstalk_changes"
+
+# Expressions of IDs of the condition and the doctor of the written row
+# (aliased 'r') of each table of models
+CHANGE_KEYS = {
+    "doctor": ("NULL", "r.id"),
+    "condition": ("r.id", "r.doctor_id"),
+    "concern": ("r.condition_id", "(SELECT c.doctor_id FROM condition "
+                                  "AS c WHERE c.id = r.condition_id)"),
+    "expectation": ("r.condition_id", "(SELECT c.doctor_id FROM condition "
+                                      "AS c WHERE c.id = r.condition_id)"),
+    "appointment": ("r.condition_id", "(SELECT c.doctor_id FROM condition "
+                                      "AS c WHERE c.id = r.condition_id)"),
+}
+# Transition tables are allowed only in triggers of a single event
+EVENTS = (
+    ("INSERT", "NEW TABLE AS new_rows"),
+    ("UPDATE", "NEW TABLE AS new_rows"),
+    ("DELETE", "OLD TABLE AS old_rows"),
+)
+
+
+def upgrade():
+    # Arguments are expressions of IDs of the condition and the doctor
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_changes()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('{CHANNEL}', json_build_object(
+                    'model', TG_TABLE_NAME, 'operation', 'truncate'
+                )::text);
+                RETURN NULL;
+            END IF;
+            EXECUTE format(
+                'SELECT count(pg_notify(%L, json_build_object('
+                '''model'', %L, ''operation'', %L, ''id'', r.id, '
+                '''condition_id'', %s, ''doctor_id'', %s)::text)) '
+                'FROM %I AS r',
+                '{CHANNEL}', TG_TABLE_NAME, lower(TG_OP),
+                TG_ARGV[0], TG_ARGV[1],
+                CASE TG_OP WHEN 'DELETE' THEN 'old_rows' ELSE 'new_rows' END
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for _table, (_condition_id, _doctor_id) in CHANGE_KEYS.items():
+        arguments = f"'{_condition_id}', '{_doctor_id}'"
+        for _event, _referencing in EVENTS:
+            op.execute(f'CREATE TRIGGER {_table}_{_event.lower()}_notify '
+                       f'AFTER {_event} ON "{_table}" '
+                       f'REFERENCING {_referencing} FOR EACH STATEMENT '
+                       f'EXECUTE PROCEDURE notify_changes({arguments})')
+        op.execute(f'CREATE TRIGGER {_table}_truncate_notify '
+                   f'AFTER TRUNCATE ON "{_table}" FOR EACH STATEMENT '
+                   f'EXECUTE PROCEDURE notify_changes({arguments})')
+
+
+def downgrade():
+    for _table in CHANGE_KEYS:
+        for _event in ("insert", "update", "delete", "truncate"):
+            op.execute(f'DROP TRIGGER IF EXISTS {_table}_{_event}_notify '
+                       f'ON "{_table}"')
+    op.execute("DROP FUNCTION IF EXISTS notify_changes()")
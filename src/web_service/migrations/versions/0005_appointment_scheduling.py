@@ -0,0 +1,174 @@
+"""Scheduling of appointments (durations, doctors and no overlaps)
+
+Appointments get a duration and a copy of the doctor of their condition
+(maintained by triggers), so the exclusion constraint rejects
+overlapping appointments of a doctor and the index of doctors and times
+answers availability of doctors by range scans (see 'scheduling').
+
+The doctor is compared as a range ('int4range'), operator classes of
+ranges are built in, so the 'btree_gist' extension is not required.
+Overlapping appointments stored before are shortened to the start of
+the next appointment of the doctor, so the constraint is added without
+removing any data. Double bookings (appointments of the doctor starting
+within a minute) can not be shortened, the migration fails listing them
+(reschedule or delete them first).
+
+Change notifications of appointments (see '0004') read the doctor from
+the appointment, so deletions cascaded from the condition (or the
+doctor) still carry the doctor.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers (used by Alembic)
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# Exclusion constraint (see 'scheduling.OVERLAP_CONSTRAINT')
+CONSTRAINT = "appointment_doctor_period_excl"
+# Longest appointment (see 'scheduling.MAX_APPOINTMENT_MINUTES')
+MAX_MINUTES = 24 * 60
+# Number of double bookings listed if the migration fails
+REPORTED_CONFLICTS = 20
+# Expressions compared by the constraint
+DOCTOR_KEY = "int4range(doctor_id, doctor_id, '[]')"
+PERIOD = ("tsrange(date_and_time, "
+          "date_and_time + duration_minutes * interval '1 minute')")
+# Expressions of IDs of the condition and the doctor in notifications of
+# changes of appointments (see '0004.CHANGE_KEYS') before and after
+NOTIFY_KEYS_BEFORE = ("r.condition_id", "(SELECT c.doctor_id FROM condition "
+                                        "AS c WHERE c.id = r.condition_id)")
+NOTIFY_KEYS_AFTER = ("r.condition_id", "r.doctor_id")
+# Events of triggers of notifications (see '0004.EVENTS')
+NOTIFY_EVENTS = (
+    ("INSERT", "REFERENCING NEW TABLE AS new_rows"),
+    ("UPDATE", "REFERENCING NEW TABLE AS new_rows"),
+    ("DELETE", "REFERENCING OLD TABLE AS old_rows"),
+    ("TRUNCATE", ""),
+)
+
+
+def _check_double_bookings():
+    """Fail if appointments of a doctor start within a minute (they
+    could not be shortened to a non-empty period)"""
+    conflicts = op.get_bind().execute(sa.text("""
+        SELECT previous_id, id, count(*) OVER () FROM (
+            SELECT id, date_and_time,
+                lag(id) OVER w AS previous_id,
+                lag(date_and_time) OVER w AS previous_date_and_time
+            FROM appointment
+            WINDOW w AS (PARTITION BY doctor_id ORDER BY date_and_time, id)
+        ) AS s
+        WHERE date_and_time < previous_date_and_time + interval '1 minute'
+        ORDER BY previous_id, id
+        LIMIT :limit
+    """), {"limit": REPORTED_CONFLICTS}).all()
+    if conflicts:
+        pairs = ", ".join(f"{_previous_id} and {_id}"
+                          for _previous_id, _id, _ in conflicts)
+        raise RuntimeError(
+            f"{conflicts[0][2]} appointments start within a minute after "
+            f"another appointment of the doctor (IDs {pairs}), reschedule "
+            f"or delete them before the upgrade"
+        )
+
+
+def _replace_notify_triggers(keys: tuple[str, str]):
+    """Recreate triggers of notifications of changes of appointments
+    with given expressions of IDs of the condition and the doctor"""
+    arguments = ", ".join(f"'{_key}'" for _key in keys)
+    for _event, _referencing in NOTIFY_EVENTS:
+        name = f"appointment_{_event.lower()}_notify"
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON appointment")
+        op.execute(f"CREATE TRIGGER {name} AFTER {_event} ON appointment "
+                   f"{_referencing} FOR EACH STATEMENT "
+                   f"EXECUTE PROCEDURE notify_changes({arguments})")
+
+
+def upgrade():
+    op.add_column("appointment", sa.Column("duration_minutes", sa.Integer,
+                                           nullable=False,
+                                           server_default="30"))
+    op.add_column("appointment", sa.Column("doctor_id", sa.Integer))
+    # Lookups of overlapping appointments rely on the longest one
+    op.create_check_constraint(
+        "appointment_duration_minutes_check", "appointment",
+        f"duration_minutes BETWEEN 1 AND {MAX_MINUTES}"
+    )
+
+    # Doctor of a new (or moved) appointment is the doctor of condition
+    op.execute("""
+        CREATE OR REPLACE FUNCTION set_appointment_doctor()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.doctor_id := (SELECT doctor_id FROM condition
+                              WHERE id = NEW.condition_id);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("CREATE TRIGGER appointment_set_doctor "
+               "BEFORE INSERT OR UPDATE OF condition_id ON appointment "
+               "FOR EACH ROW EXECUTE PROCEDURE set_appointment_doctor()")
+    # Appointments follow their condition to another doctor (rejected
+    # by the constraint if they overlap appointments of the doctor)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION move_condition_appointments()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE appointment AS a SET doctor_id = n.doctor_id
+            FROM new_rows AS n
+            WHERE a.condition_id = n.id
+                AND a.doctor_id IS DISTINCT FROM n.doctor_id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("CREATE TRIGGER condition_move_appointments "
+               "AFTER UPDATE ON condition "
+               "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT "
+               "EXECUTE PROCEDURE move_condition_appointments()")
+
+    # Existing appointments
+    op.execute("UPDATE appointment AS a SET doctor_id = c.doctor_id "
+               "FROM condition AS c WHERE c.id = a.condition_id")
+    _check_double_bookings()
+    op.execute("""
+        UPDATE appointment AS a SET duration_minutes = s.gap
+        FROM (
+            SELECT id, floor(extract(epoch FROM
+                lead(date_and_time) OVER (
+                    PARTITION BY doctor_id ORDER BY date_and_time, id
+                ) - date_and_time
+            ) / 60)::integer AS gap
+            FROM appointment
+        ) AS s
+        WHERE a.id = s.id AND s.gap < a.duration_minutes
+    """)
+    op.execute(f"ALTER TABLE appointment ADD CONSTRAINT {CONSTRAINT} "
+               f"EXCLUDE USING gist ({DOCTOR_KEY} WITH =, {PERIOD} WITH &&)")
+    op.create_index("ix_appointment_doctor_id_date_and_time", "appointment",
+                    ["doctor_id", "date_and_time"])
+    # Condition of deleted appointments could be deleted already
+    _replace_notify_triggers(NOTIFY_KEYS_AFTER)
+
+
+def downgrade():
+    _replace_notify_triggers(NOTIFY_KEYS_BEFORE)
+    op.drop_index("ix_appointment_doctor_id_date_and_time", "appointment")
+    op.execute(f"ALTER TABLE appointment DROP CONSTRAINT IF EXISTS "
+               f"{CONSTRAINT}")
+    op.execute("DROP TRIGGER IF EXISTS condition_move_appointments "
+               "ON condition")
+    op.execute("DROP TRIGGER IF EXISTS appointment_set_doctor "
+               "ON appointment")
+    op.execute("DROP FUNCTION IF EXISTS move_condition_appointments()")
+    op.execute("DROP FUNCTION IF EXISTS set_appointment_doctor()")
+    op.drop_column("appointment", "doctor_id")
+    op.drop_column("appointment", "duration_minutes")
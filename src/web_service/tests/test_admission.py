@@ -0,0 +1,121 @@
+import asyncio
+
+from letstalk.utils.admission import ConcurrencyLimit
+
+
+def _run(coroutine):
+    """Run the coroutine in a new event loop"""
+    return asyncio.run(coroutine)
+
+
+async def _queued(limit: ConcurrencyLimit) -> asyncio.Task:
+    """Start waiting for the slot of the saturated limit"""
+    task = asyncio.create_task(limit.acquire())
+    while not limit.stats()["queued"]:
+        await asyncio.sleep(0)
+    return task
+
+
+def test_admits_up_to_limit_and_rejects_full_queue():
+    async def _test():
+        limit = ConcurrencyLimit(2, 1, 1.0)
+        assert await limit.acquire()
+        assert await limit.acquire()
+        waiting = await _queued(limit)
+        assert not await limit.acquire()
+        limit.release()
+        assert await waiting
+        return limit.stats()
+
+    stats = _run(_test())
+    assert stats["in_flight"] == 2
+    assert stats["queued"] == 0
+    assert (stats["admitted"], stats["rejected"]) == (3, 1)
+
+
+def test_slots_are_handed_over_in_order():
+    async def _test():
+        limit = ConcurrencyLimit(1, 2, 1.0)
+        assert await limit.acquire()
+        first = await _queued(limit)
+        second = asyncio.create_task(limit.acquire())
+        limit.release()
+        assert await first
+        second_done = second.done()
+        limit.release()
+        assert await second
+        return second_done
+
+    assert not _run(_test())
+
+
+def test_times_out_waiting_request():
+    async def _test():
+        limit = ConcurrencyLimit(1, 1, 0.01)
+        assert await limit.acquire()
+        admitted = await limit.acquire()
+        limit.release()
+        return admitted, limit.stats()
+
+    admitted, stats = _run(_test())
+    assert not admitted
+    assert (stats["in_flight"], stats["queued"], stats["timed_out"]) == \
+        (0, 0, 1)
+
+
+def test_release_between_timeout_and_resumption():
+    async def _test():
+        limit = ConcurrencyLimit(1, 1, 0.01)
+        assert await limit.acquire()
+        waiting = await _queued(limit)
+        waiter = limit._waiters[0]
+        # Waiter is cancelled by the timeout before the request resumes
+        while not waiter.cancelled():
+            await asyncio.sleep(0)
+        limit.release()
+        return await waiting, limit.stats()
+
+    admitted, stats = _run(_test())
+    assert not admitted
+    assert (stats["in_flight"], stats["queued"], stats["timed_out"]) == \
+        (0, 0, 1)
+
+
+def test_release_between_cancellation_and_resumption():
+    async def _test():
+        limit = ConcurrencyLimit(1, 1, 1.0)
+        assert await limit.acquire()
+        waiting = await _queued(limit)
+        # Client disconnects, slot is released before the request resumes
+        waiting.cancel()
+        while not limit._waiters[0].cancelled():
+            await asyncio.sleep(0)
+        limit.release()
+        try:
+            await waiting
+        except asyncio.CancelledError:
+            pass
+        return waiting.cancelled(), limit.stats()
+
+    cancelled, stats = _run(_test())
+    assert cancelled
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
+
+
+def test_cancelled_request_returns_handed_over_slot():
+    async def _test():
+        limit = ConcurrencyLimit(1, 1, 1.0)
+        assert await limit.acquire()
+        waiting = await _queued(limit)
+        limit.release()
+        waiting.cancel()
+        try:
+            # Request keeps the slot handed over before the cancellation
+            if await waiting:
+                limit.release()
+        except asyncio.CancelledError:
+            pass
+        return limit.stats()
+
+    stats = _run(_test())
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
@@ -0,0 +1,29 @@
+from sqlalchemy.dialects import postgresql
+
+from letstalk.models import Concern
+
+
+class _Session:
+    """Session recording executed statements (referenced condition 1
+    exists)"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def scalars(self):
+        return iter([1])
+
+
+def test_missing_references_are_reported_and_existing_locked():
+    session = _Session()
+    errors = Concern._missing_references(session, [
+        {"condition_id": 1}, {"condition_id": 2}, {"condition_id": None}
+    ])
+    assert errors == {1: "condition_id does not exist"}
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    # Referenced rows can not be deleted before the insert
+    assert sql.endswith("FOR KEY SHARE")
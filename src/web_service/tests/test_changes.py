@@ -0,0 +1,30 @@
+from letstalk.utils.changes import ChangeFilter
+
+
+def _event(operation: str, doctor_id: int | None) -> dict:
+    """Event of a change of concern of condition 3"""
+    return {"model": "concern", "operation": operation, "id": 1,
+            "condition_id": 3, "doctor_id": doctor_id}
+
+
+def test_matches_doctor_and_condition():
+    change_filter = ChangeFilter(frozenset({"concern"}), 2, 3)
+    assert change_filter.matches(_event("insert", 2))
+    assert not change_filter.matches(_event("insert", 4))
+    assert not ChangeFilter(frozenset({"doctor"})).matches(
+        _event("insert", 2)
+    )
+
+
+def test_delivers_deletions_of_unknown_doctor():
+    change_filter = ChangeFilter(doctor_id=2)
+    # Condition of the concern was deleted before (by the cascade)
+    assert change_filter.matches(_event("delete", None))
+    assert not change_filter.matches(_event("delete", 4))
+    assert not change_filter.matches(_event("update", None))
+
+
+def test_delivers_truncations():
+    change_filter = ChangeFilter(doctor_id=2, condition_id=3)
+    assert change_filter.matches({"model": "concern",
+                                  "operation": "truncate"})
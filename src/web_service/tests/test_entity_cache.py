@@ -0,0 +1,28 @@
+from letstalk.utils.entity_cache import EntityCache, LocalCacheBackend
+
+
+class _FailingBackend:
+    """Backend that is not available (e. g. Redis is down)"""
+
+    def _fail(self, *args):
+        raise ConnectionError("cache is down")
+
+    get = set = delete = clear_table = _fail
+
+
+def test_caches_rows_of_version():
+    cache = EntityCache(LocalCacheBackend(10, 60.0))
+    cache.set("doctor", 1, {"id": 1}, version=5)
+    assert cache.get("doctor", 1, version=5) == (True, {"id": 1})
+    assert cache.get("doctor", 1, version=6) == (False, None)
+    cache.invalidate("doctor", 1)
+    assert cache.get("doctor", 1) == (False, None)
+
+
+def test_failing_backend_does_not_break_requests():
+    cache = EntityCache(_FailingBackend())
+    cache.set("doctor", 1, {"id": 1})
+    assert cache.get("doctor", 1) == (False, None)
+    cache.invalidate("doctor", 1)
+    cache.invalidate("doctor")
+    assert cache.stats()["misses"] == 1
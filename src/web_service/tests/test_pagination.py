@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from letstalk.utils.pagination import MAX_INTEGER_KEY, MIN_INTEGER_KEY, \
+    NEXT_CURSOR_HEADER, decode_after_cursor, decode_cursor, \
+    encode_cursor, is_integer_key, paginate, paginate_async
+
+# Keys of stored items
+ITEMS = [{"id": _id} for _id in range(1, 6)]
+
+
+def _fetch(limit, after):
+    """Select items with the key greater than after (at most limit)"""
+    items = [_item for _item in ITEMS if after is None or
+             _item["id"] > after]
+    return items if limit is None else items[:limit]
+
+
+async def _fetch_async(limit, after):
+    return _fetch(limit, after)
+
+
+@pytest.mark.parametrize("value", [0, 1, 12345, [0.25, 7], "text", None])
+def test_cursor_round_trip(value):
+    cursor = encode_cursor(value)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == value
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm90IGpzb24", "_w"])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_integer_keys():
+    assert is_integer_key(MIN_INTEGER_KEY)
+    assert is_integer_key(MAX_INTEGER_KEY)
+    assert not is_integer_key(MAX_INTEGER_KEY + 1)
+    assert not is_integer_key(MIN_INTEGER_KEY - 1)
+    assert not is_integer_key(True)
+    assert not is_integer_key(1.0)
+    assert not is_integer_key("1")
+
+
+def test_decode_after_cursor():
+    assert decode_after_cursor(None) is None
+    assert decode_after_cursor(encode_cursor(42)) == 42
+    assert decode_after_cursor(encode_cursor("a"),
+                               lambda _value: True) == "a"
+
+
+@pytest.mark.parametrize("cursor", [
+    "%%%", encode_cursor(None), encode_cursor("1"), encode_cursor([1]),
+    encode_cursor({"id": 1}), encode_cursor(False), encode_cursor(1.5),
+    encode_cursor(MAX_INTEGER_KEY + 1),
+])
+def test_invalid_after_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_after_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_paginate_pages():
+    response = Response()
+    assert paginate(_fetch, response, 2, None) == ITEMS[:2]
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    response = Response()
+    assert paginate(_fetch, response, 3, cursor) == ITEMS[2:]
+    assert NEXT_CURSOR_HEADER not in response.headers
+    assert paginate(_fetch, Response(), None, None) == ITEMS
+
+
+def test_paginate_async_matches_paginate():
+    for _limit, _after in [(2, None), (2, encode_cursor(2)),
+                           (None, encode_cursor(4)), (10, None)]:
+        response, async_response = Response(), Response()
+        items = paginate(_fetch, response, _limit, _after)
+        assert asyncio.run(paginate_async(
+            _fetch_async, async_response, _limit, _after
+        )) == items
+        assert async_response.headers.get(NEXT_CURSOR_HEADER) == \
+            response.headers.get(NEXT_CURSOR_HEADER)
+    with pytest.raises(HTTPException):
+        asyncio.run(paginate_async(_fetch_async, Response(), 2, "%%%"))
@@ -0,0 +1,28 @@
+import threading
+import time
+
+from letstalk.utils.profiling import StackSampler
+
+
+def get(stopped: threading.Event):
+    """Busy function named like an idle one (e. g. 'Model.get')"""
+    while not stopped.is_set():
+        sum(range(1000))
+
+
+def test_samples_busy_threads_only():
+    stopped = threading.Event()
+    busy = threading.Thread(target=get, args=(stopped, ))
+    idle = threading.Thread(target=stopped.wait)
+    busy.start()
+    idle.start()
+    sampler = StackSampler(0.001)
+    sampler.start()
+    time.sleep(0.05)
+    samples = sampler.stop()
+    stopped.set()
+    busy.join()
+    idle.join()
+    tops = {_stack[-1] for _stack in samples}
+    assert "test_profiling.py:get" in tops
+    assert "threading.py:wait" not in tops
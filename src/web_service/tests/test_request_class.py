@@ -0,0 +1,52 @@
+import pytest
+
+from letstalk.main import create_app
+from letstalk.utils.admission import DETAIL_CLASS, LIST_CLASS, \
+    WRITE_CLASS, request_class
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "/api/doctor/1", DETAIL_CLASS),
+    ("GET", "/api/async/concern/12", DETAIL_CLASS),
+    ("GET", "/api/doctor/1/availability", DETAIL_CLASS),
+    ("GET", "/api/doctor/1/summary", DETAIL_CLASS),
+    ("GET", "/api/condition/3/summary", DETAIL_CLASS),
+    ("GET", "/api/doctor", LIST_CLASS),
+    ("GET", "/api/concern-with-condition", LIST_CLASS),
+    ("GET", "/api/async/appointment-with-condition", LIST_CLASS),
+    ("GET", "/api/search/condition", LIST_CLASS),
+    ("GET", "/api/summary/doctor", LIST_CLASS),
+    ("POST", "/api/doctor", WRITE_CLASS),
+    ("PUT", "/api/condition-with-doctor", WRITE_CLASS),
+    ("DELETE", "/api/appointment/bulk", WRITE_CLASS),
+    ("POST", "/api/batch", WRITE_CLASS),
+])
+def test_classifies_requests(method, path, expected):
+    assert request_class(method, path) == expected
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/"),
+    ("GET", "/docs"),
+    ("GET", "/metrics"),
+    ("GET", "/api/stats/pool"),
+    ("GET", "/api/changes"),
+])
+def test_exempt_requests(method, path):
+    assert request_class(method, path) is None
+
+
+def test_classifies_routes_of_application():
+    for _route in create_app().routes:
+        if not _route.path.startswith("/api/") or \
+                request_class("GET", _route.path) is None:
+            continue
+        path = _route.path.replace("{item_id}", "1")
+        for _method in _route.methods:
+            if _method != "GET":
+                expected = WRITE_CLASS
+            elif "{item_id}" in _route.path:
+                expected = DETAIL_CLASS
+            else:
+                expected = LIST_CLASS
+            assert request_class(_method, path) == expected, path
@@ -0,0 +1,74 @@
+import datetime
+import enum
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+
+from letstalk.utils.serialization import create_encoder, \
+    create_list_encoder
+
+
+class _Level(enum.Enum):
+    LOW = "low"
+    HIGH = "high"
+
+
+class _Condition(BaseModel):
+    id: int
+    name: str
+    details: str | None = None
+
+
+class _Appointment(BaseModel):
+    id: int
+    date_and_time: datetime.datetime
+    day: datetime.date
+    level: _Level
+    duration_minutes: int = 30
+    note: str | None = Field(None, alias="comment")
+    condition: _Condition
+    others: list[_Condition] = []
+
+    class Config:
+        allow_population_by_field_name = True
+
+
+# Item as produced by 'ExtendedModelMixin' (extra keys included)
+ITEM = {
+    "id": 1,
+    "date_and_time": datetime.datetime(2022, 1, 3, 8, 30),
+    "day": datetime.date(2022, 1, 3),
+    "level": _Level.HIGH,
+    "note": "Bring results",
+    "condition": {"id": 2, "name": "Flu", "doctor_id": 3},
+    "others": [{"id": 4, "name": "Cold", "details": "Mild"}],
+    "doctor_id": 3,
+}
+
+
+def test_encoder_matches_jsonable_encoder():
+    expected = jsonable_encoder(_Appointment(**ITEM), by_alias=True)
+    assert create_encoder(_Appointment)(ITEM) == expected
+    assert create_list_encoder(_Appointment)([ITEM, ITEM]) == \
+        [expected, expected]
+
+
+def test_encoder_fills_defaults_and_none():
+    item = dict(ITEM, condition=None, level=None)
+    del item["note"]
+    encoded = create_encoder(_Appointment)(item)
+    assert encoded["duration_minutes"] == 30
+    assert encoded["comment"] is None
+    assert encoded["condition"] is None
+    assert encoded["level"] is None
+
+
+def test_encoder_projects_fields():
+    encode = create_encoder(_Appointment,
+                            frozenset({"id", "level", "condition.name"}))
+    assert encode(ITEM) == {"id": 1, "level": "high",
+                            "condition": {"name": "Flu"}}
+
+
+def test_encoders_are_created_once():
+    assert create_encoder(_Appointment) is create_encoder(_Appointment)
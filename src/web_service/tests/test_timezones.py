@@ -0,0 +1,11 @@
+import datetime
+
+from letstalk.utils.timezones import naive_utc
+
+
+def test_converts_aware_times_to_naive_utc():
+    prague = datetime.timezone(datetime.timedelta(hours=1))
+    assert naive_utc(datetime.datetime(2022, 1, 3, 9, tzinfo=prague)) == \
+        datetime.datetime(2022, 1, 3, 8)
+    assert naive_utc(datetime.datetime(2022, 1, 3, 9)) == \
+        datetime.datetime(2022, 1, 3, 9)